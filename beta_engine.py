@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import data_fingerprint, load_portfolio_returns, load_returns, load_rf_rm
+
+# Rolling windows (trading days) offered for beta estimates
+BETA_WINDOWS = (20, 60, 120, 252)
+
+# RiskMetrics decay for the exponentially weighted beta
+EWMA_LAMBDA = 0.94
+
+
+def _aligned(returns, market):
+    """Returns and market series on their common dates, rows with any missing value dropped"""
+    frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+    joined = frame.join(market.rename('__market__'), how='inner').dropna()
+    return joined.drop(columns='__market__'), joined['__market__']
+
+
+class BetaPanel:
+    """Rolling OLS betas of many series on one market series, shape (dates, tickers, windows).
+
+    Window sums of x, y, x² and xy for every window come from one set of running
+    (cumulative) sums, gathered with array indexing, so the whole panel is a handful of
+    matrix operations with no loop over tickers or windows and O(n) cost per series.
+    Returns are centred on their sample means first to keep the differences of large
+    sums accurate. Each beta is dated by the day that closes its window and is NaN until
+    the first full window.
+    """
+
+    def __init__(self, returns, market, windows=BETA_WINDOWS):
+        y_frame, x_series = _aligned(returns, market)
+        y = y_frame.to_numpy(dtype=float)
+        x = x_series.to_numpy(dtype=float)[:, None]
+        y = y - y.mean(axis=0)
+        x = x - x.mean()
+
+        self.index = y_frame.index
+        self.tickers = y_frame.columns
+        self.windows = tuple(windows)
+
+        # Running sums with a leading zero row: (n + 1, k)
+        columns = np.hstack([x, x * x, y, x * y])
+        running = np.vstack([np.zeros((1, columns.shape[1])), np.cumsum(columns, axis=0)])
+
+        n, k = y.shape
+        hi = np.arange(1, n + 1)[:, None]
+        lo = hi - np.asarray(self.windows)[None, :]
+        sums = running[hi] - running[np.clip(lo, 0, None)]  # (n, windows, 2 + 2k)
+
+        w = np.asarray(self.windows, dtype=float)[None, :, None]
+        sx, sxx = sums[:, :, :1], sums[:, :, 1:2]
+        sy, sxy = sums[:, :, 2:2 + k], sums[:, :, 2 + k:]
+        beta = (sxy - sx * sy / w) / (sxx - sx * sx / w)
+        beta[lo < 0] = np.nan
+
+        self.values = beta.transpose(0, 2, 1)
+
+    def window(self, window):
+        """Date-indexed DataFrame of betas (one column per ticker) for one window length"""
+        return pd.DataFrame(self.values[:, :, self.windows.index(window)], index=self.index, columns=self.tickers)
+
+    def ticker(self, ticker):
+        """Date-indexed DataFrame of betas (one column per window) for one ticker"""
+        return pd.DataFrame(self.values[:, self.tickers.get_loc(ticker), :], index=self.index, columns=list(self.windows))
+
+    def latest(self):
+        """Most recent beta of every ticker (rows) for every window (columns)"""
+        return pd.DataFrame(self.values[-1], index=self.tickers, columns=list(self.windows))
+
+
+def rolling_beta(returns, market, window):
+    """OLS beta of each column of ``returns`` on ``market`` over a sliding window of trading days"""
+    out = BetaPanel(returns, market, windows=(window,)).window(window)
+    return out.iloc[:, 0] if isinstance(returns, pd.Series) else out
+
+
+def full_sample_beta(returns, market):
+    """OLS beta of each column of ``returns`` on ``market`` over all common dates"""
+    y_frame, x_series = _aligned(returns, market)
+    x = x_series - x_series.mean()
+    return y_frame.sub(y_frame.mean()).mul(x, axis=0).sum() / (x * x).sum()
+
+
+def ewma_beta(returns, market, lam=EWMA_LAMBDA, min_periods=20):
+    """Exponentially weighted beta (decay ``lam``) of each column of ``returns`` on ``market``"""
+    y_frame, x_series = _aligned(returns, market)
+    alpha = 1 - lam
+
+    def ewm(values):
+        return values.ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean()
+
+    mean_x, mean_y = ewm(x_series), ewm(y_frame)
+    cov_xy = ewm(y_frame.mul(x_series, axis=0)).sub(mean_y.mul(mean_x, axis=0))
+    var_x = ewm(x_series * x_series) - mean_x * mean_x
+    out = cov_xy.div(var_x, axis=0)
+    return out.iloc[:, 0] if isinstance(returns, pd.Series) else out
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _market_betas(fingerprint):
+    market = load_rf_rm()['rm']
+    returns = load_returns().join(load_portfolio_returns()['Portfolio'])
+    return BetaPanel(returns, market), ewma_beta(returns, market)
+
+
+def load_beta_panel():
+    """Rolling betas against VNINDEX for each stock and the portfolio over BETA_WINDOWS, shared by every session"""
+    return _market_betas(data_fingerprint())[0]
+
+
+def load_market_betas():
+    """Rolling (BETA_WINDOWS) and EWMA betas against VNINDEX for the portfolio and each stock.
+
+    Returns a dict keyed by window length or ``'ewma'``; each value is a date-indexed
+    DataFrame with one column per stock plus ``Portfolio``. Shared by every session.
+    """
+    panel, ewma = _market_betas(data_fingerprint())
+    betas = {window: panel.window(window) for window in panel.windows}
+    betas['ewma'] = ewma.copy(deep=False)
+    return betas
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _capm_table(fingerprint, risk_free_rate, market_risk_premium):
+    market = load_rf_rm()['rm']
+    returns = load_returns().join(load_portfolio_returns()['Portfolio'])
+
+    beta = full_sample_beta(returns, market)
+    return pd.DataFrame({
+        'beta': beta,
+        'cost_of_equity': risk_free_rate + beta * market_risk_premium,
+    })
+
+
+def load_capm_table(risk_free_rate, market_risk_premium):
+    """Full-sample VNINDEX beta and CAPM cost of equity for each stock and the portfolio.
+
+    Computed once per data version and set of CAPM parameters, shared by every session.
+    """
+    return _capm_table(data_fingerprint(), risk_free_rate, market_risk_premium).copy(deep=False)
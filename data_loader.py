@@ -0,0 +1,219 @@
+import hashlib
+import importlib.util
+import json
+import os
+from functools import reduce
+
+import pandas as pd
+import streamlit as st
+
+# Input files used by the story page
+PRICE_PATH = 'attached_assets/price.csv'
+RETURNS_PATH = 'attached_assets/ìml.csv'
+RF_RM_PATH = 'attached_assets/rf-rm_1763969726233.csv'
+FRONTIER_PATH = 'attached_assets/result_output_1763851487710.csv'
+PORTFOLIO_RETURNS_PATH = 'port.csv'
+BETA_PATH = 'beta.csv'
+RETURNS_XTS_PATH = 'returns_xts_1763848584845.csv'
+STOCK_BETA_PATHS = {
+    'ACB': 'attached_assets/beta_ACB_1764121951709.csv',
+    'DBD': 'attached_assets/beta_DBD_1764121951709.csv',
+    'HPG': 'attached_assets/beta_HPG_1764121951709.csv',
+    'VNM': 'attached_assets/beta_VNM_1764121951709.csv',
+}
+
+# Holding weights the port.csv returns are built from (ìml.csv returns @ weights)
+PORTFOLIO_WEIGHTS = {'ACB': 0.205, 'HPG': 0.031, 'VNM': 0.395, 'DBD': 0.369}
+
+# Normalized tables: name -> (source CSV, parse options)
+SOURCES = {
+    'prices': (PRICE_PATH, dict(date_column='time', date_format='%m/%d/%Y')),
+    'returns': (RETURNS_PATH, dict(sep=';', decimal=',', date_column='time', date_format='%d/%m/%Y')),
+    'rf_rm': (RF_RM_PATH, dict(date_column='time', date_format='%d/%m/%Y')),
+    'frontier': (FRONTIER_PATH, dict(index_col=0)),
+    'portfolio_returns': (PORTFOLIO_RETURNS_PATH, dict(date_column='time', date_format='%d/%m/%Y')),
+    'beta': (BETA_PATH, dict(index_col=0, date_format='%Y-%m-%d')),
+    'returns_xts': (RETURNS_XTS_PATH, {}),
+}
+
+# Binary copy of the normalized tables, rebuilt whenever an input changes
+STORE_DIR = '.market_store'
+STORE_MANIFEST = 'manifest.json'
+
+_HAS_PARQUET = importlib.util.find_spec('pyarrow') is not None
+
+# (mtime, size) -> content hash, so unchanged files are not re-hashed on every rerun
+_fingerprints = {}
+
+
+def file_fingerprint(path):
+    """Return the content hash of a file, re-hashing only when its mtime or size changes"""
+    stat = os.stat(path)
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _fingerprints.get(path)
+    if cached is not None and cached[0] == stat_key:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+
+    _fingerprints[path] = (stat_key, digest)
+    return digest
+
+
+def _source_paths():
+    return [path for path, _ in SOURCES.values()] + list(STOCK_BETA_PATHS.values())
+
+
+def data_fingerprint():
+    """Combined content hash of every input file; changes whenever any input changes"""
+    digest = hashlib.sha1()
+    for path in sorted(_source_paths()):
+        digest.update(path.encode('utf-8'))
+        digest.update(file_fingerprint(path).encode('ascii'))
+    return digest.hexdigest()
+
+
+def _freeze(df):
+    """Back a numeric DataFrame with a read-only array so the shared copy cannot be mutated"""
+    values = df.to_numpy(dtype=float, copy=True)
+    values.flags.writeable = False
+    return pd.DataFrame(values, index=df.index, columns=df.columns, copy=False)
+
+
+def _parse_csv(path, sep=',', decimal='.', date_column=None, date_format=None, index_col=None):
+    """Parse one CSV export into an all-float DataFrame"""
+    df = pd.read_csv(path, sep=sep, decimal=decimal, index_col=index_col)
+
+    # Exports from Excel carry trailing empty columns and rows
+    df = df.loc[:, ~df.columns.astype(str).str.startswith('Unnamed')]
+    df = df.dropna(how='all')
+
+    if date_column is not None:
+        df[date_column] = pd.to_datetime(df[date_column], format=date_format)
+        df = df.dropna(subset=[date_column]).set_index(date_column).sort_index()
+    elif date_format is not None:
+        df.index = pd.to_datetime(df.index, format=date_format)
+        df.index.name = 'time'
+
+    return df.apply(pd.to_numeric, errors='coerce').astype(float)
+
+
+def _normalize_sources():
+    """Parse every input and put all dated tables on one trading-day calendar"""
+    tables = {name: _parse_csv(path, **options) for name, (path, options) in SOURCES.items()}
+
+    stock_betas = pd.concat(
+        {ticker: _parse_csv(path, index_col=0, date_format='%Y-%m-%d')['x'] for ticker, path in STOCK_BETA_PATHS.items()},
+        axis=1)
+    stock_betas.index.name = 'time'
+    tables['stock_betas'] = stock_betas
+
+    # Undated R exports (returns_xts) keep their positional index
+    dated = [name for name, df in tables.items() if isinstance(df.index, pd.DatetimeIndex)]
+    calendar = reduce(lambda left, right: left.union(right), (tables[name].index for name in dated))
+    calendar.name = 'time'
+    for name in dated:
+        tables[name] = tables[name].reindex(calendar)
+
+    return tables
+
+
+def _table_path(store_dir, name):
+    return os.path.join(store_dir, f'{name}.parquet')
+
+
+def _read_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, STORE_MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_market_store(store_dir=STORE_DIR):
+    """Normalize every CSV input once and write it as typed Parquet tables"""
+    fingerprint = data_fingerprint()
+    tables = _normalize_sources()
+    os.makedirs(store_dir, exist_ok=True)
+
+    # Write to temp files and swap in, so concurrent readers never see half a table
+    for name, df in tables.items():
+        target = _table_path(store_dir, name)
+        df.to_parquet(target + '.tmp')
+        os.replace(target + '.tmp', target)
+
+    manifest_path = os.path.join(store_dir, STORE_MANIFEST)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'fingerprint': fingerprint, 'tables': sorted(tables)}, f)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    return tables
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _market_tables(fingerprint, store_dir=STORE_DIR):
+    """Load all normalized tables for one version of the inputs; shared by every session"""
+    if not _HAS_PARQUET:
+        return {name: _freeze(df) for name, df in _normalize_sources().items()}
+
+    manifest = _read_manifest(store_dir)
+    if manifest.get('fingerprint') != fingerprint:
+        try:
+            tables = build_market_store(store_dir)
+        except OSError:
+            # Read-only deployment: keep the normalized tables in memory only
+            tables = _normalize_sources()
+        return {name: _freeze(df) for name, df in tables.items()}
+
+    return {name: _freeze(pd.read_parquet(_table_path(store_dir, name))) for name in manifest['tables']}
+
+
+def _load(name):
+    """Return a shallow, read-only view of a cached normalized table"""
+    return _market_tables(data_fingerprint())[name].copy(deep=False)
+
+
+def load_prices():
+    """Daily closing prices (thousand VND) indexed by trading day"""
+    return _load('prices')
+
+
+def load_returns():
+    """Daily discrete stock returns from ìml.csv indexed by trading day"""
+    return _load('returns')
+
+
+def load_rf_rm():
+    """Daily risk-free rate (rf) and VNINDEX return (rm) indexed by trading day"""
+    return _load('rf_rm')
+
+
+def load_frontier():
+    """Efficient frontier points (mean, StdDev, out, w.*) exported from R"""
+    return _load('frontier')
+
+
+def load_portfolio_returns():
+    """Daily portfolio returns from port.csv indexed by trading day"""
+    return _load('portfolio_returns')
+
+
+def load_beta():
+    """Daily DCC-GARCH portfolio beta exported from R"""
+    return _load('beta')
+
+
+def load_returns_xts():
+    """Daily stock returns exported from R (no dates attached)"""
+    return _load('returns_xts')
+
+
+def load_stock_betas():
+    """Per-stock daily betas exported from R, one column per ticker"""
+    return _load('stock_betas')
+
+
+if __name__ == "__main__":
+    build_market_store()
@@ -0,0 +1,98 @@
+import numpy as np
+import streamlit as st
+
+from mc_backend import ScenarioStreams, standard_normals
+
+# Smallest gap between cost of equity and terminal growth; closer pairs have no finite terminal value
+MIN_SPREAD = 0.005
+
+
+def project_cash_flows(fcfe, growth_shift=0.0):
+    """Cash-flow paths (..., years) with every year-on-year growth rate of ``fcfe`` moved by ``growth_shift``.
+
+    The first year is kept as forecast; ``growth_shift`` broadcasts, so an array of shifts
+    gives one path per shift.
+    """
+    fcfe = np.asarray(fcfe, dtype=float)
+    shift = np.asarray(growth_shift, dtype=float)[..., None]
+    factors = np.cumprod(fcfe[1:] / fcfe[:-1] + shift, axis=-1)
+    first = np.broadcast_to(fcfe[0], factors.shape[:-1] + (1,))
+    return np.concatenate([first, fcfe[0] * factors], axis=-1)
+
+
+def _gordon_value(last_cash_flow, discount_rate, terminal_growth):
+    """Terminal value at the last forecast year, NaN where the spread is below MIN_SPREAD"""
+    spread = discount_rate - terminal_growth
+    return last_cash_flow * (1 + terminal_growth) / np.where(spread >= MIN_SPREAD, spread, np.nan)
+
+
+def fcfe_valuation(cash_flows, discount_rate, terminal_growth):
+    """Equity value of FCFE paths: present value of the forecast years plus a Gordon terminal value.
+
+    ``cash_flows`` (..., years) broadcasts against ``discount_rate`` and ``terminal_growth``,
+    so one call values a whole grid or sample of inputs. Returns a dict with
+    ``pv_cash_flows`` (..., years), ``terminal_value``, ``pv_terminal`` and ``equity_value``;
+    values are NaN where the cost of equity is less than MIN_SPREAD above terminal growth.
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    r = np.asarray(discount_rate, dtype=float)
+    g = np.asarray(terminal_growth, dtype=float)
+    years = cash_flows.shape[-1]
+
+    discount = (1 + r[..., None]) ** -np.arange(1, years + 1)
+    pv_cash_flows = cash_flows * discount
+
+    terminal_value = _gordon_value(cash_flows[..., -1], r, g)
+    pv_terminal = terminal_value * discount[..., -1]
+
+    return {
+        'pv_cash_flows': pv_cash_flows,
+        'terminal_value': terminal_value,
+        'pv_terminal': pv_terminal,
+        'equity_value': pv_cash_flows.sum(axis=-1) + pv_terminal,
+    }
+
+
+def valuation_grid(fcfe, discount_rates, terminal_growth, growth_shifts=(0.0,)):
+    """Equity value on every (growth shift, discount rate, terminal growth) combination.
+
+    Returns an array of shape (len(growth_shifts), len(discount_rates), len(terminal_growth)),
+    evaluated in one broadcast rather than one call per cell.
+    """
+    paths = project_cash_flows(fcfe, np.asarray(growth_shifts, dtype=float)[:, None, None])
+    r = np.asarray(discount_rates, dtype=float)[None, :, None]
+    g = np.asarray(terminal_growth, dtype=float)[None, None, :]
+
+    # The forecast years do not depend on terminal growth: discount them before broadcasting over it
+    years = paths.shape[-1]
+    explicit = (paths * (1 + r[..., None]) ** -np.arange(1, years + 1)).sum(axis=-1)
+    return explicit + _gordon_value(paths[..., -1], r, g) * (1 + r) ** -years
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_valuation_grid(fcfe, discount_rates, terminal_growth, growth_shifts=(0.0,)):
+    """Valuation grid for one set of inputs, memoized on their content"""
+    return valuation_grid(fcfe, discount_rates, terminal_growth, growth_shifts)
+
+
+def simulate_valuation(fcfe, discount_rate, terminal_growth, discount_sd, terminal_sd, growth_sd, n_sims,
+                       seed=42, method='standard', workers=None):
+    """Monte Carlo equity values from normal draws of cost of equity, terminal growth and FCFE growth.
+
+    Each scenario draws a cost of equity, a terminal growth rate and a shift applied to every
+    forecast growth rate, all independent, and is valued with ``fcfe_valuation``. Scenario
+    blocks run on independent streams (see ``mc_backend.ScenarioStreams``) and ``method``
+    selects a variance-reduction scheme. Scenarios without a finite terminal value are NaN.
+    """
+    streams = ScenarioStreams(n_sims, seed=seed, workers=workers)
+    out = np.empty(n_sims)
+    loc = np.array([discount_rate, terminal_growth, 0.0])
+    scale = np.array([discount_sd, terminal_sd, growth_sd])
+
+    def value(rng, lo, hi):
+        inputs = loc + scale * standard_normals(rng, 1, hi - lo, 3, method)[0]
+        paths = project_cash_flows(fcfe, inputs[:, 2])
+        out[lo:hi] = fcfe_valuation(paths, inputs[:, 0], inputs[:, 1])['equity_value']
+
+    streams.map(value)
+    return out
@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Numerical slack for weight / multiplier sign checks
+_TOL = 1e-12
+
+
+def _solve_kkt(cov, mean, free, with_target):
+    """Solve the equality-constrained KKT system on the free assets.
+
+    Returns (w0, w1, lam0, lam1) so that, for a target return t, the free weights are
+    ``w0 + t * w1`` and the multipliers (budget, return) are ``lam0 + t * lam1``.
+    Without a return target the solution does not depend on t and ``w1`` / ``lam1`` are zero.
+    """
+    k = len(free)
+    sigma = cov[np.ix_(free, free)]
+    ones = np.ones(k)
+
+    if with_target:
+        kkt = np.zeros((k + 2, k + 2))
+        kkt[:k, :k] = sigma
+        kkt[:k, k] = -ones
+        kkt[:k, k + 1] = -mean[free]
+        kkt[k, :k] = ones
+        kkt[k + 1, :k] = mean[free]
+        rhs = np.zeros((k + 2, 2))
+        rhs[k, 0] = 1.0
+        rhs[k + 1, 1] = 1.0
+    else:
+        kkt = np.zeros((k + 1, k + 1))
+        kkt[:k, :k] = sigma
+        kkt[:k, k] = -ones
+        kkt[k, :k] = ones
+        rhs = np.zeros((k + 1, 2))
+        rhs[k, 0] = 1.0
+
+    try:
+        sol = np.linalg.solve(kkt, rhs)
+    except np.linalg.LinAlgError:
+        sol = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+
+    lam = np.zeros((2, 2))
+    lam[:sol.shape[0] - k] = sol[k:]
+    return sol[:k, 0], sol[:k, 1], lam[:, 0], lam[:, 1]
+
+
+def _bound_multipliers(cov, mean, free, bound, w_free, lam):
+    """Multipliers of the w >= 0 constraints for assets held at zero"""
+    return cov[np.ix_(bound, free)] @ w_free - lam[0] - lam[1] * mean[bound]
+
+
+def min_variance_weights(mean, cov, max_iter=None):
+    """Long-only global minimum variance portfolio via a primal active-set method"""
+    n = len(mean)
+    free = np.ones(n, dtype=bool)
+    max_iter = max_iter or 4 * n + 10
+
+    for _ in range(max_iter):
+        idx_free = np.flatnonzero(free)
+        idx_bound = np.flatnonzero(~free)
+        w_free, _, lam, _ = _solve_kkt(cov, mean, idx_free, with_target=False)
+
+        if w_free.min() < -_TOL:
+            free[idx_free[np.argmin(w_free)]] = False
+            continue
+
+        if len(idx_bound):
+            nu = _bound_multipliers(cov, mean, idx_free, idx_bound, w_free, lam)
+            if nu.min() < -_TOL:
+                free[idx_bound[np.argmin(nu)]] = True
+                continue
+
+        weights = np.zeros(n)
+        weights[idx_free] = np.clip(w_free, 0.0, None)
+        return weights / weights.sum(), free
+
+    raise RuntimeError("Minimum variance active-set search did not converge")
+
+
+def trace_frontier(mean, cov, targets):
+    """Long-only mean-variance frontier weights for ascending target returns.
+
+    Between two corner portfolios the active set is fixed and the optimal weights are
+    linear in the target return, so each segment is solved once and evaluated for all
+    of its targets in one step. The active set of one segment warm-starts the next.
+    """
+    mean = np.asarray(mean, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    targets = np.asarray(targets, dtype=float)
+    n = len(mean)
+
+    weights = np.zeros((len(targets), n))
+    _, free = min_variance_weights(mean, cov)
+
+    start = 0
+    for _ in range(4 * n + len(targets) + 10):
+        if start >= len(targets):
+            return weights
+
+        idx_free = np.flatnonzero(free)
+        idx_bound = np.flatnonzero(~free)
+
+        # A single free asset can only deliver its own mean return
+        if len(idx_free) == 1:
+            weights[start:, idx_free[0]] = 1.0
+            return weights
+
+        w0, w1, lam0, lam1 = _solve_kkt(cov, mean, idx_free, with_target=True)
+
+        # Ratio test: how far can the target rise before a weight or a multiplier turns negative
+        t_end, leaving, entering = np.inf, None, None
+
+        falling = w1 < -_TOL
+        if falling.any():
+            limits = -w0[falling] / w1[falling]
+            pos = np.argmin(limits)
+            t_end, leaving = limits[pos], idx_free[falling][pos]
+
+        if len(idx_bound):
+            nu0 = _bound_multipliers(cov, mean, idx_free, idx_bound, w0, lam0)
+            nu1 = cov[np.ix_(idx_bound, idx_free)] @ w1 - lam1[0] - lam1[1] * mean[idx_bound]
+            falling = nu1 < -_TOL
+            if falling.any():
+                limits = -nu0[falling] / nu1[falling]
+                pos = np.argmin(limits)
+                if limits[pos] < t_end:
+                    t_end, leaving, entering = limits[pos], None, idx_bound[falling][pos]
+
+        stop = np.searchsorted(targets, t_end, side='right') if np.isfinite(t_end) else len(targets)
+        stop = max(stop, start)
+        segment = targets[start:stop]
+        if len(segment):
+            weights[start:stop, idx_free] = np.clip(w0 + np.outer(segment, w1), 0.0, None)
+            start = stop
+
+        if leaving is not None:
+            free[leaving] = False
+        elif entering is not None:
+            free[entering] = True
+
+    raise RuntimeError("Frontier active-set walk did not converge")
+
+
+def frontier_from_moments(mean, cov, n_points=1000):
+    """Efficient frontier in the layout of the R export: mean, StdDev, out and w.<ticker>.
+
+    ``mean`` is a Series and ``cov`` a DataFrame indexed by ticker. Targets are spaced
+    evenly from the long-only minimum variance return to the largest single-asset mean.
+    """
+    tickers = list(mean.index)
+    mean = mean.to_numpy(dtype=float)
+    cov = cov.to_numpy(dtype=float)
+
+    min_var, _ = min_variance_weights(mean, cov)
+    targets = np.linspace(min_var @ mean, mean.max(), n_points)
+    weights = trace_frontier(mean, cov, targets)
+    weights /= weights.sum(axis=1, keepdims=True)
+
+    variance = np.einsum('ij,jk,ik->i', weights, cov, weights)
+    frontier = pd.DataFrame({
+        'mean': weights @ mean,
+        'StdDev': np.sqrt(variance),
+        'out': variance,
+    }, index=[f'result.{i}' for i in range(1, n_points + 1)])
+    weight_columns = pd.DataFrame(weights, index=frontier.index, columns=[f'w.{ticker}' for ticker in tickers])
+
+    return pd.concat([frontier, weight_columns], axis=1)
+
+
+def compute_efficient_frontier(returns, n_points=1000):
+    """Efficient frontier from the sample mean and covariance of daily ``returns``"""
+    returns = returns.dropna()
+    return frontier_from_moments(returns.mean(), returns.cov(), n_points)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_efficient_frontier(mean, cov, n_points=1000):
+    """Efficient frontier for one (mean, covariance) pair, memoized on their content"""
+    return frontier_from_moments(mean, cov, n_points)
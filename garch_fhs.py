@@ -0,0 +1,162 @@
+import hashlib
+import threading
+from collections import namedtuple
+
+import numpy as np
+import streamlit as st
+from scipy.optimize import minimize
+from scipy.signal import lfilter
+
+from mc_backend import ScenarioStreams
+
+# One GARCH(1,1) fit: constant mean, variance intercept, ARCH and GARCH coefficients, the
+# sample variance the intercept targets and the likelihood evaluations the fit took
+GarchFit = namedtuple('GarchFit', 'mean omega alpha beta variance evaluations')
+
+# (alpha, beta) a fit starts from when there is no earlier fit to warm-start from
+GARCH_START = (0.08, 0.90)
+
+# Upper limit on the persistence alpha + beta, keeping the variance process stationary
+MAX_PERSISTENCE = 0.999
+
+# Fits kept in the shared warm-start store
+FIT_STORE_SIZE = 4096
+
+
+def garch_variance(residuals, omega, alpha, beta, initial):
+    """Conditional variances of ``residuals``, length n + 1; the last is the next-day forecast.
+
+    The recursion s[t] = omega + alpha * e[t-1]**2 + beta * s[t-1], started at ``initial``,
+    is a first-order linear filter over the squared residuals and runs as one ``lfilter``
+    call instead of a Python loop.
+    """
+    drive = np.concatenate([[initial], omega + alpha * np.asarray(residuals, dtype=float)**2])
+    return lfilter([1.0], [1.0, -beta], drive)
+
+
+def _coefficients(params):
+    """(alpha, beta) from the box-bounded (persistence, ARCH share) parametrization"""
+    persistence, share = params
+    return persistence * share, persistence * (1 - share)
+
+
+def _negative_log_likelihood(params, residuals, variance):
+    """Gaussian negative log-likelihood and its gradient in the (persistence, share) parameters.
+
+    The variance derivatives follow the same linear recursion as the variance, so they
+    are filtered the same way.
+    """
+    alpha, beta = _coefficients(params)
+    squared = residuals**2
+    s = garch_variance(residuals, variance * (1 - alpha - beta), alpha, beta, variance)
+    lagged = s[:-2]
+    s = s[:-1]
+
+    d_alpha = lfilter([1.0], [1.0, -beta], np.concatenate([[0.0], squared[:-1] - variance]))
+    d_beta = lfilter([1.0], [1.0, -beta], np.concatenate([[0.0], lagged - variance]))
+    weight = 0.5 * (1 / s - squared / s**2)
+    g_alpha, g_beta = weight @ d_alpha, weight @ d_beta
+
+    persistence, share = params
+    gradient = [share * g_alpha + (1 - share) * g_beta, persistence * (g_alpha - g_beta)]
+    return 0.5 * np.sum(np.log(s) + squared / s), np.array(gradient)
+
+
+def fit_garch(returns, start=None):
+    """Gaussian quasi-maximum-likelihood GARCH(1,1) fit with a constant mean and variance targeting.
+
+    The intercept is tied to the sample variance, leaving (alpha, beta) to optimize under
+    box bounds. ``start`` is an earlier fit (or an (alpha, beta) pair) to start from; a
+    fit of nearly the same data converges in a few evaluations.
+    """
+    returns = np.asarray(returns, dtype=float)
+    mean = returns.mean()
+    residuals = returns - mean
+    variance = residuals.var()
+
+    alpha, beta = (start.alpha, start.beta) if isinstance(start, GarchFit) else (start or GARCH_START)
+    persistence = min(alpha + beta, MAX_PERSISTENCE)
+    share = alpha / (alpha + beta) if alpha + beta > 0 else 0.5
+    result = minimize(_negative_log_likelihood, [persistence, share], args=(residuals, variance), jac=True,
+                      method='L-BFGS-B', bounds=[(0.0, MAX_PERSISTENCE), (0.0, 1.0)])
+
+    alpha, beta = _coefficients(result.x)
+    return GarchFit(mean, variance * (1 - alpha - beta), alpha, beta, variance, result.nfev)
+
+
+def filter_returns(returns, fit):
+    """Standardized residuals of ``returns`` under ``fit`` and the next-day volatility"""
+    residuals = np.asarray(returns, dtype=float) - fit.mean
+    sigma = np.sqrt(garch_variance(residuals, fit.omega, fit.alpha, fit.beta, fit.variance))
+    return residuals / sigma[:-1], sigma[-1]
+
+
+def _digest(returns):
+    return hashlib.sha1(np.ascontiguousarray(returns, dtype=float).tobytes()).hexdigest()
+
+
+@st.cache_resource(show_spinner=False)
+def _fit_store():
+    """GARCH fits per return-series digest, shared by every session"""
+    return {}, threading.Lock()
+
+
+def cached_garch_fit(returns):
+    """GARCH(1,1) fit of ``returns``, shared across sessions.
+
+    A series seen before is a lookup. Otherwise the fit is warm-started from the stored fit
+    of the same series without its last day, so appending a trading day refits from the
+    previous day's parameters.
+    """
+    returns = np.asarray(returns, dtype=float)
+    store, lock = _fit_store()
+    key, previous = _digest(returns), _digest(returns[:-1])
+    with lock:
+        fit = store.get(key)
+        start = store.get(previous)
+    if fit is not None:
+        return fit
+
+    fit = fit_garch(returns, start)
+    with lock:
+        store[key] = fit
+        while len(store) > FIT_STORE_SIZE:
+            store.pop(next(iter(store)))
+    return fit
+
+
+def rolling_garch_fits(returns, window):
+    """GARCH fit of every trailing ``window`` of returns, each warm-started from the one before.
+
+    Element ``t`` is fitted on returns[t:t + window] and forecasts day t + window.
+    """
+    returns = np.asarray(returns, dtype=float)
+    fits, fit = [], None
+    for t in range(len(returns) - window):
+        fit = fit_garch(returns[t:t + window], fit)
+        fits.append(fit)
+    return fits
+
+
+def simulate_fhs_returns(standardized, fit, sigma_next, horizon, n_sims, seed=42, workers=None):
+    """Cumulative returns (n_sims, horizon) of GARCH paths driven by resampled standardized residuals.
+
+    Each scenario starts from the next-day volatility, draws a past standardized residual
+    per day (filtered historical simulation) and feeds the shock back into the variance
+    recursion. Scenario blocks run on independent streams (see ``mc_backend.ScenarioStreams``).
+    """
+    standardized = np.asarray(standardized, dtype=float)
+    streams = ScenarioStreams(n_sims, seed=seed, workers=workers)
+    out = np.empty((n_sims, horizon))
+
+    def simulate(rng, lo, hi):
+        variance = np.full(hi - lo, sigma_next**2)
+        total = np.zeros(hi - lo)
+        for day in range(horizon):
+            shock = np.sqrt(variance) * standardized[rng.integers(0, len(standardized), hi - lo)]
+            total += fit.mean + shock
+            out[lo:hi, day] = total
+            variance = fit.omega + fit.alpha * shock**2 + fit.beta * variance
+
+    streams.map(simulate)
+    return out
@@ -0,0 +1,168 @@
+import numpy as np
+
+from mc_backend import ScenarioStreams, brownian_bridge, percentile_standard_error, standard_normals
+
+# Trading days per year used to annualize drift and volatility
+TRADING_DAYS = 252
+
+
+def _log_increment_params(mu, sigma, corr, dt):
+    """Per-step drift and the scaled Cholesky factor mapping iid normals to log-increments"""
+    mu = np.asarray(mu, dtype=float)
+    sigma = np.asarray(sigma, dtype=float)
+    L = np.linalg.cholesky(np.asarray(corr, dtype=float))
+
+    drift = (mu - 0.5 * sigma**2) * dt
+    # eps = z @ L.T, diffusion = sigma * eps * sqrt(dt)  ->  z @ (L.T * sigma * sqrt(dt))
+    scale = L.T * (sigma * np.sqrt(dt))
+    return drift, scale
+
+
+def _iter_gbm_blocks(S0, mu, sigma, corr, n_days, n_sims, dt, seed, chunk_days, method, workers):
+    """Yield (start, stop, prices) for consecutive blocks of days; prices is (days, n_sims, n_assets).
+
+    Each block of scenarios draws the shocks for a block of days at once, correlates them
+    with a single matmul and turns them into prices by a cumulative sum of log-increments,
+    carrying log prices from one block of days to the next. Scenario blocks run in parallel
+    on independent streams (see ``mc_backend.ScenarioStreams``).
+
+    With ``sobol`` the underlying Brownian motion at the end of every block of days comes
+    from one Sobol' point per scenario through a Brownian bridge, and the days in between
+    are filled with pseudo-random bridges. Other methods draw day by day, so the paths do
+    not depend on ``chunk_days``.
+    """
+    S0 = np.asarray(S0, dtype=float)
+    n_assets = len(S0)
+    drift, scale = _log_increment_params(mu, sigma, corr, dt)
+    streams = ScenarioStreams(n_sims, seed=seed, workers=workers)
+    last_log = np.zeros((n_sims, n_assets))
+
+    bounds = list(range(0, n_days, chunk_days)) + [n_days]
+    if method == 'sobol':
+        # Brownian motion (in units of daily shocks) at every block boundary
+        knots = np.zeros((len(bounds), n_sims, n_assets))
+
+        def place_knots(rng, lo, hi):
+            z = standard_normals(rng, len(bounds) - 1, hi - lo, n_assets, 'sobol')
+            knots[1:, lo:hi] = brownian_bridge(z, bounds[1:])
+
+        streams.map(place_knots)
+
+    for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        block = np.empty((stop - start, n_sims, n_assets))
+
+        def simulate(rng, lo, hi):
+            if method == 'sobol':
+                # Random walk pinned to the Sobol' knots at both ends of the block
+                walk = np.cumsum(rng.standard_normal((stop - start, hi - lo, n_assets)), axis=0)
+                ramp = np.arange(1, stop - start + 1)[:, None, None] / (stop - start)
+                walk += ramp * (knots[i + 1, lo:hi] - knots[i, lo:hi] - walk[-1])
+                shocks = np.diff(walk, axis=0, prepend=0.0)
+            else:
+                shocks = standard_normals(rng, stop - start, hi - lo, n_assets, method)
+
+            log_paths = shocks @ scale
+            log_paths += drift
+            log_paths[0] += last_log[lo:hi]
+            np.cumsum(log_paths, axis=0, out=log_paths)
+            last_log[lo:hi] = log_paths[-1]
+
+            np.exp(log_paths, out=log_paths)
+            log_paths *= S0
+            block[:, lo:hi, :] = log_paths
+
+        streams.map(simulate)
+        yield start, stop, block
+
+
+def simulate_gbm_paths_chunked(S0, mu, sigma, corr, n_days, n_sims, dt=1 / TRADING_DAYS, seed=42,
+                               chunk_days=63, method='standard', workers=None, progress=None):
+    """Correlated GBM price paths, shape (n_sims, n_days + 1, n_assets), built ``chunk_days`` at a time.
+
+    Working memory beyond the output is O(chunk_days * n_sims * n_assets). ``method`` selects
+    a variance-reduction scheme from ``mc_backend.VARIANCE_REDUCTION``.
+    ``progress(done, total)`` is called after each block.
+    """
+    S0 = np.asarray(S0, dtype=float)
+    paths = np.empty((n_sims, n_days + 1, len(S0)))
+    paths[:, 0, :] = S0
+
+    for start, stop, block in _iter_gbm_blocks(S0, mu, sigma, corr, n_days, n_sims, dt, seed, chunk_days, method,
+                                                 workers):
+        paths[:, start + 1:stop + 1, :] = block.transpose(1, 0, 2)
+        if progress is not None:
+            progress(stop, n_days)
+
+    return paths
+
+
+def simulate_gbm_paths(S0, mu, sigma, corr, n_days, n_sims, dt=1 / TRADING_DAYS, seed=42, method='standard',
+                       workers=None):
+    """Correlated GBM price paths, shape (n_sims, n_days + 1, n_assets), in one shot.
+
+    All shocks of a scenario block are drawn, correlated and accumulated in one step.
+    """
+    return simulate_gbm_paths_chunked(S0, mu, sigma, corr, n_days, n_sims, dt=dt, seed=seed,
+                                      chunk_days=max(n_days, 1), method=method, workers=workers)
+
+
+def _block_percentiles(block, percentiles):
+    """``np.percentile(block, percentiles, axis=1)`` for a (days, n_sims, n_assets) block.
+
+    Every (day, asset) row is made contiguous and fully sorted, then the two order
+    statistics around each percentile are interpolated linearly. NumPy's vectorized sort
+    is several times faster here than the selection ``np.percentile`` runs per column.
+    """
+    rows = np.sort(block.transpose(0, 2, 1), axis=-1)
+    position = np.asarray(percentiles, dtype=float) / 100 * (rows.shape[-1] - 1)
+    below = np.floor(position).astype(int)
+    above = np.minimum(below + 1, rows.shape[-1] - 1)
+    low, high = rows[..., below], rows[..., above]
+    return (low + (position - below) * (high - low)).transpose(2, 0, 1)
+
+
+def simulate_gbm_summary(S0, mu, sigma, corr, n_days, n_sims, percentiles=(10, 50, 90), n_sample_paths=30,
+                         dt=1 / TRADING_DAYS, seed=42, chunk_days=21, method='standard', workers=None,
+                         progress=None):
+    """Per-day percentiles, a few sample paths and the terminal prices, without the full path cube.
+
+    Paths are streamed in blocks of days. Every block holds all scenarios for its days, so
+    the per-day percentiles are exact and match ``np.percentile`` over the full cube, while
+    peak memory is O(chunk_days * n_sims) plus O(n_days) for the outputs. Returns a dict with
+    ``percentiles`` (len(percentiles), n_days + 1, n_assets), ``sample_paths``
+    (n_sample_paths, n_days + 1, n_assets), ``terminal`` (n_sims, n_assets) and
+    ``terminal_se``, the standard error of each terminal percentile (len(percentiles), n_assets).
+    """
+    S0 = np.asarray(S0, dtype=float)
+    n_sample_paths = min(n_sample_paths, n_sims)
+
+    bands = np.empty((len(percentiles), n_days + 1, len(S0)))
+    bands[:, 0, :] = S0
+    sample_paths = np.empty((n_sample_paths, n_days + 1, len(S0)))
+    sample_paths[:, 0, :] = S0
+    terminal = S0[None, :].repeat(n_sims, axis=0)
+
+    for start, stop, block in _iter_gbm_blocks(S0, mu, sigma, corr, n_days, n_sims, dt, seed, chunk_days, method,
+                                                 workers):
+        bands[:, start + 1:stop + 1, :] = _block_percentiles(block, percentiles)
+        sample_paths[:, start + 1:stop + 1, :] = block[:, :n_sample_paths, :].transpose(1, 0, 2)
+        terminal = block[-1].copy()
+        if progress is not None:
+            progress(stop, n_days)
+
+    terminal_se = percentile_standard_error(terminal, percentiles)
+    return {'percentiles': bands, 'sample_paths': sample_paths, 'terminal': terminal, 'terminal_se': terminal_se}
+
+
+def path_polyline(paths):
+    """Paths (n_paths, n_points) joined into one float32 polyline for a single plot trace.
+
+    Returns (x, y): day indices and prices of every path in turn, each path followed by a
+    NaN point so the line breaks between paths instead of connecting them.
+    """
+    n_paths, n_points = np.shape(paths)
+    y = np.full((n_paths, n_points + 1), np.nan, dtype=np.float32)
+    y[:, :-1] = paths
+    x = np.full(n_points + 1, np.nan, dtype=np.float32)
+    x[:-1] = np.arange(n_points)
+    return np.tile(x, n_paths), y.ravel()
@@ -0,0 +1,187 @@
+import heapq
+import os
+import threading
+from collections import Counter
+
+import pandas as pd
+import streamlit as st
+from openpyxl import load_workbook
+
+from data_loader import file_fingerprint
+
+# One holdings report per fund (CSV or Excel); the file name is the fund name
+HOLDINGS_DIR = 'fund_holdings'
+HOLDINGS_EXTENSIONS = ('.csv', '.xlsx', '.xlsm')
+
+# Accepted header names (lower case) for the columns of a report
+TICKER_HEADERS = ('ticker', 'stock', 'symbol', 'mã', 'mã ck')
+SECTOR_HEADERS = ('sector', 'ngành')
+WEIGHT_HEADERS = ('weight', 'tỷ trọng')
+
+
+def _pick(columns, headers):
+    lookup = {str(column).strip().lower(): column for column in columns}
+    return next((lookup[name] for name in headers if name in lookup), None)
+
+
+def read_holdings_report(path):
+    """Holdings of one fund report as a DataFrame with ticker, sector and weight columns.
+
+    Excel reports are read with openpyxl in read-only mode (first sheet, first row as
+    header). Missing sector or weight columns come back as None.
+    """
+    if path.lower().endswith('.csv'):
+        raw = pd.read_csv(path)
+    else:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows)
+            raw = pd.DataFrame(list(rows), columns=header)
+        finally:
+            workbook.close()
+
+    ticker_column = _pick(raw.columns, TICKER_HEADERS)
+    if ticker_column is None:
+        raise ValueError(f"No ticker column in holdings report {path}")
+    sector_column = _pick(raw.columns, SECTOR_HEADERS)
+    weight_column = _pick(raw.columns, WEIGHT_HEADERS)
+
+    report = pd.DataFrame({
+        'ticker': raw[ticker_column].astype(str).str.strip().str.upper(),
+        'sector': raw[sector_column] if sector_column is not None else None,
+        'weight': pd.to_numeric(raw[weight_column], errors='coerce') if weight_column is not None else None,
+    })
+    return report[raw[ticker_column].notna() & (report['ticker'] != '')].drop_duplicates('ticker')
+
+
+class HoldingsIndex:
+    """Inverted indexes over fund holdings: ticker -> funds, fund -> tickers, sector -> tickers.
+
+    Reports are added or replaced one fund at a time and only that fund's postings change,
+    so a new report costs O(its holdings). Fund counts per ticker are kept up to date
+    alongside, so top-K, co-holding and overlap queries never rescan the reports.
+    """
+
+    def __init__(self):
+        self.fund_tickers = {}
+        self.ticker_funds = {}
+        self.sector_tickers = {}
+        self.ticker_sector = {}
+        self.weights = {}
+        self.fund_counts = Counter()
+        self._lock = threading.RLock()
+
+    def add_report(self, fund, report):
+        """Add (or replace) the holdings of ``fund`` from a read_holdings_report frame"""
+        with self._lock:
+            self.remove_fund(fund)
+            tickers = frozenset(report['ticker'])
+            self.fund_tickers[fund] = tickers
+            for ticker in tickers:
+                self.ticker_funds.setdefault(ticker, set()).add(fund)
+                self.fund_counts[ticker] += 1
+
+            for ticker, sector in zip(report['ticker'], report['sector']):
+                if isinstance(sector, str) and sector.strip():
+                    self.set_sector(ticker, sector.strip())
+            if report['weight'].notna().any():
+                self.weights[fund] = dict(zip(report['ticker'], report['weight']))
+
+    def remove_fund(self, fund):
+        """Drop every posting of ``fund``; no-op when it is not indexed"""
+        with self._lock:
+            for ticker in self.fund_tickers.pop(fund, ()):
+                self.ticker_funds[ticker].discard(fund)
+                self.fund_counts[ticker] -= 1
+                if not self.ticker_funds[ticker]:
+                    del self.ticker_funds[ticker]
+                    del self.fund_counts[ticker]
+            self.weights.pop(fund, None)
+
+    def set_sector(self, ticker, sector):
+        """Record (or move) ``ticker`` under ``sector``"""
+        with self._lock:
+            previous = self.ticker_sector.get(ticker)
+            if previous == sector:
+                return
+            if previous is not None:
+                self.sector_tickers[previous].discard(ticker)
+            self.ticker_sector[ticker] = sector
+            self.sector_tickers.setdefault(sector, set()).add(ticker)
+
+    def assign_sectors(self, sector_map):
+        """Fill in sectors for tickers whose reports did not carry one"""
+        with self._lock:
+            for ticker, sector in sector_map.items():
+                if ticker not in self.ticker_sector:
+                    self.set_sector(ticker, sector)
+
+    def funds_holding(self, ticker):
+        """Funds holding ``ticker``, sorted by name"""
+        return sorted(self.ticker_funds.get(ticker, ()))
+
+    def top_k(self, k=15, sector=None):
+        """The ``k`` tickers held by the most funds as (ticker, fund count), ties by ticker"""
+        with self._lock:
+            candidates = self.fund_counts if sector is None else {
+                ticker: self.fund_counts[ticker] for ticker in self.sector_tickers.get(sector, ()) if ticker in self.fund_counts}
+            return heapq.nsmallest(k, candidates.items(), key=lambda item: (-item[1], item[0]))
+
+    def co_holdings(self, ticker, k=10):
+        """Tickers most often held by the same funds as ``ticker``, as (ticker, shared funds)"""
+        with self._lock:
+            together = Counter()
+            for fund in self.ticker_funds.get(ticker, ()):
+                together.update(self.fund_tickers[fund])
+            together.pop(ticker, None)
+            return heapq.nsmallest(k, together.items(), key=lambda item: (-item[1], item[0]))
+
+    def overlap(self, fund_a, fund_b):
+        """Common tickers of two funds and their Jaccard overlap"""
+        a, b = self.fund_tickers.get(fund_a, frozenset()), self.fund_tickers.get(fund_b, frozenset())
+        common = a & b
+        return sorted(common), len(common) / len(a | b) if a | b else 0.0
+
+    def to_frame(self, k=15):
+        """Top-``k`` table with Stock, Fund_Count and Sector columns, most held first"""
+        top = self.top_k(k)
+        return pd.DataFrame({
+            'Stock': [ticker for ticker, _ in top],
+            'Fund_Count': [count for _, count in top],
+            'Sector': [self.ticker_sector.get(ticker) for ticker, _ in top],
+        })
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_index(holdings_dir=HOLDINGS_DIR):
+    return HoldingsIndex(), {}, threading.Lock()
+
+
+def load_holdings_index(holdings_dir=HOLDINGS_DIR):
+    """Holdings index over every report in ``holdings_dir``, shared by every session.
+
+    On each call only reports that are new or whose content changed are (re)read, and funds
+    whose report was deleted are dropped. Returns None when there are no reports.
+    """
+    if not os.path.isdir(holdings_dir):
+        return None
+    index, indexed, lock = _shared_index(holdings_dir)
+
+    with lock:
+        current = {}
+        for name in sorted(os.listdir(holdings_dir)):
+            if name.lower().endswith(HOLDINGS_EXTENSIONS) and not name.startswith('~$'):
+                current[os.path.splitext(name)[0]] = os.path.join(holdings_dir, name)
+
+        for fund in set(indexed) - set(current):
+            index.remove_fund(fund)
+            del indexed[fund]
+
+        for fund, path in current.items():
+            fingerprint = file_fingerprint(path)
+            if indexed.get(fund) != fingerprint:
+                index.add_report(fund, read_holdings_report(path))
+                indexed[fund] = fingerprint
+
+    return index if index.fund_tickers else None
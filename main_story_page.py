@@ -4,7 +4,22 @@ import plotly.express as px
 import numpy as np
 import pandas as pd
 import base64
-from scipy.stats import norm
+from beta_engine import BETA_WINDOWS, EWMA_LAMBDA, load_beta_panel, load_capm_table, load_market_betas
+from data_loader import PORTFOLIO_WEIGHTS, load_beta, load_prices, load_returns, load_returns_xts, load_rf_rm
+from dcf_engine import MIN_SPREAD, cached_valuation_grid, fcfe_valuation, simulate_valuation
+from efficient_frontier import cached_efficient_frontier
+from gbm_engine import path_polyline, simulate_gbm_summary
+from holdings_index import load_holdings_index
+from mc_backend import VARIANCE_REDUCTION, percentile_standard_error
+from return_moments import load_return_moments
+from risk_attribution import ATTRIBUTION_METHODS, load_risk_attribution
+from risk_engine import CONFIDENCE_LEVELS, VAR_HORIZONS, VAR_METHODS, load_risk_result
+from screening_engine import SCREEN_STAGES, load_fundamentals, missing_columns, run_screen
+from sim_cache import get_simulation_cache, simulation_key
+from stress_scenarios import (HISTORICAL_SCENARIOS, HYPOTHETICAL_SHOCKS, RECOVERY_DAYS, ROLLING_WINDOWS,
+                              load_rolling_scenarios, load_scenario_set)
+from table_renderer import TableColumn, render_table
+from var_backtest import BACKTEST_WINDOWS, load_backtest
 
 def show_draft_story_page(portfolio_df=None, extended_hist=None, PORTFOLIO_HOLDINGS=None):
     """
@@ -414,19 +429,25 @@ def show_draft_story_page(portfolio_df=None, extended_hist=None, PORTFOLIO_HOLDI
         'DBD': 'Pharmaceuticals'
     }
 
-    # Data from Vietnamese Fund Holdings (Top 15 only)
-    funds_held_data = pd.DataFrame({
-        'Stock': [
-            'ACB', 'FPT', 'MBB', 'CTG', 'MWG', 'HPG', 'PNJ', 'STB', 'VCB',
-            'TCB', 'VPB', 'VIB', 'BWE', 'VEA', 'VNM'
-        ],
-        'Fund_Count': [
-            32, 27, 26, 20, 19, 15, 11, 11, 11, 10, 9, 8, 7, 7, 7
-        ]
-    })
+    # Fund holdings: indexed from the reports under fund_holdings/ when there are any
+    holdings_index = load_holdings_index()
+    if holdings_index is not None:
+        holdings_index.assign_sectors(sector_map)
+        funds_held_data = holdings_index.to_frame(15)
+    else:
+        # Data from Vietnamese Fund Holdings (Top 15 only)
+        funds_held_data = pd.DataFrame({
+            'Stock': [
+                'ACB', 'FPT', 'MBB', 'CTG', 'MWG', 'HPG', 'PNJ', 'STB', 'VCB',
+                'TCB', 'VPB', 'VIB', 'BWE', 'VEA', 'VNM'
+            ],
+            'Fund_Count': [
+                32, 27, 26, 20, 19, 15, 11, 11, 11, 10, 9, 8, 7, 7, 7
+            ]
+        })
 
-    # Add sector column
-    funds_held_data['Sector'] = funds_held_data['Stock'].map(sector_map)
+        # Add sector column
+        funds_held_data['Sector'] = funds_held_data['Stock'].map(sector_map)
 
     # Color palette by sector
     sector_colors = {
@@ -451,12 +472,54 @@ def show_draft_story_page(portfolio_df=None, extended_hist=None, PORTFOLIO_HOLDI
         st.markdown('<h4 id="stock-filtering-funnel">🔽 Lọc cổ phiếu - Từ Toàn thị trường đến Portfolio</h4>', unsafe_allow_html=True)
     
 
-        # Funnel data
-        funnel_stages = [
-            'Toàn bộ thị trường', 'EPS > 1,500', 'ROE > 12%', 'HSX & HNX',
-            'Missing data < 150', '(ZMF-Score) Final Portfolio'
-        ]
-        funnel_values = [1589, 607, 472, 255, 137, 20]
+        # Funnel data: screened live when the fundamentals table is available
+        fundamentals = load_fundamentals()
+        if fundamentals is not None:
+            with st.expander("⚙️ Ngưỡng lọc", expanded=False):
+                threshold_col1, threshold_col2 = st.columns(2)
+                with threshold_col1:
+                    min_eps = st.number_input("EPS tối thiểu (VNĐ)", value=1500, step=100, key="screen_min_eps")
+                    exchanges = st.multiselect("Sàn giao dịch", ['HOSE', 'HNX', 'UPCOM'], default=['HOSE', 'HNX'],
+                                               key="screen_exchanges")
+                with threshold_col2:
+                    min_roe = st.number_input("ROE tối thiểu (%)", value=12.0, step=0.5, key="screen_min_roe")
+                    max_missing = st.number_input("Số ngày thiếu dữ liệu tối đa", value=150, step=10,
+                                                  key="screen_max_missing")
+
+            screen_stages = dict(SCREEN_STAGES)
+            screen_stages['EPS'] = (('eps', '>', min_eps),)
+            screen_stages['ROE'] = (('roe', '>', min_roe / 100),)
+            screen_stages['Exchange'] = (('exchange', 'in', tuple(exchanges)),)
+            screen_stages['Missing data'] = (('missing_days', '<', max_missing),)
+            # Without the statement history or exported score columns the ZMF stage is skipped
+            missing_scores = missing_columns(screen_stages).get('ZMF-Score')
+            if missing_scores:
+                del screen_stages['ZMF-Score']
+                st.info(f"Bỏ qua bước ZMF-Score: fundamentals.csv thiếu cột {', '.join(missing_scores)} "
+                        f"và chưa có lịch sử báo cáo tài chính (financials.csv).")
+            screen_counts, selected_tickers = run_screen(screen_stages)
+
+            funnel_stages = [
+                'Toàn bộ thị trường', f'EPS > {min_eps:,.0f}', f'ROE > {min_roe:g}%', ' & '.join(exchanges),
+                f'Missing data < {max_missing:,.0f}', '(ZMF-Score) Final Portfolio'
+            ]
+            funnel_values = screen_counts.tolist()
+            step_titles = [
+                f'2. EPS > {min_eps:,.0f}', f'3. ROE > {min_roe:g}%', f"4. Sàn giao dịch: {' & '.join(exchanges)}",
+                f'5. Missing data < {max_missing:,.0f}'
+            ]
+        else:
+            funnel_stages = [
+                'Toàn bộ thị trường', 'EPS > 1,500', 'ROE > 12%', 'HSX & HNX',
+                'Missing data < 150', '(ZMF-Score) Final Portfolio'
+            ]
+            # Counts recorded when the screen was run offline
+            funnel_values = [1589, 607, 472, 255, 137, 20]
+            step_titles = ['2. EPS > 1,500', '3. ROE > 12%', '4. Sàn giao dịch: HSX & HNX', '5. Missing data < 150']
+            selected_tickers = None
+
+        # A skipped ZMF stage drops off the end of the funnel
+        funnel_stages = funnel_stages[:len(funnel_values)]
 
         # Calculate percentage of remaining relative to first stage
         first_stage = funnel_values[0]
@@ -489,33 +552,33 @@ def show_draft_story_page(portfolio_df=None, extended_hist=None, PORTFOLIO_HOLDI
         st.markdown("#### 📈 Kết quả lọc bộ")
 
         # Summary metrics
-        st.markdown("""
+        st.markdown(f"""
         <div style='background-color: #f5f5f5; padding: 12px; border-radius: 10px; border: 1px solid #ddd; margin-bottom: 10px;'>
             <div style='display: grid; grid-template-columns: 1fr 1fr; gap: 10px;'>
                 <div style='text-align: center;'>
                     <p style='margin: 0; font-size: 14px; color: #666;'>Thị trường toàn bộ</p>
-                    <p style='margin: 4px 0 0 0; font-size: 20px; font-weight: bold; color: #1976D2;'>1,589</p>
+                    <p style='margin: 4px 0 0 0; font-size: 20px; font-weight: bold; color: #1976D2;'>{funnel_values[0]:,}</p>
                 </div>
                 <div style='text-align: center;'>
                     <p style='margin: 0; font-size: 14px; color: #666;'>Cổ phiếu được chọn</p>
-                    <p style='margin: 4px 0 0 0; font-size: 20px; font-weight: bold; color: #4CAF50;'>20</p>
+                    <p style='margin: 4px 0 0 0; font-size: 20px; font-weight: bold; color: #4CAF50;'>{funnel_values[-1]:,}</p>
                 </div>
             </div>
             <div style='margin-top: 8px; padding-top: 8px; border-top: 1px solid #ddd; text-align: center;'>
-                <p style='margin: 0; font-size: 12px; color: #1565c0;'><strong>Tỷ lệ lọc: 1.26% (20/1,589)</strong></p>
+                <p style='margin: 0; font-size: 12px; color: #1565c0;'><strong>Tỷ lệ lọc: {funnel_values[-1] / max(funnel_values[0], 1) * 100:.2f}% ({funnel_values[-1]:,}/{funnel_values[0]:,})</strong></p>
             </div>
         </div>
         """,
                     unsafe_allow_html=True)
 
         filtering_stages = [
-            {"title": "1. Toàn bộ thị trường", "count": "1,589", "color": "#FF6B6B", "explanation": "Toàn bộ thị trường được đưa vào danh sách ban đầu trước khi áp điều kiện."},
-            {"title": "2. EPS > 1,500", "count": "607", "color": "#FF9800", "explanation": "Loại bỏ doanh nghiệp lợi nhuận quá thấp; chỉ giữ lại nhóm có sức tạo lợi nhuận ổn định và đủ lớn."},
-            {"title": "3. ROE > 12%", "count": "472", "color": "#FFC107", "explanation": "Tiếp tục giữ những công ty sử dụng vốn hiệu quả, loại các doanh nghiệp hiệu suất thấp."},
-            {"title": "4. Sàn giao dịch: HSX & HNX", "count": "255", "color": "#8BC34A", "explanation": "Ưu tiên các sàn có mức minh bạch và thanh khoản cao hơn, loại bỏ UPcom ."},
-            {"title": "5. Missing data < 150", "count": "137", "color": "#4CAF50", "explanation": "Đảm bảo dữ liệu đủ sạch, đủ dài để phân tích; tránh tùy chọn quá rủi ro do thiếu dữ liệu."},
-            {"title": "6. 3-score (M/F/Z-score) ", "count": "20", "color": "#00D9FF", "explanation": "ĐĐiểm M-Score, Z-score và F-score trong 3 năm ở mức an toàn. "}
-        ]
+            {"title": "1. Toàn bộ thị trường", "count": funnel_values[0], "color": "#FF6B6B", "explanation": "Toàn bộ thị trường được đưa vào danh sách ban đầu trước khi áp điều kiện."},
+            {"title": step_titles[0], "count": funnel_values[1], "color": "#FF9800", "explanation": "Loại bỏ doanh nghiệp lợi nhuận quá thấp; chỉ giữ lại nhóm có sức tạo lợi nhuận ổn định và đủ lớn."},
+            {"title": step_titles[1], "count": funnel_values[2], "color": "#FFC107", "explanation": "Tiếp tục giữ những công ty sử dụng vốn hiệu quả, loại các doanh nghiệp hiệu suất thấp."},
+            {"title": step_titles[2], "count": funnel_values[3], "color": "#8BC34A", "explanation": "Ưu tiên các sàn có mức minh bạch và thanh khoản cao hơn, loại bỏ UPcom ."},
+            {"title": step_titles[3], "count": funnel_values[4], "color": "#4CAF50", "explanation": "Đảm bảo dữ liệu đủ sạch, đủ dài để phân tích; tránh tùy chọn quá rủi ro do thiếu dữ liệu."},
+            {"title": "6. 3-score (M/F/Z-score) ", "count": funnel_values[-1], "color": "#00D9FF", "explanation": "ĐĐiểm M-Score, Z-score và F-score trong 3 năm ở mức an toàn. "}
+        ][:len(funnel_values)]
 
         # Progress Flow Design
         st.markdown("**📋 Quá trình lọc từng bước:**")
@@ -524,15 +587,15 @@ def show_draft_story_page(portfolio_df=None, extended_hist=None, PORTFOLIO_HOLDI
         """, unsafe_allow_html=True)
         
         for idx, stage in enumerate(filtering_stages):
-            percent_reduction = ((1589 - int(stage['count'].replace(',', ''))) / 1589) * 100
+            percent_reduction = ((funnel_values[0] - stage['count']) / max(funnel_values[0], 1)) * 100
             st.markdown(f"""
             <div style='margin-bottom: 10px;'>
                 <div style='display: flex; justify-content: space-between; margin-bottom: 4px;'>
                     <span style='font-size: 12px; font-weight: bold; color: {stage['color']};'>{stage['title']}</span>
-                    <span style='font-size: 12px; color: #666;'><strong>{stage['count']}</strong> | -{percent_reduction:.1f}%</span>
+                    <span style='font-size: 12px; color: #666;'><strong>{stage['count']:,}</strong> | -{percent_reduction:.1f}%</span>
                 </div>
                 <div style='background-color: white; height: 6px; border-radius: 3px; overflow: hidden; border: 1px solid #ddd;'>
-                    <div style='background-color: {stage['color']}; height: 100%; width: {max(5, (int(stage['count'].replace(',', ''))/1589)*100)}%;'></div>
+                    <div style='background-color: {stage['color']}; height: 100%; width: {max(5, stage['count'] / max(funnel_values[0], 1) * 100)}%;'></div>
                 </div>
                 <p style='color: #666; margin: 4px 0 0 0; font-size: 10px; line-height: 1.4;'>{stage['explanation']}</p>
             </div>
@@ -540,6 +603,10 @@ def show_draft_story_page(portfolio_df=None, extended_hist=None, PORTFOLIO_HOLDI
         
         st.markdown("</div>", unsafe_allow_html=True)
 
+        if selected_tickers is not None:
+            st.markdown(f"**✅ {len(selected_tickers)} cổ phiếu đạt tất cả tiêu chí:**")
+            st.dataframe(fundamentals.loc[selected_tickers], use_container_width=True)
+
 
     
     st.markdown(
@@ -626,32 +693,18 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     st.markdown(story, unsafe_allow_html=True)
 
     with col_chart:
-        # Horizontal bar chart with sector colors - top 15 stocks only
-        desired_order = ['ACB', 'FPT', 'MBB', 'CTG', 'MWG', 'HPG', 'PNJ', 'STB', 'VCB',
-                        'TCB', 'VPB', 'VIB', 'BWE', 'VEA', 'VNM']
-        
-        # Reverse order for display (Plotly horizontal bar shows bottom to top)
-        reversed_order = list(reversed(desired_order))
-        
-        # Reorder according to reversed order
-        top_data = funds_held_data.set_index('Stock').loc[reversed_order].reset_index()
-        
-        # Get unique sectors in order of appearance
-        unique_sectors = []
-        sector_seen = set()
-        for sector in top_data['Sector']:
-            if sector not in sector_seen:
-                unique_sectors.append(sector)
-                sector_seen.add(sector)
+        # Horizontal bar chart with sector colors - top 15 stocks only, most held on top
+        # (Plotly horizontal bar shows bottom to top)
+        top_data = funds_held_data.sort_values('Fund_Count', ascending=False, kind='stable').iloc[::-1]
+        top_data = top_data.assign(Sector=top_data['Sector'].fillna('Other'))
         
         # Create bar traces grouped by sector for legend
         fig_funds_hbar = go.Figure()
         
-        for sector in unique_sectors:
-            sector_data = top_data[top_data['Sector'] == sector]
+        for sector, sector_data in top_data.groupby('Sector', sort=False):
             color = sector_colors.get(sector, '#999999')
-            hover_text = [f"<b>{stock}</b><br>Held by {count} funds<br>Sector: {sector}"
-                         for stock, count in zip(sector_data['Stock'], sector_data['Fund_Count'])]
+            hover_text = ('<b>' + sector_data['Stock'] + '</b><br>Held by '
+                          + sector_data['Fund_Count'].astype(str) + ' funds<br>Sector: ' + sector)
             
             fig_funds_hbar.add_trace(go.Bar(
                 y=sector_data['Stock'],
@@ -668,6 +721,7 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
         fig_funds_hbar.update_layout(
             title='Top Most Held Stocks in Funds',
             xaxis_title='Number of Funds',
+            yaxis=dict(categoryorder='array', categoryarray=top_data['Stock'].tolist()),
             height=700,
             template='plotly',
             plot_bgcolor='#f5f5f5',
@@ -743,11 +797,10 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     st.markdown("")
 
     # Read returns data from iml.csv (semicolon-delimited, European decimal format)
-    iml_df = pd.read_csv('attached_assets/ìml.csv', sep=';', decimal=',')
-    iml_df['time'] = pd.to_datetime(iml_df['time'], format='%d/%m/%Y')
+    iml_df = load_returns()
     
     # Filter data to start from 01/06/2022
-    iml_df = iml_df[iml_df['time'] >= pd.to_datetime('2022-06-01')].reset_index(drop=True)
+    iml_df = iml_df[iml_df.index >= pd.to_datetime('2022-06-01')]
     
     # ============================================================================
     # EFFICIENT FRONTIER ANALYSIS
@@ -768,12 +821,33 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     # Important date visualization - Timeline Milestone style
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        st.markdown("""
+        window_start, window_end = st.slider(
+            "Khoảng thời gian phân tích",
+            min_value=iml_df.index[0].date(),
+            max_value=iml_df.index[-1].date(),
+            value=(iml_df.index[0].date(), iml_df.index[-1].date()),
+            format="DD/MM/YYYY",
+            key="analysis_window",
+            help="Efficient Frontier, Portfolio Summary Table và biểu đồ lợi nhuận tích lũy được tính lại theo khoảng thời gian này"
+        )
+
+        # Window covariance from prefix sums: O(assets²) per query regardless of window length
+        return_moments = load_return_moments()
+        window_lo, window_hi = return_moments.positions(window_start, window_end)
+        if window_hi - window_lo < 20:
+            st.warning("Khoảng thời gian quá ngắn (cần ít nhất 20 ngày giao dịch), sử dụng toàn bộ dữ liệu.")
+            window_start, window_end = iml_df.index[0].date(), iml_df.index[-1].date()
+
+        st.markdown(f"""
         <div style='text-align: center; padding: 20px; border-left: 5px solid #667EEA; background-color: #f8f9ff; border-radius: 5px;'>
-            <div style='font-size: 24px; font-weight: 900; color: #667EEA; margin-bottom: 5px;'>📍 01/06/2022 - 01/10/2025</div>
+            <div style='font-size: 24px; font-weight: 900; color: #667EEA; margin-bottom: 5px;'>📍 {window_start:%d/%m/%Y} - {window_end:%d/%m/%Y}</div>
             <div style='font-size: 14px; color: #555;'>⏱️ Hậu cú shock COVID19 tới Hiện tại</div>
         </div>
         """, unsafe_allow_html=True)
+
+    window_mean, window_cov = return_moments.window(window_start, window_end)
+    window_frontier = cached_efficient_frontier(window_mean, window_cov)
+    iml_df = iml_df.loc[pd.Timestamp(window_start):pd.Timestamp(window_end)]
     
     st.markdown("### III. PORTFOLIO OPTIMIZATION",
          unsafe_allow_html=True
@@ -791,9 +865,9 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     </p>
     """, unsafe_allow_html=True)
     
-    # Load efficient frontier data generated from R
+    # Trace the long-only efficient frontier from the daily returns
     try:
-        frontier_df = pd.read_csv('attached_assets/result_output_1763851487710.csv', index_col=0)
+        frontier_df = window_frontier.copy()
         
         # Convert to percentage for better readability
         frontier_df['mean'] = frontier_df['mean'] * 100
@@ -802,16 +876,12 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
         # Calculate Sharpe ratio (return / risk)
         frontier_df['sharpe_ratio'] = frontier_df['mean'] / frontier_df['StdDev']
         
-        # Create hover text with weights
-        weights_text = []
-        for idx, row in frontier_df.iterrows():
-            weights_info = (f"VNM: {row['w.VNM']*100:.1f}%<br>"
-                          f"DBD: {row['w.DBD']*100:.1f}%<br>"
-                          f"HPG: {row['w.HPG']*100:.1f}%<br>"
-                          f"ACB: {row['w.ACB']*100:.1f}%")
-            weights_text.append(weights_info)
-        
-        frontier_df['weights_info'] = weights_text
+        # Create hover text with weights, formatted column-wise
+        frontier_df['weights_info'] = (
+            'VNM: ' + (frontier_df['w.VNM'] * 100).round(1).astype(str) + '%<br>'
+            + 'DBD: ' + (frontier_df['w.DBD'] * 100).round(1).astype(str) + '%<br>'
+            + 'HPG: ' + (frontier_df['w.HPG'] * 100).round(1).astype(str) + '%<br>'
+            + 'ACB: ' + (frontier_df['w.ACB'] * 100).round(1).astype(str) + '%')
         
         # Find optimum weight point (max Sharpe ratio)
         optimum_idx = frontier_df['sharpe_ratio'].idxmax()
@@ -834,7 +904,7 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
         fig_frontier = go.Figure()
         
         # Add efficient frontier line with weights in hover
-        customdata = [[wt] for wt in frontier_df['weights_info']]
+        customdata = frontier_df[['weights_info']].to_numpy()
         fig_frontier.add_trace(go.Scatter(
             x=frontier_df['StdDev'],
             y=frontier_df['mean'],
@@ -988,90 +1058,48 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     })
 
     comparison_df = pd.DataFrame(strategy_comparison)
-    strategies_list = comparison_df.to_dict('records')
     
     # ===== PORTFOLIO SUMMARY TABLE =====
     st.markdown("##### 📊 Portfolio Summary Table")
     
-    # Create complete table with metrics and allocation
-    complete_table = []
-    for strategy in strategies_list:
-        complete_table.append({
-            'Strategy': strategy['Strategy'],
-            'Daily Risk (%)': strategy['Daily Risk (%)'],
-            'Daily Return (%)': strategy['Daily Return (%)'],
-            'Annual Return (%)': strategy['Annual Return (%)'],
-            'VNM (%)': strategy['VNM (%)'],
-            'DBD (%)': strategy['DBD (%)'],
-            'HPG (%)': strategy['HPG (%)'],
-            'ACB (%)': strategy['ACB (%)'],
-        })
-    
-    complete_df = pd.DataFrame(complete_table)
-    
-    # Create colored HTML table
-    html_table = '<div style="overflow-x: auto; background-color: #f5f5f5; padding: 10px; border-radius: 8px;">'
-    html_table += '<table style="width:100%; border-collapse: collapse; background-color: #f5f5f5; border-radius: 8px; border: 1px solid #ddd;">'
+    # Complete table with metrics and allocation
+    complete_df = comparison_df[['Strategy', 'Daily Risk (%)', 'Daily Return (%)', 'Annual Return (%)',
+                                 'VNM (%)', 'DBD (%)', 'HPG (%)', 'ACB (%)']].copy()
     
-    # Header row with colors and tooltips
-    html_table += '<thead><tr style="border-bottom: 2px solid #ddd;">'
-    html_table += '<th style="padding: 12px; text-align: center; background-color: #f5f5f5; color: #333; border-right: 1px solid #ddd;">Strategy</th>'
-    html_table += '<th style="padding: 12px; text-align: center; background: linear-gradient(135deg, #FFCDD2 0%, #EF9A9A 100%); color: #333; border-right: 1px solid #ddd; cursor: help;" title="Daily portfolio volatility/standard deviation">Daily Risk %</th>'
-    html_table += '<th style="padding: 12px; text-align: center; background: linear-gradient(135deg, #C8E6C9 0%, #81C784 100%); color: #333; border-right: 1px solid #ddd; cursor: help;" title="Daily portfolio return percentage">Daily Return %</th>'
-    html_table += '<th style="padding: 12px; text-align: center; background: linear-gradient(135deg, #FFF9C4 0%, #FFE082 100%); color: #333; border-right: 1px solid #ddd; cursor: help;" title="Annualized return: (1+daily_return)^252-1">Annual Return %</th>'
-    html_table += '<th style="padding: 12px; text-align: center; background: linear-gradient(135deg, #C8E6C9 0%, #81C784 100%); color: #333; border-right: 1px solid #ddd; cursor: help;" title="Vinamilk - Dairy & Beverage">VNM </th>'
-    html_table += '<th style="padding: 12px; text-align: center; background: linear-gradient(135deg, #FFCCBC 0%, #FF8A65 100%); color: #333; border-right: 1px solid #ddd; cursor: help;" title="Dabaco - Agriculture & Materials">DBD </th>'
-    html_table += '<th style="padding: 12px; text-align: center; background: linear-gradient(135deg, #FFE0B2 0%, #FFB74D 100%); color: #333; border-right: 1px solid #ddd; cursor: help;" title="Hoa Phat Group - Steel & Mining">HPG </th>'
-    html_table += '<th style="padding: 12px; text-align: center; background: linear-gradient(135deg, #BBDEFB 0%, #64B5F6 100%); color: #333; cursor: help;" title="Asia Commercial Bank - Finance">ACB </th>'
-    html_table += '</tr></thead>'
-    
-    # Body rows
-    html_table += '<tbody>'
-    row_colors = {
-        'Min Variance': '#4CAF50',
-        'Optimum (Max Sharpe)': '#FF6B6B',
-        'Max Return': '#FFD700'
+    # Colored table: styles come from the story-table classes in theme_config.apply_theme_css
+    row_accents = {
+        'Min Variance': 'accent-green',
+        'Optimum (Max Sharpe)': 'accent-red',
+        'Max Return': 'accent-gold'
     }
-    
-    for _, row in complete_df.iterrows():
-        strategy_name = row['Strategy']
-        daily_risk = row['Daily Risk (%)']
-        daily_return = row['Daily Return (%)']
-        annual_return = row['Annual Return (%)']
-        vnm_val = row['VNM (%)']
-        dbd_val = row['DBD (%)']
-        hpg_val = row['HPG (%)']
-        acb_val = row['ACB (%)']
-        
-        border_color = row_colors.get(strategy_name, '#999')
-        
-        html_table += '<tr style="border-bottom: 1px solid #ddd;">'
-        html_table += f'<td style="padding: 12px; text-align: center; color: #1565c0; border-left: 4px solid {border_color}; border-right: 1px solid #ddd;"><strong>{strategy_name}</strong></td>'
-        html_table += f'<td style="padding: 12px; text-align: center; color: #333; border-right: 1px solid #ddd;"><strong>{daily_risk}%</strong></td>'
-        html_table += f'<td style="padding: 12px; text-align: center; color: #333; border-right: 1px solid #ddd;"><strong>{daily_return}%</strong></td>'
-        html_table += f'<td style="padding: 12px; text-align: center; color: #333; border-right: 1px solid #ddd;"><strong>{annual_return}%</strong></td>'
-        html_table += f'<td style="padding: 12px; text-align: center; color: #333; border-right: 1px solid #ddd;"><strong>{vnm_val}%</strong></td>'
-        html_table += f'<td style="padding: 12px; text-align: center; color: #333; border-right: 1px solid #ddd;"><strong>{dbd_val}%</strong></td>'
-        html_table += f'<td style="padding: 12px; text-align: center; color: #333; border-right: 1px solid #ddd;"><strong>{hpg_val}%</strong></td>'
-        html_table += f'<td style="padding: 12px; text-align: center; color: #333;"><strong>{acb_val}%</strong></td>'
-        html_table += '</tr>'
-    
-    html_table += '</tbody></table></div>'
-    
-    st.write(html_table, unsafe_allow_html=True)
+    complete_df['accent'] = complete_df['Strategy'].map(row_accents).fillna('accent-grey')
+
+    summary_columns = (
+        TableColumn('Strategy', 'Strategy', cell_class='label sep', template='<strong>{}</strong>', header_class='sep'),
+        TableColumn('Daily Risk (%)', 'Daily Risk %', 'Daily portfolio volatility/standard deviation', 'th-red sep', 'sep', '<strong>{}%</strong>'),
+        TableColumn('Daily Return (%)', 'Daily Return %', 'Daily portfolio return percentage', 'th-green sep', 'sep', '<strong>{}%</strong>'),
+        TableColumn('Annual Return (%)', 'Annual Return %', 'Annualized return: (1+daily_return)^252-1', 'th-yellow sep', 'sep', '<strong>{}%</strong>'),
+        TableColumn('VNM (%)', 'VNM ', 'Vinamilk - Dairy & Beverage', 'th-green sep', 'sep', '<strong>{}%</strong>'),
+        TableColumn('DBD (%)', 'DBD ', 'Dabaco - Agriculture & Materials', 'th-coral sep', 'sep', '<strong>{}%</strong>'),
+        TableColumn('HPG (%)', 'HPG ', 'Hoa Phat Group - Steel & Mining', 'th-orange sep', 'sep', '<strong>{}%</strong>'),
+        TableColumn('ACB (%)', 'ACB ', 'Asia Commercial Bank - Finance', 'th-blue', '', '<strong>{}%</strong>'),
+    )
+    st.write(render_table(complete_df, summary_columns, 'story-table panel plain-head', row_class_field='accent'), unsafe_allow_html=True)
 
     st.markdown("")
     st.info(""" Đây là bảng các danh mục tối ưu được xác định từ Efficient Frontier. Vì Mười đã đặt mức chấp nhận rủi ro từ đầu là thấp (safe) và đây là lần đầu đầu tư, nên Mười sẽ ưu tiên danh mục có rủi ro thấp nhất. Nhìn vào bảng trên, có thể thấy danh mục Min Risk là danh mục đa dạng nhất trong ba lựa chọn, phân bổ vốn đều và cân bằng giữa các cổ phiếu, giúp tối ưu hóa sự an toàn trong khi vẫn sinh lời ổn định. """)
 
     st.markdown("")
 
-    st.markdown("""
+    # Final allocation: the Min Variance weights of the selected analysis window
+    final_allocation = ' • '.join(f"{stock}({min_var_row[f'w.{stock}'] * 100:.1f}%)" for stock in ['ACB', 'HPG', 'VNM', 'DBD'])
+    st.markdown(f"""
     <div style='background-color: #FFF5BA; padding: 20px; border-radius: 10px; border-left: 5px solid #1976D2;'>
         <p style='color: #00000; margin: 0; font-size: 18px; line-height: 1.8;'>
         Do đó, portfolio cuối cùng sẽ bao gồm 4 cổ phiếu để đưa vào danh mục đầu tư:
         </p>
         <p style='color: #1976D2; margin: 12px 0 0 0; font-size: 21px; font-weight: bold; text-align: center;'>
-        ACB(20.5%) • HPG(3.1%) • VNM(39.5%) • DBD(36.9%)
+        {final_allocation}
         </p>
     </div>
     """,unsafe_allow_html=True)
@@ -1115,7 +1143,7 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     # Sample data for 4 chosen stocks (updated to ACB, HPG, VNM, DBD)
     chosen_stocks = pd.DataFrame({
         'Stock': ['ACB', 'HPG', 'VNM', 'DBD'],
-        'Allocation (%)': [20.5, 3.1, 39.5, 36.9],
+        'Allocation (%)': [round(min_var_row[f'w.{stock}'] * 100, 1) for stock in ['ACB', 'HPG', 'VNM', 'DBD']],
         'Expected Return (%)': [0.081, 0.066, 0.013, 0.070],
         'Risk Level': ['Medium', 'High', 'Low', 'Medium'],
         'Sector': ['Banking', 'Materials', 'Consumer Staples', 'Phamarceuticals']
@@ -1156,12 +1184,10 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
         # Calculate portfolio metrics from daily returns
         try:
             # Load daily returns from IML CSV
-            iml_returns = pd.read_csv('attached_assets/ìml.csv', sep=';', decimal=',')
-            iml_returns['time'] = pd.to_datetime(iml_returns['time'], format='%d/%m/%Y')
-            iml_returns = iml_returns.set_index('time').sort_index()
+            iml_returns = iml_df
             
             # Load minimum risk portfolio weights
-            frontier_portfolio = pd.read_csv('attached_assets/result_output_1763851487710.csv', index_col=0)
+            frontier_portfolio = window_frontier
             min_risk_weights = {
                 'ACB': frontier_portfolio['w.ACB'].iloc[0],
                 'HPG': frontier_portfolio['w.HPG'].iloc[0],
@@ -1211,21 +1237,11 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
             })
         
             # Display as styled HTML table
-            html_summary = '<div style="background-color: #f5f5f5; padding: px; text-align: center; border-radius: 8px; border: 1px solid #ddd;">'
-            html_summary += '<table style="width:100%; border-collapse: collapse;text-align: center; font-size: px;">'
-            html_summary += '<tr style="border-bottom: 2px solid #1976D2;">'
-            html_summary += '<th style="padding: 8px; text-align: center; color: #1565c0; font-weight: bold;">Metric</th>'
-            html_summary += '<th style="padding: 8px; text-align: center; color: #1565c0; font-weight: bold;">Value</th>'
-            html_summary += '</tr>'
-            
-            for _, row in summary_metrics.iterrows():
-                html_summary += '<tr style="border-bottom: 1px solid #ddd;">'
-                html_summary += f'<td style="padding: 8px; text-align: center; color: #666;">{row["Metric"]}</td>'
-                html_summary += f'<td style="padding: 8px; text-align: ; color: #333; font-weight: bold;">{row["Value"]}</td>'
-                html_summary += '</tr>'
-            
-            html_summary += '</table></div>'
-            st.markdown(html_summary, unsafe_allow_html=True)
+            metric_columns = (
+                TableColumn('Metric', 'Metric', cell_class='muted'),
+                TableColumn('Value', 'Value', cell_class='strong'),
+            )
+            st.markdown(render_table(summary_metrics, metric_columns, 'story-table compact panel'), unsafe_allow_html=True)
         except Exception as e:
             st.warning(f"Could not calculate portfolio metrics: {e}")
 
@@ -1250,44 +1266,50 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
             'DBD': "Key insight: biến động vừa phải, nhưng phân phối lợi suất lệch phải và đuôi rất dày, tức khả năng xuất hiện những ngày tăng mạnh cao hơn."
         }
         
-        # Stock selection
-        selected_stock = st.selectbox(
-            "Chọn mã để xem chi tiết:",
-            options=chosen_stocks['Stock'].tolist(),
-            key="stock_details_selector"
-        )
+        # Fragments: a widget change inside reruns only its own section, not the whole story
+        @st.fragment
+        def show_selected_stock_details():
+            """Company profile and return statistics for the stock picked in stock_details_selector"""
+            # Stock selection
+            selected_stock = st.selectbox(
+                "Chọn mã để xem chi tiết:",
+                options=chosen_stocks['Stock'].tolist(),
+                key="stock_details_selector"
+            )
         
-        try:
-            # Get selected stock row
-            stock_row = chosen_stocks[chosen_stocks['Stock'] == selected_stock].iloc[0]
-            stock_name = stock_row['Stock']
+            try:
+                # Get selected stock row
+                stock_row = chosen_stocks[chosen_stocks['Stock'] == selected_stock].iloc[0]
+                stock_name = stock_row['Stock']
             
-            # Company Description
-            st.markdown("**Thông tin chung**")
-            st.markdown(
-                f'<p style="font-size:18px;">{company_info.get(stock_name, "Information not available")}</p>',
-                unsafe_allow_html=True
-            )
+                # Company Description
+                st.markdown("**Thông tin chung**")
+                st.markdown(
+                    f'<p style="font-size:18px;">{company_info.get(stock_name, "Information not available")}</p>',
+                    unsafe_allow_html=True
+                )
             
-            # Daily Returns Statistics
-            if stock_name in iml_df.columns:
-                st.markdown("**Daily Returns Statistics**")
-                daily_returns = iml_df[stock_name] * 100
+                # Daily Returns Statistics
+                if stock_name in iml_df.columns:
+                    st.markdown("**Daily Returns Statistics**")
+                    daily_returns = iml_df[stock_name] * 100
                 
-                col_stats_a, col_stats_b = st.columns(2)
-                with col_stats_a:
-                    st.metric("Mean", f"{daily_returns.mean():.4f}%")
-                    st.metric("Min", f"{daily_returns.min():.4f}%")
-                    st.metric("Skewness", f"{daily_returns.skew():.4f}")
-                with col_stats_b:
-                    st.metric("Std Dev", f"{daily_returns.std():.4f}%")
-                    st.metric("Max", f"{daily_returns.max():.4f}%")
-                    st.metric("Kurtosis", f"{daily_returns.kurtosis():.4f}")
+                    col_stats_a, col_stats_b = st.columns(2)
+                    with col_stats_a:
+                        st.metric("Mean", f"{daily_returns.mean():.4f}%")
+                        st.metric("Min", f"{daily_returns.min():.4f}%")
+                        st.metric("Skewness", f"{daily_returns.skew():.4f}")
+                    with col_stats_b:
+                        st.metric("Std Dev", f"{daily_returns.std():.4f}%")
+                        st.metric("Max", f"{daily_returns.max():.4f}%")
+                        st.metric("Kurtosis", f"{daily_returns.kurtosis():.4f}")
                     
-                st.markdown(f"<div style='color:purple; font-size: 18px; '>🔑{key_insights.get(stock_name, 'No insight available.')}</div>", unsafe_allow_html=True)
+                    st.markdown(f"<div style='color:purple; font-size: 18px; '>🔑{key_insights.get(stock_name, 'No insight available.')}</div>", unsafe_allow_html=True)
         
-        except Exception as e:
-            st.warning(f"Error displaying stock details: {str(e)}")
+            except Exception as e:
+                st.warning(f"Error displaying stock details: {str(e)}")
+
+        show_selected_stock_details()
 
     st.markdown("")
 
@@ -1305,17 +1327,11 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     
     # Fetch daily closing prices from price.csv
     try:
-        price_df = pd.read_csv('attached_assets/price.csv')
-        
-        # Parse the time column to datetime (format: M/D/YYYY)
-        price_df['time'] = pd.to_datetime(price_df['time'], format='%m/%d/%Y')
+        price_df = load_prices()
         
         # Filter to only include dates >= 2022-06-01
         start_date = pd.to_datetime('2022-06-01')
-        price_df = price_df[price_df['time'] >= start_date]
-        
-        # Set time as index and sort
-        price_df = price_df.set_index('time').sort_index()
+        price_df = price_df[price_df.index >= start_date]
         
         # Filter to only include stocks we need
         stocks_needed = ['ACB', 'HPG', 'VNM', 'DBD']
@@ -1379,17 +1395,10 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     
     try:
         # Load market and risk-free rate data
-        rf_rm_df = pd.read_csv('attached_assets/rf-rm_1763969726233.csv')
-        rf_rm_df['time'] = pd.to_datetime(rf_rm_df['time'], format='%d/%m/%Y')
-        rf_rm_df = rf_rm_df.sort_values('time')
-        
-        # Create iml_df with time as datetime
-        iml_df_time = iml_df.copy()
-        iml_df_time['time'] = pd.to_datetime(iml_df_time['time'], format='%d/%m/%Y')
-        iml_df_time = iml_df_time.sort_values('time')
+        rf_rm_df = load_rf_rm()
         
         # Merge the datasets on date
-        merged_df = pd.merge(iml_df_time, rf_rm_df[['time', 'rf', 'rm']], on='time', how='inner')
+        merged_df = iml_df.join(rf_rm_df[['rf', 'rm']], how='inner').reset_index()
         
         fig_cumulative = go.Figure()
         
@@ -1424,7 +1433,7 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
         
         # Add portfolio cumulative return with minimum risk weights
         try:
-            frontier_portfolio = pd.read_csv('attached_assets/result_output_1763851487710.csv', index_col=0)
+            frontier_portfolio = window_frontier
             
             # Get minimum risk (minimum variance) portfolio weights (first row)
             min_risk_weights = {
@@ -1515,10 +1524,7 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     
     try:
         # Load price data
-        price_df = pd.read_csv('attached_assets/price.csv')
-        price_df['time'] = pd.to_datetime(price_df['time'])
-        price_df = price_df[['time', 'DBD', 'HPG', 'VNM', 'ACB']].dropna()
-        price_df = price_df.sort_values('time').reset_index(drop=True)
+        price_df = load_prices()[['DBD', 'HPG', 'VNM', 'ACB']].dropna()
         
         # Calculate correlation matrix of prices
         price_corr_matrix = price_df[['DBD', 'HPG', 'VNM', 'ACB']].corr()
@@ -1580,31 +1586,17 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     
     try:
         # Load market and risk-free rate data
-        rf_rm_df = pd.read_csv('attached_assets/rf-rm_1763969726233.csv')
-        rf_rm_df['time'] = pd.to_datetime(rf_rm_df['time'], format='%d/%m/%Y')
-        rf_rm_df = rf_rm_df.sort_values('time')
-        
-        # Prepare iml_df for merging
-        iml_df_merge = iml_df.copy()
-        iml_df_merge['time'] = pd.to_datetime(iml_df_merge['time'], format='%d/%m/%Y')
-        iml_df_merge = iml_df_merge.sort_values('time')
+        rf_rm_df = load_rf_rm()
         
         # Merge datasets
-        merged_df = pd.merge(iml_df_merge, rf_rm_df[['time', 'rf', 'rm']], on='time', how='inner')
-        
-        # Define portfolio weights: ACB(20.5%), HPG(3.1%), VNM(39.5%), DBD(36.9%)
-        portfolio_weights = {'ACB': 0.205, 'HPG': 0.031, 'VNM': 0.395, 'DBD': 0.369}
+        merged_df = iml_df.join(rf_rm_df[['rf', 'rm']], how='inner').reset_index()
         
-        # Calculate portfolio daily returns using specified weights
-        portfolio_daily_returns = []
-        for i, row in merged_df.iterrows():
-            portfolio_ret = (row['ACB'] * portfolio_weights['ACB'] + 
-                           row['DBD'] * portfolio_weights['DBD'] + 
-                           row['HPG'] * portfolio_weights['HPG'] + 
-                           row['VNM'] * portfolio_weights['VNM'])
-            portfolio_daily_returns.append(portfolio_ret)
+        # Portfolio weights: ACB(20.5%), HPG(3.1%), VNM(39.5%), DBD(36.9%)
+        portfolio_weights = PORTFOLIO_WEIGHTS
         
-        portfolio_series = pd.Series(portfolio_daily_returns)
+        # Calculate portfolio daily returns using specified weights: one (days x stocks) @ (stocks,) product
+        weight_vector = np.array(list(portfolio_weights.values()))
+        portfolio_series = pd.Series(merged_df[list(portfolio_weights)].to_numpy() @ weight_vector)
         market_series = pd.Series(merged_df['rm'].values)
         
         # Calculate cumulative returns (1 + daily return) starting from 1
@@ -1933,23 +1925,26 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     </ul>
     ''', unsafe_allow_html=True)
 
-    st.subheader("📊 So sánh: Daily Beta vs Rolling 60-Day Beta")
+    beta_window = st.radio(
+        "Cửa sổ ước lượng Rolling Beta",
+        options=list(BETA_WINDOWS) + ['ewma'],
+        index=list(BETA_WINDOWS).index(60),
+        format_func=lambda w: f"EWMA (λ={EWMA_LAMBDA})" if w == 'ewma' else f"{w} ngày",
+        horizontal=True,
+        key="rolling_beta_window"
+    )
+    rolling_label = f"EWMA Beta (λ={EWMA_LAMBDA})" if beta_window == 'ewma' else f"Rolling {beta_window}-Day Beta"
+    rolling_short = "EWMA" if beta_window == 'ewma' else f"Rolling {beta_window}D"
+
+    st.subheader(f"📊 So sánh: Daily Beta vs {rolling_label}")
     
     try:
-        # Load both beta files
-        beta_daily_df = pd.read_csv('beta.csv', index_col=0, parse_dates=True)
+        # Daily DCC-GARCH beta exported from R
+        beta_daily_df = load_beta()
         beta_daily_df.columns = ['Daily_Beta']
 
-        beta_rol_df = pd.read_csv('beta_rol.csv', index_col=0)
-        beta_rol_df.columns = ['Rolling_60D_Beta']
-
-        # Get dates starting from the 60th data point (where rolling beta starts)
-        rolling_start_idx = 60
-        dates_for_rolling = beta_daily_df.index[rolling_start_idx:]
-
-        # Assign dates to rolling beta data
-        rolling_beta_with_dates = beta_rol_df['Rolling_60D_Beta'].values[:len(dates_for_rolling)]
-        rolling_beta_series = pd.Series(rolling_beta_with_dates, index=dates_for_rolling)
+        # Rolling / EWMA beta of the portfolio against VNINDEX, computed from daily returns
+        rolling_beta_series = load_market_betas()[beta_window]['Portfolio'].dropna()
 
         fig_comparison = go.Figure()
 
@@ -1963,14 +1958,14 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
             hovertemplate='<b>Ngày:</b> %{x|%Y-%m-%d}<br><b>Daily Beta (Portfolio):</b> %{y:.4f}<extra></extra>'
         ))
 
-        # Add rolling 60-day beta (from actual file data) - thêm sau để nằm trên cùng
+        # Add rolling beta - thêm sau để nằm trên cùng
         fig_comparison.add_trace(go.Scatter(
             x=rolling_beta_series.index,
             y=rolling_beta_series,
             mode='lines',
-            name='Rolling 60-Day Beta (Portfolio)',
+            name=f'{rolling_label} (Portfolio)',
             line=dict(color='#1976D2', width=4),
-            hovertemplate='<b>Ngày:</b> %{x|%Y-%m-%d}<br><b>Rolling 60D Beta (Portfolio):</b> %{y:.4f}<extra></extra>'
+            hovertemplate=f'<b>Ngày:</b> %{{x|%Y-%m-%d}}<br><b>{rolling_short} Beta (Portfolio):</b> %{{y:.4f}}<extra></extra>'
         ))
 
         # Add market reference line
@@ -1978,7 +1973,7 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
                          annotation_text="Thị trường (β=1.0)", annotation_position="right")
 
         fig_comparison.update_layout(
-            title="Daily Beta vs Rolling 60-Day Beta",
+            title=f"Daily Beta vs {rolling_label}",
             xaxis_title="Thời gian",
             yaxis_title="Beta Value",
             hovermode='x unified',
@@ -2012,7 +2007,7 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
                 f"{beta_daily_df['Daily_Beta'].std():.4f}",
                 f"{len(beta_daily_df)}"
             ],
-            'Rolling 60-Day': [
+            rolling_short: [
                 f"{rolling_beta_series.mean():.4f}",
                 f"{rolling_beta_series.max():.4f}",
                 f"{rolling_beta_series.min():.4f}",
@@ -2032,7 +2027,7 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
             hide_index=False,
             column_config={
                 'Daily Beta': st.column_config.TextColumn(width="medium"),
-                'Rolling 60-Day': st.column_config.TextColumn(width="medium"),
+                rolling_short: st.column_config.TextColumn(width="medium"),
             }
         )
 
@@ -2054,7 +2049,7 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
             st.metric(
                 "🔇 Giảm Noise",
                 f"{noise_reduction:.1f}%",
-                "Rolling 60D mượt hơn"
+                f"{rolling_short} mượt hơn"
             )
 
         with col3:
@@ -2131,208 +2126,440 @@ Hóa ra, ngân hàng trong thế giới quỹ đầu tư không chỉ là nơi g
     ''', unsafe_allow_html=True)
 
     st.markdown('<p style="font-size:18px;">Với sinh viên nghèo như Mười, VaR và ES là “lá chắn” để <strong>bảo vệ túi tiền</strong>, ước lượng rủi ro cực đoan của danh mục và đảm bảo rằng ngay cả trong những ngày thị trường xấu nhất, cậu cũng không bị “cháy ví”.</p>', unsafe_allow_html=True)
-    try:
-        # Load portfolio returns
-        returns_df = pd.read_csv('port.csv', usecols=['Portfolio'])
-        # Convert to numeric, handling errors
-        portfolio_returns = pd.to_numeric(returns_df['Portfolio'], errors='coerce').dropna()
-
-        # Confidence level selection
-        st.markdown('<p style="font-size:18px; font-weight:bold;">Chọn mức độ tin cậy:</p>', unsafe_allow_html=True)
-
-        confidence_level = st.radio(
-            label="",  # để trống vì label đã in ở trên
-            options=[85, 90, 95, 99],
-            format_func=lambda x: f"{x}%",
-            horizontal=True,
-            key="var_confidence"
-        )
-
-        st.markdown("""
-        <style>
-        div.row-widget.stRadio > div {
-            flex-direction: row;
-        }
-        div.row-widget.stRadio label {
-            font-size: 23px;
-            padding: 10px 20px;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        alpha = 1 - (confidence_level / 100)
-
-        st.markdown(f'<p style="font-size:18px;"><strong>Phân tích với mức tin cậy {confidence_level}% (α = {alpha:.3f})</strong></p>', unsafe_allow_html=True)
+    @st.fragment
+    def show_var_es():
+        """VaR and ES for the selected confidence level and horizon, looked up in the cached risk result"""
+        try:
+            # Confidence level selection
+            st.markdown('<p style="font-size:18px; font-weight:bold;">Chọn mức độ tin cậy:</p>', unsafe_allow_html=True)
+
+            confidence_level = st.radio(
+                label="",  # để trống vì label đã in ở trên
+                options=list(CONFIDENCE_LEVELS),
+                format_func=lambda x: f"{x}%",
+                horizontal=True,
+                key="var_confidence"
+            )
+            horizon = st.radio(
+                "Kỳ hạn nắm giữ",
+                options=list(VAR_HORIZONS),
+                format_func=lambda x: f"{x} ngày",
+                horizontal=True,
+                key="var_horizon"
+            )
 
-        # ====================================================================
-        # METHOD 1: HISTORICAL
-        # ====================================================================
-        var_hist = np.percentile(portfolio_returns, alpha * 100)
-        es_hist = portfolio_returns[portfolio_returns <= var_hist].mean()
+            st.markdown("""
+            <style>
+            div.row-widget.stRadio > div {
+                flex-direction: row;
+            }
+            div.row-widget.stRadio label {
+                font-size: 23px;
+                padding: 10px 20px;
+            }
+            </style>
+            """, unsafe_allow_html=True)
+            alpha = 1 - (confidence_level / 100)
 
-        # ====================================================================
-        # METHOD 2: PARAMETRIC (NORMAL)
-        # ====================================================================
-        mean_ret = portfolio_returns.mean()
-        std_ret = portfolio_returns.std()
-        z_score = norm.ppf(alpha)
-        var_param = mean_ret + z_score * std_ret
-        pdf_z = norm.pdf(z_score)
-        es_param = mean_ret - std_ret * (pdf_z / alpha)
+            st.markdown(f'<p style="font-size:18px;"><strong>Phân tích với mức tin cậy {confidence_level}% (α = {alpha:.3f})</strong></p>', unsafe_allow_html=True)
 
-        # ====================================================================
-        # METHOD 3: MONTE CARLO
-        # ====================================================================
-        np.random.seed(42)
-        n_sims = 10000
-        sim_returns = np.random.normal(mean_ret, std_ret, n_sims)
-        var_mc = np.percentile(sim_returns, alpha * 100)
-        es_mc = sim_returns[sim_returns <= var_mc].mean()
-
-        # ====================================================================
-        # COMPARISON TABLE
-        # ====================================================================
-        var_comparison = pd.DataFrame({
-            'Phương pháp': ['Historical', 'Parametric', 'Monte Carlo'],
-            'VaR': [var_hist, var_param, var_mc],
-            'ES': [es_hist, es_param, es_mc],
-            'Mô tả': [
+            # Historical, Parametric (normal) and Monte Carlo VaR/ES for every level and horizon are
+            # computed once per variance-reduction method; the widgets above only pick a cell
+            mc_method = st.selectbox(
+                "Kỹ thuật giảm phương sai (Monte Carlo)",
+                options=list(VARIANCE_REDUCTION),
+                format_func=VARIANCE_REDUCTION.get,
+                key="var_variance_reduction"
+            )
+            risk = load_risk_result(mc_method)
+            var_mc_se, es_mc_se = risk.standard_errors(confidence_level, horizon)
+
+            # ====================================================================
+            # COMPARISON TABLE
+            # ====================================================================
+            var_comparison = risk.table(confidence_level, horizon).rename(index=VAR_METHODS).rename_axis('Phương pháp').reset_index()
+            var_comparison['Mô tả'] = [
                 'Dữ liệu thực tế',
                 'Phân phối chuẩn',
-                f'{n_sims:,} mô phỏng'
+                f'{risk.n_sims:,} mô phỏng (SE: VaR ±{var_mc_se:.5f}, ES ±{es_mc_se:.5f})',
+                f'GARCH(1,1) + phần dư chuẩn hóa lịch sử (α = {risk.garch.alpha:.3f}, β = {risk.garch.beta:.3f})'
             ]
-        })
 
-        # Display comparison table as main content
-        st.markdown("#### 📋 Bảng so sánh VaR & ES (3 Phương pháp)")
+            # Display comparison table as main content
+            st.markdown("#### 📋 Bảng so sánh VaR & ES (4 Phương pháp)")
+
+            # Format table for better display
+            display_table = var_comparison.copy()
+            display_table['VaR'] = display_table['VaR'].apply(lambda x: f"{x:.4f}")
+            display_table['ES'] = display_table['ES'].apply(lambda x: f"{x:.4f}")
+
+            st.dataframe(
+                display_table.set_index('Phương pháp'),
+                use_container_width=True,
+                column_config={
+                    'VaR': st.column_config.TextColumn(
+                        width="medium",
+                        help=f"Mức thua lỗ tối đa mà portfolio có thể gặp phải trong {horizon} ngày với xác suất {confidence_level}%"
+                    ),
+                    'ES': st.column_config.TextColumn(
+                        width="medium",
+                        help="Mức thua lỗ trung bình khi xảy ra trường hợp xấu hơn VaR (trong tail risk)"
+                    ),
+                    'Mô tả': st.column_config.TextColumn(width="large"),
+                }
+            )
 
-        # Format table for better display
-        display_table = var_comparison.copy()
-        display_table['VaR'] = display_table['VaR'].apply(lambda x: f"{x:.4f}")
-        display_table['ES'] = display_table['ES'].apply(lambda x: f"{x:.4f}")
+            st.markdown("")
 
-        st.dataframe(
-            display_table.set_index('Phương pháp'),
-            use_container_width=True,
-            column_config={
-                'VaR': st.column_config.TextColumn(
-                    width="medium",
-                    help="Mức thua lỗ tối đa mà portfolio có thể gặp phải trong 1 ngày với xác suất " + f"{confidence_level}%"
-                ),
-                'ES': st.column_config.TextColumn(
-                    width="medium",
-                    help="Mức thua lỗ trung bình khi xảy ra trường hợp xấu hơn VaR (trong tail risk)"
-                ),
-                'Mô tả': st.column_config.TextColumn(width="large"),
-            }
-        )
+            # Create two columns for charts
+            col_left, col_right = st.columns(2)
+
+            # Chart 1: VaR vs ES comparison
+            with col_left:
+                fig_var_es = go.Figure()
+
+                fig_var_es.add_trace(go.Bar(
+                    name='VaR',
+                    x=var_comparison['Phương pháp'],
+                    y=var_comparison['VaR'],
+                    marker_color='#E74C3C',
+                    text=[f'{v:.4f}' for v in var_comparison['VaR']],
+                    textposition='outside',
+                    hovertemplate='<b>%{x}</b><br>VaR: %{y:.4f}<extra></extra>'
+                ))
 
-        st.markdown("")
+                fig_var_es.add_trace(go.Bar(
+                    name='ES',
+                    x=var_comparison['Phương pháp'],
+                    y=var_comparison['ES'],
+                    marker_color='#3498DB',
+                    text=[f'{v:.4f}' for v in var_comparison['ES']],
+                    textposition='outside',
+                    hovertemplate='<b>%{x}</b><br>ES: %{y:.4f}<extra></extra>'
+                ))
 
-        # Create two columns for charts
-        col_left, col_right = st.columns(2)
-
-        # Chart 1: VaR vs ES comparison
-        with col_left:
-            fig_var_es = go.Figure()
-
-            fig_var_es.add_trace(go.Bar(
-                name='VaR',
-                x=var_comparison['Phương pháp'],
-                y=var_comparison['VaR'],
-                marker_color='#E74C3C',
-                text=[f'{v:.4f}' for v in var_comparison['VaR']],
-                textposition='outside',
-                hovertemplate='<b>%{x}</b><br>VaR: %{y:.4f}<extra></extra>'
-            ))
+                fig_var_es.update_layout(
+                    title="VaR vs ES Comparison",
+                    xaxis_title="Method",
+                    yaxis_title="Daily Loss",
+                    barmode='group',
+                    height=450,
+                    template='plotly_white',
+                    showlegend=True
+                )
 
-            fig_var_es.add_trace(go.Bar(
-                name='ES',
-                x=var_comparison['Phương pháp'],
-                y=var_comparison['ES'],
-                marker_color='#3498DB',
-                text=[f'{v:.4f}' for v in var_comparison['ES']],
-                textposition='outside',
-                hovertemplate='<b>%{x}</b><br>ES: %{y:.4f}<extra></extra>'
-            ))
+                st.plotly_chart(fig_var_es, use_container_width=True)
+
+            # Chart 2: Distribution with VaR thresholds
+                with col_right:
+                    fig_dist = go.Figure()
+
+                    fig_dist.add_trace(go.Histogram(
+                        x=risk.samples(horizon),
+                        name='Historical Returns',
+                        nbinsx=40,
+                        marker_color='rgba(31, 119, 180, 0.6)',
+                        hovertemplate='<b>Range:</b> %{x:.4f}<br><b>Freq:</b> %{y}<extra></extra>'
+                    ))
+
+                    # Add VaR lines with proper legend
+                    colors = ['#E74C3C', '#F39C12', '#9B59B6', '#16A085']
+                    methods = ['Historical VaR', 'Parametric VaR', 'MC VaR', 'GARCH-FHS VaR']
+                    vars_vals = var_comparison['VaR']
+
+                    for method, var_val, color in zip(methods, vars_vals, colors):
+                        fig_dist.add_vline(
+                            x=var_val, 
+                            line_dash="dash",
+                            line_color=color,
+                            line_width=2,
+                            name=f"{method}: {var_val:.4f}",
+                            showlegend=True
+                        )
+
+                    fig_dist.update_layout(
+                        title=f"Returns Distribution + VaR ({confidence_level}%, {horizon} ngày)",
+                        xaxis_title="Daily Return" if horizon == 1 else f"{horizon}-day Return",
+                        yaxis_title="Frequency",
+                        height=450,
+                        template='plotly_white',
+                        showlegend=True,
+                        legend=dict(
+                            x=1.02,
+                            y=1,
+                            xanchor='left',
+                            yanchor='top',
+                            bgcolor='rgba(255,255,255,0.8)',
+                            bordercolor='#ddd',
+                            borderwidth=1
+                        )
+                    )
 
-            fig_var_es.update_layout(
-                title="VaR vs ES Comparison",
-                xaxis_title="Method",
-                yaxis_title="Daily Loss",
-                barmode='group',
+                    st.plotly_chart(fig_dist, use_container_width=True)
+
+            st.markdown("")
+
+            # ====================================================================
+            # ROLLING BACKTEST
+            # ====================================================================
+            st.markdown(f"#### 🧪 Kiểm định VaR cuốn chiếu (1 ngày, mức tin cậy {confidence_level}%)")
+            backtest_window = st.selectbox(
+                "Cửa sổ ước lượng (ngày giao dịch)",
+                options=list(BACKTEST_WINDOWS),
+                index=list(BACKTEST_WINDOWS).index(250),
+                key="var_backtest_window"
+            )
+            backtest = load_backtest(backtest_window, mc_method)
+            backtest_summary = backtest.summary(confidence_level)
+
+            backtest_table = pd.DataFrame({
+                'Số ngoại lệ': backtest_summary['exceptions'].astype(str) + ' / ' + backtest_summary['expected'].map('{:.1f}'.format),
+                'Kupiec LR (p)': backtest_summary['kupiec_lr'].map('{:.2f}'.format) + ' (' + backtest_summary['kupiec_p'].map('{:.3f}'.format) + ')',
+                'Christoffersen LR (p)': backtest_summary['christoffersen_lr'].map('{:.2f}'.format) + ' (' + backtest_summary['christoffersen_p'].map('{:.3f}'.format) + ')',
+                'Conditional coverage LR (p)': backtest_summary['cc_lr'].map('{:.2f}'.format) + ' (' + backtest_summary['cc_p'].map('{:.3f}'.format) + ')',
+                'Lỗ thực tế / ES': backtest_summary['es_ratio'].map('{:.2f}'.format),
+            }).rename(index=VAR_METHODS).rename_axis('Phương pháp')
+            st.dataframe(
+                backtest_table,
+                use_container_width=True,
+                column_config={
+                    'Số ngoại lệ': st.column_config.TextColumn(help="Số ngày lỗ vượt VaR so với số ngày kỳ vọng"),
+                    'Lỗ thực tế / ES': st.column_config.TextColumn(help="Lỗ trung bình trong các ngày ngoại lệ so với ES dự báo (gần 1 là tốt)"),
+                }
+            )
+            st.caption(f"{len(backtest.realized)} ngày kiểm định, mỗi ngày dự báo từ {backtest_window} ngày trước đó. "
+                       "p-value dưới 0.05 nghĩa là mô hình bị bác bỏ ở mức ý nghĩa 5%.")
+
+            backtest_frame = backtest.frame(confidence_level)
+            fig_backtest = go.Figure()
+            fig_backtest.add_trace(go.Scattergl(
+                x=backtest_frame.index, y=backtest_frame['return'].astype(np.float32),
+                mode='markers', name='Lợi suất thực tế',
+                marker=dict(size=4, color='rgba(120, 120, 120, 0.6)'),
+                hovertemplate='%{x|%d/%m/%Y}<br>Return: %{y:.4f}<extra></extra>'
+            ))
+            for method, color in zip(VAR_METHODS, ['#E74C3C', '#F39C12', '#9B59B6', '#16A085']):
+                fig_backtest.add_trace(go.Scattergl(
+                    x=backtest_frame.index, y=backtest_frame[f'{method}_var'].astype(np.float32),
+                    mode='lines', name=f'{VAR_METHODS[method]} VaR',
+                    line=dict(color=color, width=1.5),
+                    hovertemplate=f'{VAR_METHODS[method]} VaR: ' + '%{y:.4f}<extra></extra>'
+                ))
+                hits = backtest_frame[backtest_frame[f'{method}_exception']]
+                fig_backtest.add_trace(go.Scattergl(
+                    x=hits.index, y=hits['return'].astype(np.float32),
+                    mode='markers', name=f'Ngoại lệ {VAR_METHODS[method]}',
+                    marker=dict(size=8, color=color, symbol='x'),
+                    hovertemplate='%{x|%d/%m/%Y}<br>Return: %{y:.4f}<extra></extra>'
+                ))
+            fig_backtest.update_layout(
+                title=f"Backtest VaR {confidence_level}% — cửa sổ {backtest_window} ngày",
+                xaxis_title="Ngày",
+                yaxis_title="Daily Return",
                 height=450,
                 template='plotly_white',
-                showlegend=True
+                hovermode='closest'
             )
+            st.plotly_chart(fig_backtest, use_container_width=True)
 
-            st.plotly_chart(fig_var_es, use_container_width=True)
+            st.markdown("")
 
-        # Chart 2: Distribution with VaR thresholds
-            with col_right:
-                fig_dist = go.Figure()
+            # ====================================================================
+            # RISK ATTRIBUTION
+            # ====================================================================
+            st.markdown(f"#### 🧩 Đóng góp rủi ro theo mã (1 ngày, mức tin cậy {confidence_level}%)")
+            attribution_method = st.selectbox(
+                "Phương pháp phân bổ",
+                options=list(ATTRIBUTION_METHODS),
+                format_func=VAR_METHODS.get,
+                key="var_attribution_method"
+            )
+            attribution = load_risk_attribution(confidence_level, attribution_method, mc_method)
+
+            attribution_display = pd.DataFrame({
+                'Tỷ trọng': attribution['weight'].map('{:.1%}'.format),
+                'Marginal VaR': attribution['marginal_var'].map('{:.4f}'.format),
+                'Component VaR': attribution['component_var'].map('{:.4f}'.format),
+                '% VaR': attribution['component_var_share'].map('{:.1%}'.format),
+                'Incremental VaR': attribution['incremental_var'].map('{:.4f}'.format),
+                'Component ES': attribution['component_es'].map('{:.4f}'.format),
+                '% ES': attribution['component_es_share'].map('{:.1%}'.format),
+                'Incremental ES': attribution['incremental_es'].map('{:.4f}'.format),
+            }).rename_axis('Mã')
+            st.dataframe(
+                attribution_display,
+                use_container_width=True,
+                column_config={
+                    'Marginal VaR': st.column_config.TextColumn(help="Thay đổi của VaR khi tăng tỷ trọng mã thêm một đơn vị"),
+                    'Component VaR': st.column_config.TextColumn(help="Phần VaR của danh mục do mã đóng góp; tổng các mã bằng VaR"),
+                    'Incremental VaR': st.column_config.TextColumn(help="VaR danh mục trừ đi VaR khi bỏ hẳn mã khỏi danh mục"),
+                }
+            )
 
-                fig_dist.add_trace(go.Histogram(
-                    x=portfolio_returns,
-                    name='Historical Returns',
-                    nbinsx=40,
-                    marker_color='rgba(31, 119, 180, 0.6)',
-                    hovertemplate='<b>Range:</b> %{x:.4f}<br><b>Freq:</b> %{y}<extra></extra>'
+            fig_attribution = go.Figure()
+            for measure, label, color in (('component_var', 'Component VaR', '#E74C3C'),
+                                          ('component_es', 'Component ES', '#3498DB')):
+                fig_attribution.add_trace(go.Bar(
+                    name=label,
+                    x=attribution.index,
+                    y=attribution[measure],
+                    marker_color=color,
+                    customdata=attribution[f'{measure}_share'],
+                    hovertemplate=f'<b>%{{x}}</b><br>{label}: ' + '%{y:.4f} (%{customdata:.1%})<extra></extra>'
                 ))
+            fig_attribution.update_layout(
+                title=f"Đóng góp vào VaR/ES ({VAR_METHODS[attribution_method]})",
+                xaxis_title="Mã",
+                yaxis_title="Daily Loss",
+                barmode='group',
+                height=400,
+                template='plotly_white'
+            )
+            st.plotly_chart(fig_attribution, use_container_width=True)
 
-                # Add VaR lines with proper legend
-                colors = ['#E74C3C', '#F39C12', '#9B59B6']
-                methods = ['Historical VaR', 'Parametric VaR', 'MC VaR']
-                vars_vals = [var_hist, var_param, var_mc]
-
-                for method, var_val, color in zip(methods, vars_vals, colors):
-                    fig_dist.add_vline(
-                        x=var_val, 
-                        line_dash="dash",
-                        line_color=color,
-                        line_width=2,
-                        name=f"{method}: {var_val:.4f}",
-                        showlegend=True
-                    )
+            st.markdown("")
 
-                fig_dist.update_layout(
-                    title=f"Returns Distribution + VaR ({confidence_level}%)",
-                    xaxis_title="Daily Return",
-                    yaxis_title="Frequency",
-                    height=450,
-                    template='plotly_white',
-                    showlegend=True,
-                    legend=dict(
-                        x=1.02,
-                        y=1,
-                        xanchor='left',
-                        yanchor='top',
-                        bgcolor='rgba(255,255,255,0.8)',
-                        bordercolor='#ddd',
-                        borderwidth=1
-                    )
+            # ====================================================================
+            # INSIGHTS
+            # ====================================================================
+            # GARCH-FHS sentence built from the current result and backtest, which change with the data
+            garch_var = risk.value('garch_fhs', confidence_level, horizon)[0]
+            historical_var = risk.value('historical', confidence_level, horizon)[0]
+            parametric_var = risk.value('parametric', confidence_level, horizon)[0]
+            if min(historical_var, parametric_var) <= garch_var <= max(historical_var, parametric_var):
+                garch_position = 'nằm giữa Historical và Parametric'
+            elif garch_var < min(historical_var, parametric_var):
+                garch_position = 'sâu hơn cả Historical và Parametric'
+            else:
+                garch_position = 'nông hơn cả Historical và Parametric'
+            garch_backtest = backtest_summary.loc['garch_fhs']
+            garch_verdict = ('không bị kiểm định Kupiec bác bỏ' if garch_backtest['kupiec_p'] >= 0.05
+                             else 'bị kiểm định Kupiec bác bỏ')
+            garch_insight = (
+                f"GARCH-FHS bổ sung góc nhìn theo biến động hiện tại: ở mức tin cậy {confidence_level}% và kỳ hạn {horizon} ngày, "
+                f"VaR của phương pháp này ({garch_var:.4f}) {garch_position} ({historical_var:.4f} và {parametric_var:.4f}). "
+                f"Trong backtest với cửa sổ {backtest_window} ngày, GARCH-FHS có {int(garch_backtest['exceptions'])} lần vượt VaR so với "
+                f"{garch_backtest['expected']:.1f} lần kỳ vọng và {garch_verdict} (p = {garch_backtest['kupiec_p']:.3f}). "
+                "Các giả định phân phối khác như phân phối t hay Cornish–Fisher vẫn có thể được cân nhắc thêm."
+            )
+            st.markdown(f"""
+            <div style="background-color: #FFF3CD; padding: 15px; border-radius: 8px; border-left: 4px solid #FFC107;">
+                <h5 style="color: #FF6B00; margin-top: 0;">🔍 Nhận xét:</h5>
+                <p style="font-size:18px;"> 
+                Tổng quan phân tích rủi ro cho thấy danh mục có mức rủi ro tương đối trung bình trong điều kiện thị trường bình thường, nhưng tồn tại rủi ro tail đáng chú ý. Khi so sánh bốn phương pháp Historical, Parametric, Monte Carlo và GARCH-FHS, kết quả Historical cho thấy biến động gần đây không quá lớn, tuy nhiên Expected Shortfall (ES) lại sâu hơn đáng kể, phản ánh sự hiện diện của các cú sốc cực đoan và độ dày tail trong phân phối lợi suất. Biểu đồ phân phối lợi suất cũng cho thấy skew âm rõ rệt và đuôi trái dài, củng cố nhận định rằng danh mục chịu ảnh hưởng mạnh bởi các sự kiện hiếm nhưng tổn thất lớn.
+                </p>
+                <p style="font-size:18px;">
+    Trong khi đó, Parametric và Monte Carlo cho kết quả khá tương đồng, hàm ý rằng rủi ro danh mục chủ yếu được giải thích bởi hiệp phương sai giữa các tài sản, thay vì các cấu trúc phi tuyến hay tail phức tạp. Tuy nhiên, sự chênh lệch đáng kể giữa ES và VaR ở nhiều mức độ tin cậy cho thấy trong điều kiện bất lợi, mức lỗ thực tế có thể vượt xa VaR, khiến ES trở thành thước đo phản ánh rủi ro đầy đủ hơn. {garch_insight}
+                </p>
+            </div>
+            """,unsafe_allow_html=True)
+
+        except Exception as e:
+            st.error(f"❌ Lỗi tính VaR: {e}")
+
+    show_var_es()
+
+    def show_stress_results(scenarios, candidates, selected_scenarios):
+        """Table for the current portfolio and P&L heatmap of the selected named scenarios"""
+        stress = scenarios.replay(candidates).loc[selected_scenarios]
+        info = scenarios.describe().loc[selected_scenarios]
+
+        current = stress.xs('Danh mục hiện tại', level='portfolio')
+        period = info['start'].dt.strftime('%d/%m/%Y') + ' - ' + info['end'].dt.strftime('%d/%m/%Y')
+        stress_table = pd.DataFrame({
+            'Loại': info['kind'].map({'historical': 'Lịch sử', 'hypothetical': 'Giả định'}),
+            'Giai đoạn': period.fillna('1 ngày'),
+            'Lãi/Lỗ': current['pnl'].map('{:+.2%}'.format),
+            'Sụt giảm tối đa': current['max_drawdown'].map('{:.2%}'.format),
+            'Số ngày hồi phục': current['recovery_days'].map(lambda days: '—' if np.isnan(days) else f'{days:.0f}'),
+        }).rename_axis('Kịch bản')
+        st.dataframe(
+            stress_table,
+            use_container_width=True,
+            column_config={
+                'Số ngày hồi phục': st.column_config.TextColumn(
+                    help=f"Số phiên từ đáy đến khi danh mục lấy lại đỉnh trước đó (tìm trong {RECOVERY_DAYS} phiên sau kịch bản)"),
+            }
+        )
+
+        pnl_matrix = stress['pnl'].unstack('portfolio').reindex(index=selected_scenarios, columns=candidates.index)
+        fig_stress = go.Figure(go.Heatmap(
+            z=pnl_matrix.to_numpy() * 100,
+            x=pnl_matrix.columns,
+            y=pnl_matrix.index,
+            colorscale='RdYlGn',
+            zmid=0,
+            text=(pnl_matrix * 100).round(1).astype(str) + '%',
+            texttemplate='%{text}',
+            hovertemplate='%{y}<br>%{x}: %{z:.2f}%<extra></extra>',
+            colorbar=dict(title='Lãi/Lỗ (%)')
+        ))
+        fig_stress.update_layout(
+            title="Lãi/Lỗ theo kịch bản và danh mục",
+            height=420,
+            template='plotly_white',
+            yaxis=dict(autorange='reversed'),
+            margin=dict(l=220, r=30, t=50, b=40)
+        )
+        st.plotly_chart(fig_stress, use_container_width=True)
+
+    def show_rolling_stress(rolling, candidates, length):
+        """Worst and typical outcome of every candidate over all overlapping historical windows"""
+        rolling_pnl = rolling.replay(candidates)['pnl'].unstack('portfolio').reindex(columns=candidates.index)
+        windows = rolling.describe().loc[rolling_pnl.idxmin()]
+        rolling_table = pd.DataFrame({
+            'Lỗ nặng nhất': rolling_pnl.min().map('{:+.2%}'.format),
+            'Giai đoạn lỗ nặng nhất': (windows['start'].dt.strftime('%d/%m/%Y') + ' - '
+                                       + windows['end'].dt.strftime('%d/%m/%Y')).to_numpy(),
+            'Phân vị 5%': rolling_pnl.quantile(0.05).map('{:+.2%}'.format),
+            'Tỷ lệ giai đoạn lỗ': (rolling_pnl < 0).mean().map('{:.1%}'.format),
+        }).rename_axis('Danh mục')
+        st.markdown(f"##### Mọi giai đoạn {length} phiên liên tiếp trong lịch sử ({len(rolling_pnl):,} kịch bản)")
+        st.dataframe(rolling_table, use_container_width=True)
+
+    @st.fragment
+    def show_stress_scenarios():
+        """Historical and hypothetical stress scenarios replayed on the portfolio and candidate weights"""
+        try:
+            st.markdown("#### ⚡ Kịch bản căng thẳng (Stress test)")
+            st.markdown('<p style="font-size:18px;">Mười phát lại các giai đoạn thị trường giảm mạnh trong lịch sử (cú sốc thuế đối ứng 08/04/2025, đợt bán tháo quý 4/2022) và một số cú sốc giả định lên danh mục hiện tại, so sánh với danh mục tỷ trọng bằng nhau và từng mã riêng lẻ.</p>', unsafe_allow_html=True)
+
+            scenario_col, rolling_col = st.columns([2, 1])
+            with scenario_col:
+                selected_scenarios = st.multiselect(
+                    "Kịch bản",
+                    options=list(HISTORICAL_SCENARIOS) + list(HYPOTHETICAL_SHOCKS),
+                    default=list(HISTORICAL_SCENARIOS) + list(HYPOTHETICAL_SHOCKS),
+                    key="stress_scenarios"
+                )
+            with rolling_col:
+                rolling_length = st.selectbox(
+                    "Quét mọi giai đoạn lịch sử dài",
+                    options=[0] + list(ROLLING_WINDOWS),
+                    format_func=lambda days: 'Không' if days == 0 else f'{days} phiên',
+                    key="stress_rolling_window",
+                    help="Phát lại mọi cửa sổ liên tiếp có độ dài này trong lịch sử lợi suất"
                 )
 
-                st.plotly_chart(fig_dist, use_container_width=True)
+            scenarios = load_scenario_set()
+            candidates = pd.DataFrame(
+                [PORTFOLIO_WEIGHTS, {ticker: 1 / len(PORTFOLIO_WEIGHTS) for ticker in PORTFOLIO_WEIGHTS}]
+                + [{ticker: 1.0} for ticker in PORTFOLIO_WEIGHTS],
+                index=['Danh mục hiện tại', 'Tỷ trọng bằng nhau'] + [f'100% {ticker}' for ticker in PORTFOLIO_WEIGHTS]
+            ).fillna(0.0)
 
-        st.markdown("")
+            if not selected_scenarios:
+                st.info("Chọn ít nhất một kịch bản để xem kết quả.")
+            else:
+                show_stress_results(scenarios, candidates, selected_scenarios)
 
-        # ====================================================================
-        # INSIGHTS
-        # ====================================================================
-        st.markdown("""
-        <div style="background-color: #FFF3CD; padding: 15px; border-radius: 8px; border-left: 4px solid #FFC107;">
-            <h5 style="color: #FF6B00; margin-top: 0;">🔍 Nhận xét:</h5>
-            <p style="font-size:18px;"> 
-            Tổng quan phân tích rủi ro cho thấy danh mục có mức rủi ro tương đối trung bình trong điều kiện thị trường bình thường, nhưng tồn tại rủi ro tail đáng chú ý. Khi so sánh ba phương pháp Historical, Parametric và Monte Carlo, kết quả Historical cho thấy biến động gần đây không quá lớn, tuy nhiên Expected Shortfall (ES) lại sâu hơn đáng kể, phản ánh sự hiện diện của các cú sốc cực đoan và độ dày tail trong phân phối lợi suất. Biểu đồ phân phối lợi suất cũng cho thấy skew âm rõ rệt và đuôi trái dài, củng cố nhận định rằng danh mục chịu ảnh hưởng mạnh bởi các sự kiện hiếm nhưng tổn thất lớn.
-            </p>
-            <p style="font-size:18px;">
-Trong khi đó, Parametric và Monte Carlo cho kết quả khá tương đồng, hàm ý rằng rủi ro danh mục chủ yếu được giải thích bởi hiệp phương sai giữa các tài sản, thay vì các cấu trúc phi tuyến hay tail phức tạp. Tuy nhiên, sự chênh lệch đáng kể giữa ES và VaR ở nhiều mức độ tin cậy cho thấy trong điều kiện bất lợi, mức lỗ thực tế có thể vượt xa VaR, khiến ES trở thành thước đo phản ánh rủi ro đầy đủ hơn. Điều này cũng gợi ý rằng các mô hình nâng cao như phân phối t, Cornish–Fisher hay GARCH có thể phù hợp hơn trong việc mô phỏng tail risk và hành vi biến động thực tế của danh mục.
-            </p>
-        </div>
-        """,unsafe_allow_html=True)
+            if rolling_length:
+                show_rolling_stress(load_rolling_scenarios(rolling_length), candidates, rolling_length)
 
-    except Exception as e:
-        st.error(f"❌ Lỗi tính VaR: {e}")
+        except Exception as e:
+            st.error(f"❌ Lỗi kịch bản căng thẳng: {e}")
+
+    show_stress_scenarios()
 
     st.markdown("")
     st.divider()
@@ -2346,8 +2573,8 @@ Trong khi đó, Parametric và Monte Carlo cho kết quả khá tương đồng,
 
     try:
         # Load data
-        beta_daily_df = pd.read_csv('beta.csv', index_col=0, parse_dates=True)
-        returns_df = pd.read_csv('returns_xts_1763848584845.csv')
+        beta_daily_df = load_beta()
+        returns_df = load_returns_xts()
         portfolio_returns = returns_df.mean(axis=1)
 
         # CAPM Parameters
@@ -2377,6 +2604,13 @@ Trong khi đó, Parametric và Monte Carlo cho kết quả khá tương đồng,
 </ul>
 ''', unsafe_allow_html=True)
 
+        # Rolling betas of each stock and the portfolio, from the same panel as section VII
+        beta_panel = load_beta_panel()
+        latest_betas = beta_panel.latest()
+        latest_betas.columns = [f"{w} ngày" for w in beta_panel.windows]
+        st.markdown(f"##### Beta theo cửa sổ ước lượng (tại {beta_panel.index[-1]:%d/%m/%Y})")
+        st.dataframe(latest_betas.style.format("{:.4f}"), use_container_width=True)
+
         # ====================================================================
         # 2. TÍNH TOÁN CỤ THỂ
         # ====================================================================
@@ -2443,23 +2677,11 @@ Trong khi đó, Parametric và Monte Carlo cho kết quả khá tương đồng,
             ]
         })
 
-        html_table = '<div style="overflow-x: auto;">'
-        html_table += '<table style="width:100%; border-collapse: collapse; font-size: 17px; text-align: center;">'
-        html_table += '<thead><tr style="background-color: #E3F2FD; border-bottom: 2px solid #1976D2;">'
-        html_table += '<th style="padding: 12px; text-align: center; border-right: 1px solid #ddd; font-weight: bold;">Chỉ số</th>'
-        html_table += '<th style="padding: 12px; text-align: center; font-weight: bold;">Giá trị</th>'
-        html_table += '</tr></thead>'
-        html_table += '<tbody>'
-
-        for idx, row in comparison_data.iterrows():
-            bg_color = '#F5F5F5' if idx % 2 == 0 else '#FFFFFF'
-            html_table += f'<tr style="background-color: {bg_color}; border-bottom: 1px solid #ddd;">'
-            html_table += f'<td style="padding: 10px; text-align: center; border-right: 1px solid #ddd;"><strong>{row["Chỉ số"]}</strong></td>'
-            html_table += f'<td style="padding: 10px; text-align: center;">{row["Giá trị"]}</td>'
-            html_table += '</tr>'
-
-        html_table += '</tbody></table></div>'
-        st.markdown(html_table, unsafe_allow_html=True)
+        comparison_columns = (
+            TableColumn('Chỉ số', 'Chỉ số', header_class='sep', cell_class='sep', template='<strong>{}</strong>'),
+            TableColumn('Giá trị', 'Giá trị'),
+        )
+        st.markdown(render_table(comparison_data, comparison_columns, 'story-table large striped'), unsafe_allow_html=True)
 
         # ====================================================================
         # 4. NHẬN XÉT
@@ -2541,281 +2763,193 @@ Trong khi đó, Parametric và Monte Carlo cho kết quả khá tương đồng,
 
     st.markdown('<p style="font-size:18px;"><strong>Nhấn vào từng tab để xem từng mã chứng khoán</strong></p>', unsafe_allow_html=True)
     
-    # Import required calculation functions
-    def calculate_capm_return(risk_free_rate, beta, market_risk_premium):
-        return risk_free_rate + beta * market_risk_premium
-    
-    def calculate_dcf_value(current_price, fcf_growth_rates, terminal_growth_rate, discount_rate, current_fcf=None):
-        if current_fcf is None:
-            current_fcf = current_price * 0.10
-        projected_fcf = []
-        fcf = current_fcf
-        for growth_rate in fcf_growth_rates:
-            fcf = fcf * (1 + growth_rate)
-            projected_fcf.append(fcf)
-        pv_fcf = 0
-        for year, fcf_value in enumerate(projected_fcf, 1):
-            pv = fcf_value / ((1 + discount_rate) ** year)
-            pv_fcf += pv
-        terminal_fcf = projected_fcf[-1] * (1 + terminal_growth_rate)
-        terminal_value = terminal_fcf / (discount_rate - terminal_growth_rate)
-        pv_terminal = terminal_value / ((1 + discount_rate) ** len(fcf_growth_rates))
-        intrinsic_value = pv_fcf + pv_terminal
-        upside_downside = ((intrinsic_value - current_price) / current_price) * 100
-        return {
-            'intrinsic_value': intrinsic_value,
-            'current_price': current_price,
-            'upside_downside_pct': upside_downside,
-            'pv_fcf': pv_fcf,
-            'pv_terminal': pv_terminal,
-            'projected_fcf': projected_fcf
-        }
-    
-    if portfolio_df is not None and extended_hist is not None and PORTFOLIO_HOLDINGS is not None:
-        try:
-            risk_free_rate = 0.045
-            market_risk_premium = 0.06
-            terminal_growth_rate = 0.025
-            
-
-            
-            for stock in PORTFOLIO_HOLDINGS:
-                ticker = stock['ticker']
-                
-                # Skip ACB - only show VNM, HPG, DBD
-                if ticker == "ACB":
-                    continue
-                
-                current_price = portfolio_df[portfolio_df['ticker'] == ticker]['current_price'].values[0]
-                
-                if isinstance(extended_hist['Close'], pd.DataFrame):
-                    stock_prices = extended_hist['Close'][ticker].dropna()
-                else:
-                    stock_prices = extended_hist['Close'].dropna()
-                
-                if len(stock_prices) > 60:
-                    stock_returns = stock_prices.pct_change().dropna()
-                    np.random.seed(hash(ticker) % 2**32)
-                    spy_returns = pd.Series(
-                        np.random.normal(0.0008, 0.015, len(stock_returns)),
-                        index=stock_returns.index
+    @st.fragment
+    def show_dcf_valuation():
+        """FCFE valuation, sensitivity grid and Monte Carlo valuation tabs for VNM, HPG and DBD"""
+        if PORTFOLIO_HOLDINGS is not None:
+            try:
+                risk_free_rate = 0.045
+                market_risk_premium = 0.06
+                terminal_growth_rate = 0.03
+
+                # Beta against VNINDEX and CAPM cost of equity, computed once per data version
+                capm_table = load_capm_table(risk_free_rate, market_risk_premium)
+                latest_close = load_prices().iloc[-1]
+
+                # Holt-Winters FCFE forecasts (trillion VND) and shares outstanding
+                fcfe_forecasts = {
+                    'HPG': {'fcfe': (20.724, 21.163, 22.163), 'shares': 7675465855},
+                    'VNM': {'fcfe': (6.5998, 5.5022, 5.5022), 'shares': 2089955445},
+                    'DBD': {'fcfe': (0.092850, 0.103082, 0.137119), 'shares': 93553762},
+                }
+                forecast_years = [2025, 2026, 2027]
+
+                # Sensitivity grid: cost of equity x terminal growth for each shift of the FCFE growth path
+                growth_shifts = np.round(np.linspace(-0.05, 0.05, 11), 4)
+                terminal_axis = np.linspace(0.0, 0.06, 200)
+
+                st.markdown("#### 🎲 Tham số Monte Carlo định giá")
+                mc_col1, mc_col2, mc_col3, mc_col4, mc_col5 = st.columns(5)
+                with mc_col1:
+                    dcf_draws = st.select_slider(
+                        "Số kịch bản",
+                        options=[100_000, 250_000, 500_000, 1_000_000],
+                        value=100_000,
+                        format_func=lambda n: f"{n:,}",
+                        key="dcf_mc_draws"
                     )
-                    
-                    if len(stock_returns) > 0:
-                        covariance = stock_returns.cov(spy_returns)
-                        market_variance = spy_returns.var()
-                        beta = covariance / market_variance if market_variance > 0 else 1.0
-                    else:
-                        beta = 1.0
-                    
-                    capm_return = calculate_capm_return(risk_free_rate, beta, market_risk_premium)
-                    fcf_growth_rates = [0.12, 0.10, 0.08, 0.06, 0.04]
-                    dcf_result = calculate_dcf_value(current_price, fcf_growth_rates, terminal_growth_rate, capm_return)
-                    
-                    # Override VNM with actual valuation data
-                    if ticker == "VNM":
-                        beta = 0.5782436
-                        capm_return = 0.0695
-                        # DCF Valuation Data for VNM
-                        vnm_intrinsic_per_share = 61151.74  # VND per share
-                        vnm_current_price = 53000  # Current market price (VND) - approximate
-                        vnm_upside = ((vnm_intrinsic_per_share - vnm_current_price) / vnm_current_price) * 100
-                        vnm_num_shares = 2089955445
-                        
-                        # Detailed DCF breakdown for VNM
-                        vnm_fcfe_2025 = 6.5998  # Trillion VND
-                        vnm_fcfe_2026 = 5.5022  # Trillion VND
-                        vnm_fcfe_2027 = 5.5022  # Trillion VND
-                        vnm_terminal_value = 143.309  # Trillion VND (rounded)
-                        
-                        vnm_pv_fcfe_2025 = 6.171  # Billion VND (rounded)
-                        vnm_pv_fcfe_2026 = 4.810  # Billion VND (rounded)
-                        vnm_pv_fcfe_2027 = 4.497  # Billion VND (rounded)
-                        vnm_pv_terminal = 117.132  # Billion VND (rounded)
-                        
-                        # Total enterprise value
-                        pv_fcf_total = (vnm_pv_fcfe_2025 + vnm_pv_fcfe_2026 + vnm_pv_fcfe_2027) * 1e9  # Sum of PV of projected FCFE (in VND)
-                        pv_terminal_total = vnm_pv_terminal * 1e9  # PV of terminal value (in VND)
-                        total_ev = pv_fcf_total + pv_terminal_total
-                        
-                        dcf_result = {
-                            'intrinsic_value': vnm_intrinsic_per_share / 1000,  # Convert to thousands for display
-                            'current_price': vnm_current_price / 1000,
-                            'upside_downside_pct': vnm_upside,
-                            'pv_fcf': pv_fcf_total / 1e12,
-                            'pv_terminal': pv_terminal_total / 1e12,
-                            'projected_fcf': [vnm_fcfe_2025, vnm_fcfe_2026, vnm_fcfe_2027],  # FCFE in trillions VND
-                            'years': [2025, 2026, 2027],
-                            'num_shares': vnm_num_shares,
-                            'total_ev': total_ev,
-                            'capm_return': capm_return,
-                            'detailed_breakdown': {
-                                'fcfe': [vnm_fcfe_2025, vnm_fcfe_2026, vnm_fcfe_2027],
-                                'pv_fcfe': [vnm_pv_fcfe_2025, vnm_pv_fcfe_2026, vnm_pv_fcfe_2027],
-                                'pv_terminal': vnm_pv_terminal,
-                                'terminal_value': vnm_terminal_value
-                            }
-                        }
-                    
-                    # Override HPG with actual valuation data
-                    elif ticker == "HPG":
-                        beta = 1.2  # Typical steel sector beta
-                        capm_return = 0.1178
-                        # DCF Valuation Data for HPG
-                        hpg_intrinsic_per_share = 33959.17  # VND per share
-                        hpg_current_price = 28000  # Current market price (VND) - approximate
-                        hpg_upside = ((hpg_intrinsic_per_share - hpg_current_price) / hpg_current_price) * 100
-                        hpg_num_shares = 7675465855
-                        
-                        # Detailed DCF breakdown for HPG
-                        hpg_fcfe_2025 = 20.724  # Trillion VND
-                        hpg_fcfe_2026 = 21.163  # Trillion VND (rounded)
-                        hpg_fcfe_2027 = 22.163  # Trillion VND (rounded)
-                        hpg_terminal_value = 288.738  # Trillion VND (rounded)
-                        
-                        hpg_pv_fcfe_2025 = 18.541  # Billion VND (rounded)
-                        hpg_pv_fcfe_2026 = 17.739  # Billion VND (rounded)
-                        hpg_pv_fcfe_2027 = 17.616  # Billion VND (rounded)
-                        hpg_pv_terminal = 206.757  # Billion VND (rounded)
-                        
-                        # Total enterprise value
-                        pv_fcf_total = (hpg_pv_fcfe_2025 + hpg_pv_fcfe_2026 + hpg_pv_fcfe_2027) * 1e9  # Sum of PV of projected FCFE (in VND)
-                        pv_terminal_total = hpg_pv_terminal * 1e9  # PV of terminal value (in VND)
-                        total_ev = pv_fcf_total + pv_terminal_total
-                        
-                        dcf_result = {
-                            'intrinsic_value': hpg_intrinsic_per_share / 1000,  # Convert to thousands for display
-                            'current_price': hpg_current_price / 1000,
-                            'upside_downside_pct': hpg_upside,
-                            'pv_fcf': pv_fcf_total / 1e12,
-                            'pv_terminal': pv_terminal_total / 1e12,
-                            'projected_fcf': [hpg_fcfe_2025, hpg_fcfe_2026, hpg_fcfe_2027],  # FCFE in trillions VND
-                            'years': [2025, 2026, 2027],
-                            'num_shares': hpg_num_shares,
-                            'total_ev': total_ev,
-                            'capm_return': capm_return,
-                            'detailed_breakdown': {
-                                'fcfe': [hpg_fcfe_2025, hpg_fcfe_2026, hpg_fcfe_2027],
-                                'pv_fcfe': [hpg_pv_fcfe_2025, hpg_pv_fcfe_2026, hpg_pv_fcfe_2027],
-                                'pv_terminal': hpg_pv_terminal,
-                                'terminal_value': hpg_terminal_value
+                with mc_col2:
+                    discount_sd = st.slider("Độ lệch chuẩn r_e (%)", 0.0, 3.0, 1.0, 0.25, key="dcf_discount_sd") / 100
+                with mc_col3:
+                    terminal_sd = st.slider("Độ lệch chuẩn g (%)", 0.0, 2.0, 0.5, 0.25, key="dcf_terminal_sd") / 100
+                with mc_col4:
+                    growth_sd = st.slider("Độ lệch chuẩn tăng trưởng FCFE (%)", 0.0, 10.0, 2.0, 0.5,
+                                          key="dcf_growth_sd") / 100
+                with mc_col5:
+                    dcf_method = st.selectbox(
+                        "Kỹ thuật giảm phương sai",
+                        options=list(VARIANCE_REDUCTION),
+                        format_func=VARIANCE_REDUCTION.get,
+                        key="dcf_variance_reduction"
+                    )
+
+                for stock in PORTFOLIO_HOLDINGS:
+                    ticker = stock['ticker']
+
+                    # Skip ACB - only show VNM, HPG, DBD
+                    if ticker not in fcfe_forecasts:
+                        continue
+
+                    fcfe = fcfe_forecasts[ticker]['fcfe']
+                    num_shares = fcfe_forecasts[ticker]['shares']
+                    capm_return = capm_table.loc[ticker, 'cost_of_equity']
+                    current_price = latest_close[ticker]
+
+                    # Trillion VND of equity -> kVNĐ per share
+                    per_share = 1e9 / num_shares
+
+                    valuation = fcfe_valuation(fcfe, capm_return, terminal_growth_rate)
+                    intrinsic_value = valuation['equity_value'] * per_share
+
+                    with st.expander(f"**{ticker}** - {stock['name']}", expanded=False):
+                        fig_dcf = go.Figure()
+                        fig_dcf.add_trace(go.Bar(x=forecast_years, y=list(fcfe), name='Projected FCFE',
+                                                 marker=dict(color=['#FF9800', '#4ECDC4', '#45B7D1']),
+                                                 text=[f'₫ {v:.3f}T' for v in fcfe],
+                                                 textposition='outside'))
+                        fig_dcf.update_layout(title=f"{ticker} - Projected Free Cash Flows to Equity ({len(fcfe)}-Year)",
+                                              xaxis_title="Year", yaxis_title="FCFE (Trillion VND)", height=400,
+                                              template='plotly', plot_bgcolor='#f5f5f5', paper_bgcolor='#f5f5f5')
+                        st.plotly_chart(fig_dcf, use_container_width=True)
+
+                        st.markdown("### 💰 Valuation Summary")
+
+                        # Key metrics prominent + supporting
+                        st.markdown('<p style="font-size:20px;"><strong>Primary Metrics</strong></p>', unsafe_allow_html=True)
+                        key_col1, key_col2 = st.columns(2)
+                        with key_col1:
+                            st.metric("💰 Current Price", f"{current_price:.2f}kVNĐ")
+                        with key_col2:
+                            st.metric("🎯 Intrinsic Value/Share", f"{intrinsic_value:,.2f}kVNĐ",
+                                      f"{(intrinsic_value / current_price - 1) * 100:+.1f}%")
+
+                        st.markdown('<p style="font-size:18px;"><strong>Supporting Metrics</strong></p>', unsafe_allow_html=True)
+
+                        st.markdown("""
+                        <style>
+                            [data-testid="stMetric"] {
+                                font-size: 0.75rem;
                             }
-                        }
-                    
-                    # Override DBD with actual valuation data
-                    elif ticker == "DBD":
-                        beta = 0.8  # Typical retail sector beta
-                        capm_return = 0.0502
-                        # DCF Valuation Data for DBD
-                        dbd_intrinsic_per_share = 67731.20  # VND per share
-                        dbd_current_price = 63000  # Current market price (VND) - approximate
-                        dbd_upside = ((dbd_intrinsic_per_share - dbd_current_price) / dbd_current_price) * 100
-                        dbd_num_shares = 93553762
-                        
-                        # Detailed DCF breakdown for DBD
-                        dbd_fcfe_2025 = 0.092850  # Trillion VND
-                        dbd_fcfe_2026 = 0.103082  # Trillion VND (rounded)
-                        dbd_fcfe_2027 = 0.137119  # Trillion VND (rounded)
-                        dbd_terminal_value = 6.992  # Trillion VND (rounded)
-                        
-                        dbd_pv_fcfe_2025 = 88.412  # Billion VND (rounded)
-                        dbd_pv_fcfe_2026 = 93.463  # Billion VND (rounded)
-                        dbd_pv_fcfe_2027 = 118.381  # Billion VND (rounded)
-                        dbd_pv_terminal = 6036.253  # Billion VND (rounded)
-                        
-                        # Total enterprise value
-                        pv_fcf_total = (dbd_pv_fcfe_2025 + dbd_pv_fcfe_2026 + dbd_pv_fcfe_2027) * 1e9  # Sum of PV of projected FCFE (in VND)
-                        pv_terminal_total = dbd_pv_terminal * 1e9  # PV of terminal value (in VND)
-                        total_ev = pv_fcf_total + pv_terminal_total
-                        
-                        dcf_result = {
-                            'intrinsic_value': dbd_intrinsic_per_share / 1000,  # Convert to thousands for display
-                            'current_price': dbd_current_price / 1000,
-                            'upside_downside_pct': dbd_upside,
-                            'pv_fcf': pv_fcf_total / 1e12,
-                            'pv_terminal': pv_terminal_total / 1e12,
-                            'projected_fcf': [dbd_fcfe_2025, dbd_fcfe_2026, dbd_fcfe_2027],  # FCFE in trillions VND
-                            'years': [2025, 2026, 2027],
-                            'num_shares': dbd_num_shares,
-                            'total_ev': total_ev,
-                            'capm_return': capm_return,
-                            'detailed_breakdown': {
-                                'fcfe': [dbd_fcfe_2025, dbd_fcfe_2026, dbd_fcfe_2027],
-                                'pv_fcfe': [dbd_pv_fcfe_2025, dbd_pv_fcfe_2026, dbd_pv_fcfe_2027],
-                                'pv_terminal': dbd_pv_terminal,
-                                'terminal_value': dbd_terminal_value
+                            [data-testid="stMetricLabel"] {
+                                font-size: 0.65rem;
                             }
-                        }
-                    
-                    with st.expander(f"**{ticker}** - {stock['name']}", expanded=False):
-                        try:
-                            if 'projected_fcf' in dcf_result and len(dcf_result['projected_fcf']) > 0:
-                                fig_dcf = go.Figure()
-                                fcf_list = dcf_result['projected_fcf']
-                                # Use actual years if available, otherwise use sequential numbers
-                                x_labels = dcf_result.get('years', list(range(1, len(fcf_list) + 1)))
-                                projection_label = f"{len(fcf_list)}-Year" if ticker == "VNM" else f"{len(fcf_list)}-Year"
-                                
-                                if ticker in ["VNM", "HPG", "DBD"]:
-                                    # VNM, HPG, and DBD use trillion VND, show in appropriate format
-                                    fig_dcf.add_trace(go.Bar(x=x_labels, y=fcf_list, name='Projected FCFE', 
-                                                            marker=dict(color=['#FF9800', '#4ECDC4', '#45B7D1']),
-                                                            text=[f'₫ {v:.3f}T' for v in fcf_list],
-                                                            textposition='outside'))
-                                    fig_dcf.update_layout(title=f"{ticker} - Projected Free Cash Flows to Equity ({projection_label})", 
-                                                         xaxis_title="Year", yaxis_title="FCFE (Trillion VND)", height=400, 
-                                                         template='plotly', plot_bgcolor='#f5f5f5', paper_bgcolor='#f5f5f5')
-                                else:
-                                    fig_dcf.add_trace(go.Bar(x=x_labels, y=fcf_list, name='Projected FCF', marker=dict(color='#0066cc')))
-                                    fig_dcf.update_layout(title=f"{ticker} - Projected Free Cash Flows ({projection_label})", xaxis_title="Year", yaxis_title="FCF (kVNĐ)", height=300, template='plotly_dark')
-                                
-                                st.plotly_chart(fig_dcf, use_container_width=True)
-                        except:
-                            pass
-                        
-                        # Methodology section
-                        
-                        # Summary metrics
-                        if ticker in ["HPG", "VNM", "DBD"] and 'detailed_breakdown' in dcf_result:
-                            st.markdown("### 💰 Valuation Summary")
-                            
-                            # Key metrics prominent + supporting
-                            st.markdown('<p style="font-size:20px;"><strong>Primary Metrics</strong></p>', unsafe_allow_html=True)
-                            key_col1, key_col2 = st.columns(2)
-                            with key_col1:
-                                st.metric("💰 Current Price", f"{dcf_result['current_price']:.2f}kVNĐ")
-                            with key_col2:
-                                st.metric("🎯 Intrinsic Value/Share", f"{dcf_result['intrinsic_value']:,.2f}kVNĐ")
-
-                            st.markdown('<p style="font-size:18px;"><strong>Supporting Metrics</strong></p>', unsafe_allow_html=True)
-
-                            st.markdown("""
-                            <style>
-                                [data-testid="stMetric"] {
-                                    font-size: 0.75rem;
-                                }
-                                [data-testid="stMetricLabel"] {
-                                    font-size: 0.65rem;
-                                }
-                            </style>
-                            """, unsafe_allow_html=True)
-                            sup_col1, sup_col2, sup_col3, sup_col4, sup_col5 = st.columns(5)
-                            with sup_col1:
-                                st.metric("Enterprise Value", f"{dcf_result['total_ev']/1e12:,.2f}T đ")
-                            with sup_col2:
-                                st.metric("Shares", f"{dcf_result['num_shares']:,}")
-                            with sup_col3:
-                                st.metric("Cost of Equity", f"{dcf_result['capm_return']*100:.2f}%")
-                            with sup_col4:
-                                st.metric("Growth Rate", "3%")
-                            with sup_col5:
-                                st.metric("Terminal Value", "288.738 Tr đ")
-                        
-        
-        except Exception as e:
-            st.warning(f"Unable to complete CAPM and DCF analysis: {str(e)}")
-    else:
-        st.info("Data not available. CAPM and DCF analysis requires portfolio data.")
+                        </style>
+                        """, unsafe_allow_html=True)
+                        sup_col1, sup_col2, sup_col3, sup_col4, sup_col5 = st.columns(5)
+                        with sup_col1:
+                            st.metric("Equity Value", f"{valuation['equity_value']:,.2f}T đ")
+                        with sup_col2:
+                            st.metric("Shares", f"{num_shares:,}")
+                        with sup_col3:
+                            st.metric("Cost of Equity", f"{capm_return*100:.2f}%")
+                        with sup_col4:
+                            st.metric("Growth Rate", f"{terminal_growth_rate*100:.0f}%")
+                        with sup_col5:
+                            st.metric("Terminal Value", f"{valuation['terminal_value']:,.3f}T đ")
+
+                        # Sensitivity heatmap, read from a grid cached for every growth shift
+                        st.markdown("### 🔥 Sensitivity")
+                        discount_axis = np.linspace(max(capm_return - 0.04, 0.01), capm_return + 0.04, 200)
+                        grid = cached_valuation_grid(fcfe, discount_axis, terminal_axis, growth_shifts) * per_share
+
+                        shift = st.select_slider(
+                            "Điều chỉnh tăng trưởng FCFE mỗi năm",
+                            options=list(growth_shifts),
+                            value=0.0,
+                            format_func=lambda s: f"{s*100:+.0f}%",
+                            key=f"dcf_growth_shift_{ticker}"
+                        )
+                        fig_grid = go.Figure(go.Heatmap(
+                            z=grid[list(growth_shifts).index(shift)],
+                            x=terminal_axis * 100,
+                            y=discount_axis * 100,
+                            zmid=current_price,
+                            colorscale='RdYlGn',
+                            colorbar=dict(title="kVNĐ"),
+                            hovertemplate="g = %{x:.2f}%<br>r<sub>e</sub> = %{y:.2f}%<br>Giá trị = %{z:,.2f}kVNĐ<extra></extra>"
+                        ))
+                        fig_grid.add_trace(go.Scatter(x=[terminal_growth_rate * 100], y=[capm_return * 100], mode='markers',
+                                                      marker=dict(symbol='x', size=12, color='black'), name='Base case'))
+                        fig_grid.update_layout(title=f"{ticker} - Intrinsic Value/Share theo r_e và g (xanh: cao hơn giá hiện tại)",
+                                               xaxis_title="Terminal growth g (%)", yaxis_title="Cost of equity r_e (%)",
+                                               height=450, template='plotly', showlegend=False)
+                        st.plotly_chart(fig_grid, use_container_width=True)
+
+                        # Monte Carlo valuation, shared across sessions through the simulation cache
+                        st.markdown("### 🎲 Monte Carlo Valuation")
+                        mc_model = (f'dcf/{ticker}/{fcfe}/{capm_return:.6f}/{terminal_growth_rate}/'
+                                    f'{discount_sd}/{terminal_sd}/{growth_sd}/{dcf_method}')
+                        equity_values = get_simulation_cache().get_or_compute(
+                            simulation_key(dcf_draws, len(fcfe), 42, mc_model),
+                            lambda: {'equity_value': simulate_valuation(fcfe, capm_return, terminal_growth_rate,
+                                                                        discount_sd, terminal_sd, growth_sd,
+                                                                        dcf_draws, seed=42, method=dcf_method)}
+                        )['equity_value']
+                        values = equity_values[~np.isnan(equity_values)] * per_share
+
+                        p5, p50, p95 = np.percentile(values, [5, 50, 95])
+                        median_se = percentile_standard_error(values, 50)
+                        mc_col1, mc_col2, mc_col3, mc_col4 = st.columns(4)
+                        with mc_col1:
+                            st.metric("P5", f"{p5:,.2f}kVNĐ")
+                        with mc_col2:
+                            st.metric("Trung vị", f"{p50:,.2f}kVNĐ")
+                        with mc_col3:
+                            st.metric("P95", f"{p95:,.2f}kVNĐ")
+                        with mc_col4:
+                            st.metric("P(giá trị > giá hiện tại)", f"{(values > current_price).mean()*100:.1f}%")
+
+                        # Histogram binned here, so the chart carries 100 bars instead of every draw
+                        counts, edges = np.histogram(values, bins=100, range=tuple(np.percentile(values, [0.5, 99.5])))
+                        fig_mc = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts / len(values) * 100,
+                                                  marker_color='#45B7D1', name='Intrinsic value'))
+                        fig_mc.add_vline(x=current_price, line_dash='dash', line_color='red',
+                                         annotation_text=f"Giá hiện tại {current_price:.2f}")
+                        fig_mc.add_vline(x=intrinsic_value, line_dash='dot', line_color='black',
+                                         annotation_text=f"Base case {intrinsic_value:.2f}")
+                        fig_mc.update_layout(title=f"{ticker} - Phân phối Intrinsic Value/Share ({dcf_draws:,} kịch bản)",
+                                             xaxis_title="Intrinsic value (kVNĐ)", yaxis_title="Tần suất (%)",
+                                             bargap=0, height=400, template='plotly', showlegend=False)
+                        st.plotly_chart(fig_mc, use_container_width=True)
+                        st.caption(f"Sai số chuẩn của trung vị: ±{median_se:.2f}kVNĐ · "
+                                   f"{len(equity_values) - len(values):,} kịch bản có r_e - g < {MIN_SPREAD:.1%} bị loại")
+
+            except Exception as e:
+                st.warning(f"Unable to complete CAPM and DCF analysis: {str(e)}")
+        else:
+            st.info("Data not available. CAPM and DCF analysis requires portfolio data.")
+
+    show_dcf_valuation()
     
     st.markdown("")
     
@@ -2854,251 +2988,256 @@ Trong khi đó, Parametric và Monte Carlo cho kết quả khá tương đồng,
     </div>
     ''', unsafe_allow_html=True)
 
-    try:
-        # Load price data silently
-        price_df = pd.read_csv('attached_assets/price.csv')
-        price_df['time'] = pd.to_datetime(price_df['time'])
-        prices = price_df[['ACB', 'HPG', 'VNM', 'DBD']].dropna()
-        
-        stocks = ['ACB', 'HPG', 'VNM', 'DBD']
-        n_assets = len(stocks)
-        
-        # User inputs for GBM parameters
-        st.markdown("#### ⚙️ Chọn số ngày dự báo và số kịch bản")
-        col_params1, col_params2 = st.columns(2)
-        
-        with col_params1:
-            n_sims = st.slider(
-                "Số lượng kịch bản",
-                min_value=100,
-                max_value=5000,
-                value=1000,
-                step=100,
-                help="Higher number = more accurate but slower"
-            )
-        
-        with col_params2:
-            forecast_days = st.slider(
-                "Số ngày dự báo",
-                min_value=30,
-                max_value=756,
-                value=252,
-                step=21,
-                help="30=1 month, 63=3 months, 252=1 year, 756=3 years"
-            )
-        
-        # Run simulation silently without printing steps
-        returns = np.log(prices / prices.shift(1)).dropna()
-        mu = returns.mean() * 252
-        sigma = returns.std() * np.sqrt(252)
-        corr = returns.corr()
-        L = np.linalg.cholesky(corr)
-        
-        T = forecast_days / 252
-        N = forecast_days
-        dt = T / N
-        
-        S0 = prices.iloc[-1].values
-        all_paths = np.zeros((n_sims, N + 1, n_assets))
-        
-        np.random.seed(42)
-        
-        # Silent progress during simulation
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+    @st.fragment
+    def show_gbm_forecast():
+        """GBM price forecast for the selected horizon and number of scenarios"""
+        try:
+            # Load price data silently
+            prices = load_prices()[['ACB', 'HPG', 'VNM', 'DBD']].dropna()
+        
+            stocks = ['ACB', 'HPG', 'VNM', 'DBD']
+            n_assets = len(stocks)
+        
+            # User inputs for GBM parameters
+            st.markdown("#### ⚙️ Chọn số ngày dự báo và số kịch bản")
+            col_params1, col_params2, col_params3 = st.columns(3)
+        
+            with col_params1:
+                n_sims = st.slider(
+                    "Số lượng kịch bản",
+                    min_value=100,
+                    max_value=5000,
+                    value=1000,
+                    step=100,
+                    help="Higher number = more accurate but slower"
+                )
         
-        all_paths[:, 0, :] = S0
-        mu_arr = mu.values
-        sigma_arr = sigma.values
+            with col_params2:
+                forecast_days = st.slider(
+                    "Số ngày dự báo",
+                    min_value=30,
+                    max_value=756,
+                    value=252,
+                    step=21,
+                    help="30=1 month, 63=3 months, 252=1 year, 756=3 years"
+                )
         
-        for t in range(1, N + 1):
-            if t % max(1, N // 10) == 0:
-                progress_bar.progress(t / N)
-                status_text.text(f"Tạo kịch bản... {t}/{N}")
-            
-            z = np.random.normal(size=(n_sims, n_assets))
-            eps = z @ L.T
-            drift = (mu_arr - 0.5 * sigma_arr**2) * dt
-            diffusion = sigma_arr * eps * np.sqrt(dt)
-            all_paths[:, t, :] = all_paths[:, t-1, :] * np.exp(drift + diffusion)
+            with col_params3:
+                gbm_method = st.selectbox(
+                    "Kỹ thuật giảm phương sai",
+                    options=list(VARIANCE_REDUCTION),
+                    format_func=VARIANCE_REDUCTION.get,
+                    key="gbm_variance_reduction",
+                    help="Sobol và Moment matching cho percentile chính xác hơn với cùng số kịch bản"
+                )
         
-        progress_bar.progress(1.0)
-        status_text.text(f"Kết quả của {n_sims} kịch bản cho dự báo {forecast_days} ngày tới.")
-        st.empty()
+            # Run simulation silently without printing steps
+            returns = np.log(prices / prices.shift(1)).dropna()
+            mu = returns.mean() * 252
+            sigma = returns.std() * np.sqrt(252)
+            corr = returns.corr()
+        
+            N = forecast_days
+            S0 = prices.iloc[-1].values
+        
+            # Progress per block of simulated days (a cached result skips straight to done)
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            status_text.text(f"Tạo kịch bản... 0/{N}")
+        
+            def report_progress(done, total):
+                progress_bar.progress(done / total)
+                status_text.text(f"Tạo kịch bản... {done}/{total}")
+        
+            # Stream the paths: keep per-day percentiles, 30 sample paths and terminal prices only.
+            # Results are shared across sessions per (data, n_sims, horizon, seed, model)
+            gbm_summary = get_simulation_cache().get_or_compute(
+                simulation_key(n_sims, N, 42, f'gbm-summary/{gbm_method}'),
+                lambda: simulate_gbm_summary(S0, mu, sigma, corr, N, n_sims, percentiles=(10, 50, 90),
+                                             n_sample_paths=30, seed=42, method=gbm_method,
+                                             progress=report_progress))
+            terminal_prices = gbm_summary['terminal']
+        
+            progress_bar.progress(1.0)
+            status_text.text(f"Kết quả của {n_sims} kịch bản cho dự báo {forecast_days} ngày tới.")
+            st.empty()
         
-        st.markdown("")
+            st.markdown("")
         
-        # Create tabs for each stock
-        st.markdown(f"#### 📊 1. Giá dự báo ({forecast_days} ngày sau)")
-        st.markdown("**Nhấn vào từng tab để xem từng mã chứng khoán**")
+            # Create tabs for each stock
+            st.markdown(f"#### 📊 1. Giá dự báo ({forecast_days} ngày sau)")
+            st.markdown("**Nhấn vào từng tab để xem từng mã chứng khoán**")
         
-        tabs = st.tabs([f"📈 {stock}" for stock in stocks])
+            tabs = st.tabs([f"📈 {stock}" for stock in stocks])
         
-        for tab_idx, (tab, stock) in enumerate(zip(tabs, stocks)):
-            with tab:
-                idx = tab_idx
+            for tab_idx, (tab, stock) in enumerate(zip(tabs, stocks)):
+                with tab:
+                    idx = tab_idx
+                
+                    final_prices = terminal_prices[:, idx]
+                    final_return = ((final_prices - S0[idx]) / S0[idx]) * 100
                 
-                final_prices = all_paths[:, -1, idx]
-                final_return = ((final_prices - S0[idx]) / S0[idx]) * 100
+                    median_price = np.percentile(final_prices, 50)
+                    p10_price = np.percentile(final_prices, 10)
+                    p90_price = np.percentile(final_prices, 90)
+                    median_return = np.percentile(final_return, 50)
                 
-                median_price = np.percentile(final_prices, 50)
-                p10_price = np.percentile(final_prices, 10)
-                p90_price = np.percentile(final_prices, 90)
-                median_return = np.percentile(final_return, 50)
+                    # Display metrics in tab
+                    metric_cols = st.columns(3)
+                    with metric_cols[0]:
+                        st.metric("Current Price", f"{S0[idx]:.2f}kVNĐ")
+                    with metric_cols[1]:
+                        st.metric("Median Forecast", f"{median_price:.2f}kVNĐ", f"{median_return:+.1f}%")
+                    with metric_cols[2]:
+                        st.metric("Price Range", f"{p10_price:.1f} - {p90_price:.1f}kVNĐ")
                 
-                # Display metrics in tab
-                metric_cols = st.columns(3)
-                with metric_cols[0]:
-                    st.metric("Current Price", f"{S0[idx]:.2f}kVNĐ")
-                with metric_cols[1]:
-                    st.metric("Median Forecast", f"{median_price:.2f}kVNĐ", f"{median_return:+.1f}%")
-                with metric_cols[2]:
-                    st.metric("Price Range", f"{p10_price:.1f} - {p90_price:.1f}kVNĐ")
+                    se_p10, se_p50, se_p90 = gbm_summary['terminal_se'][:, idx]
+                    st.caption(f"Sai số chuẩn Monte Carlo — P10: ±{se_p10:.2f} · Median: ±{se_p50:.2f} · P90: ±{se_p90:.2f} kVNĐ")
                 
                 
-                # Chart for this stock
-                fig_stock = go.Figure()
+                    # Chart for this stock
+                    fig_stock = go.Figure()
                 
-                # Display up to 30 sample paths from total simulations
-                sample_paths = min(30, n_sims)
-                for sim_id in range(sample_paths):
-                    path_data = all_paths[sim_id, :, idx]
+                    # Up to 30 sample paths as one WebGL trace, broken apart by NaN separators
+                    path_x, path_y = path_polyline(gbm_summary['sample_paths'][:, :, idx])
                     fig_stock.add_trace(
-                        go.Scatter(y=path_data,
-                                  mode='lines',
-                                  name='',
-                                  line=dict(width=1, color='rgba(100, 150, 200, 0.3)'),
-                                  showlegend=False,
-                                  hoverinfo='skip'))
+                        go.Scattergl(x=path_x, y=path_y,
+                                    mode='lines',
+                                    name='',
+                                    line=dict(width=1, color='rgba(100, 150, 200, 0.3)'),
+                                    showlegend=False,
+                                    hoverinfo='skip'))
                 
-                # Add percentile lines
-                p10 = np.percentile(all_paths[:, :, idx], 10, axis=0)
-                p50 = np.percentile(all_paths[:, :, idx], 50, axis=0)
-                p90 = np.percentile(all_paths[:, :, idx], 90, axis=0)
+                    # 10th-90th percentile band (the 10th percentile fills up to the 90th) and the median
+                    days = np.arange(gbm_summary['percentiles'].shape[1], dtype=np.float32)
+                    p10, p50, p90 = gbm_summary['percentiles'][:, :, idx].astype(np.float32)
                 
-                fig_stock.add_trace(
-                    go.Scatter(y=p10, mode='lines', name='10th Percentile',
-                              line=dict(color='#FF9800', width=1.5, dash='dash'),
-                              hovertemplate='10th Percentile<br>Day: %{x}<br>Price: %{y:.2f}kVNĐ<extra></extra>'))
-                fig_stock.add_trace(
-                    go.Scatter(y=p50, mode='lines', name='Median',
-                              line=dict(color='#00D9FF', width=2.5),
-                              hovertemplate='Median<br>Day: %{x}<br>Price: %{y:.2f}kVNĐ<extra></extra>'))
-                fig_stock.add_trace(
-                    go.Scatter(y=p90, mode='lines', name='90th Percentile',
-                              line=dict(color='#FF6B6B', width=1.5, dash='dash'),
-                              hovertemplate='90th Percentile<br>Day: %{x}<br>Price: %{y:.2f}kVNĐ<extra></extra>'))
+                    fig_stock.add_trace(
+                        go.Scattergl(x=days, y=p90, mode='lines', name='90th Percentile',
+                                    line=dict(color='#FF6B6B', width=1.5, dash='dash'),
+                                    hovertemplate='90th Percentile<br>Day: %{x}<br>Price: %{y:.2f}kVNĐ<extra></extra>'))
+                    fig_stock.add_trace(
+                        go.Scattergl(x=days, y=p10, mode='lines', name='10th Percentile',
+                                    line=dict(color='#FF9800', width=1.5, dash='dash'),
+                                    fill='tonexty', fillcolor='rgba(255, 152, 0, 0.12)',
+                                    hovertemplate='10th Percentile<br>Day: %{x}<br>Price: %{y:.2f}kVNĐ<extra></extra>'))
+                    fig_stock.add_trace(
+                        go.Scattergl(x=days, y=p50, mode='lines', name='Median',
+                                    line=dict(color='#00D9FF', width=2.5),
+                                    hovertemplate='Median<br>Day: %{x}<br>Price: %{y:.2f}kVNĐ<extra></extra>'))
                 
-                fig_stock.update_layout(
-                    title=f'{stock} - Kết quả dự báo của {n_sims} kịch bản',
-                    xaxis_title='Số ngày giao dịch',
-                    yaxis_title='Giá chứng khoán (nghìn VND)',
-                    height=450,
-                    template='plotly',
-                    plot_bgcolor='#f5f5f5',
-                    paper_bgcolor='#f5f5f5',
-                    hovermode='x unified',
-                    legend=dict(x=0.02, y=0.98, bgcolor='rgba(255,255,255,0.95)', font=dict(size=10)),
-                    xaxis=dict(gridcolor='#eee'),
-                    yaxis=dict(gridcolor='#eee'),
-                    margin=dict(l=50, r=30, t=40, b=40)
-                )
+                    fig_stock.update_layout(
+                        title=f'{stock} - Kết quả dự báo của {n_sims} kịch bản',
+                        xaxis_title='Số ngày giao dịch',
+                        yaxis_title='Giá chứng khoán (nghìn VND)',
+                        height=450,
+                        template='plotly',
+                        plot_bgcolor='#f5f5f5',
+                        paper_bgcolor='#f5f5f5',
+                        hovermode='x unified',
+                        legend=dict(x=0.02, y=0.98, bgcolor='rgba(255,255,255,0.95)', font=dict(size=10)),
+                        xaxis=dict(gridcolor='#eee'),
+                        yaxis=dict(gridcolor='#eee'),
+                        margin=dict(l=50, r=30, t=40, b=40)
+                    )
                 
-                st.plotly_chart(fig_stock, use_container_width=True)
+                    st.plotly_chart(fig_stock, use_container_width=True)
         
-        st.markdown("")
-        st.divider()
-        st.markdown("")
+            st.markdown("")
+            st.divider()
+            st.markdown("")
         
-        # ============================================================================
-        # PORTFOLIO RETURN CALCULATION WITH MIN VARIANCE WEIGHTS
-        # ============================================================================
-        st.markdown("#### 📈 2. Portfolio Return Analysis")
+            # ============================================================================
+            # PORTFOLIO RETURN CALCULATION WITH MIN VARIANCE WEIGHTS
+            # ============================================================================
+            st.markdown("#### 📈 2. Portfolio Return Analysis")
         
-        try:
-            # Calculate minimum variance portfolio weights
-            cov_matrix = returns.cov()
-            n_stocks = len(stocks)
+            try:
+                # Calculate minimum variance portfolio weights
+                cov_matrix = returns.cov()
+                n_stocks = len(stocks)
             
-            # Solve for minimum variance portfolio: w = Σ^-1 * 1 / (1^T * Σ^-1 * 1)
-            inv_cov = np.linalg.inv(cov_matrix)
-            ones = np.ones(n_stocks)
-            min_var_weights = inv_cov @ ones / (ones @ inv_cov @ ones)
+                # Solve for minimum variance portfolio: w = Σ^-1 * 1 / (1^T * Σ^-1 * 1)
+                inv_cov = np.linalg.inv(cov_matrix)
+                ones = np.ones(n_stocks)
+                min_var_weights = inv_cov @ ones / (ones @ inv_cov @ ones)
             
-            # Normalize weights to ensure they sum to 1
-            min_var_weights = min_var_weights / min_var_weights.sum()
+                # Normalize weights to ensure they sum to 1
+                min_var_weights = min_var_weights / min_var_weights.sum()
             
-            # Calculate individual stock returns at forecast end
-            stock_final_prices = all_paths[:, -1, :]  # Shape: (n_sims, n_assets)
-            stock_returns = (stock_final_prices - S0) / S0  # Shape: (n_sims, n_assets)
+                # Calculate individual stock returns at forecast end
+                stock_final_prices = terminal_prices  # Shape: (n_sims, n_assets)
+                stock_returns = (stock_final_prices - S0) / S0  # Shape: (n_sims, n_assets)
             
-            # Calculate portfolio return using min variance weights
-            portfolio_returns = stock_returns @ min_var_weights  # Shape: (n_sims,)
+                # Calculate portfolio return using min variance weights
+                portfolio_returns = stock_returns @ min_var_weights  # Shape: (n_sims,)
             
-            # Calculate statistics
+                # Calculate statistics
             
-            # Individual stock return statistics
-            st.markdown(f"**Individual Stock Returns at Day {forecast_days}:**")
+                # Individual stock return statistics
+                st.markdown(f"**Individual Stock Returns at Day {forecast_days}:**")
             
-            individual_cols = st.columns(4)
-            for idx, stock in enumerate(stocks):
-                with individual_cols[idx]:
-                    stock_ret_median = np.percentile(stock_returns[:, idx], 50) * 100
-                    stock_ret_p10 = np.percentile(stock_returns[:, idx], 10) * 100
-                    stock_ret_p90 = np.percentile(stock_returns[:, idx], 90) * 100
+                individual_cols = st.columns(4)
+                for idx, stock in enumerate(stocks):
+                    with individual_cols[idx]:
+                        stock_ret_median = np.percentile(stock_returns[:, idx], 50) * 100
+                        stock_ret_p10 = np.percentile(stock_returns[:, idx], 10) * 100
+                        stock_ret_p90 = np.percentile(stock_returns[:, idx], 90) * 100
                     
-                    st.metric(
-                        f"{stock} Return",
-                        f"{stock_ret_median:+.2f}%",
-                        f"Range: {stock_ret_p10:+.1f}% to {stock_ret_p90:+.1f}%"
-                    )
+                        st.metric(
+                            f"{stock} Return",
+                            f"{stock_ret_median:+.2f}%",
+                            f"Range: {stock_ret_p10:+.1f}% to {stock_ret_p90:+.1f}%"
+                        )
             
-            st.markdown("")
+                st.markdown("")
             
-            # Portfolio return statistics
-            st.markdown(f"**Portfolio Return at Day {forecast_days}:**")
+                # Portfolio return statistics
+                st.markdown(f"**Portfolio Return at Day {forecast_days}:**")
             
-            portfolio_return_median = np.percentile(portfolio_returns, 50) * 100
-            portfolio_return_p10 = np.percentile(portfolio_returns, 10) * 100
-            portfolio_return_p90 = np.percentile(portfolio_returns, 90) * 100
-            portfolio_return_mean = np.mean(portfolio_returns) * 100
-            portfolio_return_std = np.std(portfolio_returns) * 100
+                portfolio_return_median = np.percentile(portfolio_returns, 50) * 100
+                portfolio_return_p10 = np.percentile(portfolio_returns, 10) * 100
+                portfolio_return_p90 = np.percentile(portfolio_returns, 90) * 100
+                portfolio_return_mean = np.mean(portfolio_returns) * 100
+                portfolio_return_std = np.std(portfolio_returns) * 100
             
-            portfolio_cols = st.columns(5)
-            with portfolio_cols[0]:
-                st.metric(
-                    "Median Return",
-                    f"{portfolio_return_median:+.2f}%"
-                )
-            with portfolio_cols[1]:
-                st.metric(
-                    "Mean Return",
-                    f"{portfolio_return_mean:+.2f}%"
-                )
-            with portfolio_cols[2]:
-                st.metric(
-                    "Std Dev",
-                    f"{portfolio_return_std:.2f}%"
-                )
-            with portfolio_cols[3]:
-                st.metric(
-                    "10th Percentile",
-                    f"{portfolio_return_p10:+.2f}%"
-                )
-            with portfolio_cols[4]:
-                st.metric(
-                    "90th Percentile",
-                    f"{portfolio_return_p90:+.2f}%"
-                )
+                portfolio_cols = st.columns(5)
+                with portfolio_cols[0]:
+                    st.metric(
+                        "Median Return",
+                        f"{portfolio_return_median:+.2f}%"
+                    )
+                with portfolio_cols[1]:
+                    st.metric(
+                        "Mean Return",
+                        f"{portfolio_return_mean:+.2f}%"
+                    )
+                with portfolio_cols[2]:
+                    st.metric(
+                        "Std Dev",
+                        f"{portfolio_return_std:.2f}%"
+                    )
+                with portfolio_cols[3]:
+                    st.metric(
+                        "10th Percentile",
+                        f"{portfolio_return_p10:+.2f}%"
+                    )
+                with portfolio_cols[4]:
+                    st.metric(
+                        "90th Percentile",
+                        f"{portfolio_return_p90:+.2f}%"
+                    )
             
-            st.markdown("")
+                st.markdown("")
             
             
-        except Exception as e:
-            st.error(f"Error calculating portfolio returns: {e}")
+            except Exception as e:
+                st.error(f"Error calculating portfolio returns: {e}")
             
-    except Exception as e:
-        st.error(f"Error in GBM forecast: {e}")
+        except Exception as e:
+            st.error(f"Error in GBM forecast: {e}")
+
+    show_gbm_forecast()
 
     # GBM interpretation box
     st.markdown("""
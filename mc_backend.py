@@ -0,0 +1,172 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.stats import norm, qmc
+
+# Scenarios per RNG stream. Fixed, so a seed gives the same draws for any worker count.
+# A power of two keeps Sobol blocks balanced; each block is also one replicate for standard errors
+SCENARIO_BLOCK = 256
+
+# Variance-reduction methods for normal draws -> label shown in the app
+VARIANCE_REDUCTION = {
+    'standard': 'Monte Carlo chuẩn',
+    'antithetic': 'Antithetic variates',
+    'sobol': 'Sobol (quasi-random)',
+    'moment_matching': 'Moment matching',
+}
+
+
+def default_workers():
+    """Worker threads used when none are requested: one per available core"""
+    return os.cpu_count() or 1
+
+
+class ScenarioStreams:
+    """Independent random streams over fixed blocks of scenarios.
+
+    Scenarios are cut into blocks of ``block_size`` and every block gets its own
+    ``Generator`` spawned from one ``SeedSequence``. Because the partition does not depend
+    on the number of workers, results are bit-identical for a given seed whether the
+    blocks run on one thread or many. NumPy releases the GIL while drawing, multiplying
+    and exponentiating, so blocks scale across cores on a thread pool.
+    """
+
+    def __init__(self, n_sims, seed=42, block_size=SCENARIO_BLOCK, workers=None):
+        self.n_sims = n_sims
+        self.blocks = [(lo, min(lo + block_size, n_sims)) for lo in range(0, n_sims, block_size)]
+        self.generators = [np.random.default_rng(child)
+                           for child in np.random.SeedSequence(seed).spawn(len(self.blocks))]
+        self.workers = min(workers or default_workers(), len(self.blocks))
+
+    def map(self, func):
+        """Call ``func(rng, lo, hi)`` once per block and return the results in block order"""
+        tasks = [(rng, lo, hi) for rng, (lo, hi) in zip(self.generators, self.blocks)]
+        if self.workers <= 1:
+            return [func(*task) for task in tasks]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(lambda task: func(*task), tasks))
+
+
+def standard_normals(rng, n_steps, n, dim, method='standard'):
+    """Standard normal draws of shape (n_steps, n, dim) for ``n`` scenarios of one block.
+
+    ``antithetic`` pairs every draw with its negation, ``moment_matching`` rescales each
+    (step, dim) column to sample mean 0 and standard deviation 1, and ``sobol`` maps a
+    scrambled Sobol' sequence of dimension n_steps * dim through the normal quantile.
+    Except for ``sobol``, draws are made step by step, so drawing steps in several calls
+    gives the same numbers as drawing them at once.
+    """
+    if method == 'standard':
+        return rng.standard_normal((n_steps, n, dim))
+
+    if method == 'antithetic':
+        half = rng.standard_normal((n_steps, (n + 1) // 2, dim))
+        return np.concatenate([half, -half], axis=1)[:, :n]
+
+    if method == 'moment_matching':
+        z = rng.standard_normal((n_steps, n, dim))
+        if n < 2:
+            return z
+        z -= z.mean(axis=1, keepdims=True)
+        z /= z.std(axis=1, keepdims=True)
+        return z
+
+    if method == 'sobol':
+        sobol = qmc.Sobol(d=n_steps * dim, scramble=True, seed=rng)
+        points = sobol.random_base2(int(np.ceil(np.log2(max(n, 1)))))[:n]
+        z = norm.ppf(np.clip(points, 1e-12, 1 - 1e-12))
+        return z.reshape(n, n_steps, dim).transpose(1, 0, 2)
+
+    raise ValueError(f"Unknown variance-reduction method: {method}")
+
+
+def brownian_bridge(z, times):
+    """Brownian motion at ``times`` (K,) built from normals ``z`` (K, n, dim) in bridge order.
+
+    ``z[0]`` sets the value at the last time and later draws fill midpoints breadth first,
+    so the leading (best distributed) dimensions of a Sobol' sequence drive the coarse
+    shape of the path and the terminal value.
+    """
+    t = np.concatenate([[0.0], np.asarray(times, dtype=float)])
+    K = len(times)
+    W = np.zeros((K + 1,) + z.shape[1:])
+    W[K] = np.sqrt(t[K]) * z[0]
+
+    queue, k = [(0, K)], 1
+    while queue:
+        left, right = queue.pop(0)
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        weight = (t[mid] - t[left]) / (t[right] - t[left])
+        std = np.sqrt((t[mid] - t[left]) * (t[right] - t[mid]) / (t[right] - t[left]))
+        W[mid] = W[left] + weight * (W[right] - W[left]) + std * z[k]
+        k += 1
+        queue += [(left, mid), (mid, right)]
+
+    return W[1:]
+
+
+def batch_standard_error(values, statistic, block_size=SCENARIO_BLOCK):
+    """Standard error of ``statistic`` from its spread across the independent scenario blocks.
+
+    Each block is an independent replicate (for Sobol an independent scrambling), so the
+    batch-means estimate stays valid under every variance-reduction method. ``statistic``
+    maps the scenarios of one block (along axis 0) to an estimate; NaN with fewer than two
+    full blocks.
+    """
+    values = np.asarray(values)
+    n_blocks = len(values) // block_size
+    if n_blocks < 2:
+        return np.full(np.shape(statistic(values)), np.nan)
+
+    estimates = np.array([statistic(values[i * block_size:(i + 1) * block_size]) for i in range(n_blocks)])
+    return estimates.std(axis=0, ddof=1) / np.sqrt(n_blocks)
+
+
+def percentile_standard_error(values, percentiles, block_size=SCENARIO_BLOCK):
+    """Standard error of ``np.percentile(values, percentiles, axis=0)``.
+
+    Block-level percentiles understate the error of stratified (Sobol') samples, so the
+    error of the empirical CDF at the pooled percentile is estimated across blocks and
+    divided by the density there, taken from a difference of nearby pooled percentiles.
+    """
+    values = np.asarray(values)
+    p = np.atleast_1d(np.asarray(percentiles, dtype=float)) / 100
+    quantiles = np.percentile(values, p * 100, axis=0)
+
+    expand = (slice(None),) + (None,) * (values.ndim - 1)
+    cdf_se = batch_standard_error(values, lambda block: (block[None] <= quantiles[:, None]).mean(axis=1), block_size)
+
+    h = np.minimum(0.5 * len(values) ** (-1 / 3), np.minimum(p, 1 - p) / 2)
+    spread = (np.percentile(values, (p + h) * 100, axis=0) - np.percentile(values, (p - h) * 100, axis=0))
+    se = cdf_se * spread / (2 * h[expand])
+    return se if np.ndim(percentiles) else se[0]
+
+
+def simulate_normal_returns(mean, std, n_sims, seed=42, method='standard', workers=None):
+    """Draw ``n_sims`` normal returns (e.g. Monte Carlo VaR scenarios) on independent streams"""
+    streams = ScenarioStreams(n_sims, seed=seed, workers=workers)
+    out = np.empty(n_sims)
+
+    def fill(rng, lo, hi):
+        out[lo:hi] = mean + std * standard_normals(rng, 1, hi - lo, 1, method)[0, :, 0]
+
+    streams.map(fill)
+    return out
+
+
+def simulate_normal_scenarios(mean, cov, n_sims, seed=42, method='standard', workers=None):
+    """Draw ``n_sims`` multivariate normal return vectors, shape (n_sims, assets), on independent streams"""
+    mean = np.asarray(mean, dtype=float)
+    L = np.linalg.cholesky(np.asarray(cov, dtype=float))
+    streams = ScenarioStreams(n_sims, seed=seed, workers=workers)
+    out = np.empty((n_sims, len(mean)))
+
+    def fill(rng, lo, hi):
+        out[lo:hi] = mean + standard_normals(rng, 1, hi - lo, len(mean), method)[0] @ L.T
+
+    streams.map(fill)
+    return out
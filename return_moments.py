@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import data_fingerprint, load_returns
+
+
+class ReturnMoments:
+    """Prefix sums of returns and their outer products for O(assets²) window queries.
+
+    Sums are taken over returns centred on the full-sample mean, which keeps the
+    ``S2 - S1 S1' / n`` covariance update well conditioned for short windows.
+    """
+
+    def __init__(self, returns):
+        returns = returns.dropna()
+        values = returns.to_numpy(dtype=float)
+
+        self.index = returns.index
+        self.columns = returns.columns
+        self._center = values.mean(axis=0) if len(values) else np.zeros(values.shape[1])
+
+        centered = values - self._center
+        n_obs, n_assets = centered.shape
+        self._sum = np.zeros((n_obs + 1, n_assets))
+        self._sum[1:] = np.cumsum(centered, axis=0)
+        self._outer = np.zeros((n_obs + 1, n_assets, n_assets))
+        self._outer[1:] = np.cumsum(centered[:, :, None] * centered[:, None, :], axis=0)
+
+    def positions(self, start, end):
+        """Half-open row range [lo, hi) of trading days between start and end, inclusive"""
+        lo = self.index.searchsorted(pd.Timestamp(start), side='left')
+        hi = self.index.searchsorted(pd.Timestamp(end), side='right')
+        return lo, hi
+
+    def window(self, start, end):
+        """Sample mean and covariance (ddof=1) of returns between two dates"""
+        lo, hi = self.positions(start, end)
+        n_obs = hi - lo
+        if n_obs < 2:
+            raise ValueError("Window must contain at least two trading days")
+
+        s1 = self._sum[hi] - self._sum[lo]
+        s2 = self._outer[hi] - self._outer[lo]
+        mean = s1 / n_obs
+        cov = (s2 - np.outer(s1, s1) / n_obs) / (n_obs - 1)
+
+        return (pd.Series(mean + self._center, index=self.columns),
+                pd.DataFrame(cov, index=self.columns, columns=self.columns))
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _return_moments(fingerprint):
+    return ReturnMoments(load_returns())
+
+
+def load_return_moments():
+    """Prefix moments of the ìml.csv returns, shared by every session"""
+    return _return_moments(data_fingerprint())
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.stats import norm
+
+from data_loader import PORTFOLIO_WEIGHTS, data_fingerprint, load_returns
+from mc_backend import simulate_normal_scenarios
+from risk_engine import MC_SIMS, VAR_METHODS, tail_from_sorted
+
+# Methods the attribution supports (the GARCH filter is fitted to the portfolio, not per holding)
+ATTRIBUTION_METHODS = ('historical', 'parametric', 'monte_carlo')
+
+# Share of scenarios on each side of the VaR order statistic averaged for the VaR gradient
+VAR_NEIGHBOURHOOD = 0.01
+
+
+def parametric_attribution(mean, cov, weights, alpha):
+    """Marginal, component and incremental normal VaR/ES of every holding, as a dict of arrays.
+
+    Marginals are the gradients of VaR = w'mu + z sqrt(w'Cov w) (and of ES) in the weights,
+    so components w_i * marginal_i add up to the portfolio figure. Incremental VaR is the
+    change from dropping a holding: the variance without holding i is
+    w'Cov w - 2 w_i (Cov w)_i + w_i^2 Cov_ii, so one product Cov @ w serves every holding.
+    All figures are returns (losses negative), as in ``risk_engine``.
+    """
+    mean = np.asarray(mean, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    z = norm.ppf(alpha)
+    tail = norm.pdf(z) / alpha
+
+    cov_w = cov @ w
+    sigma = np.sqrt(w @ cov_w)
+    var, es = w @ mean + z * sigma, w @ mean - tail * sigma
+    marginal_var = mean + z * cov_w / sigma
+    marginal_es = mean - tail * cov_w / sigma
+
+    sigma_without = np.sqrt(np.maximum(sigma**2 - 2 * w * cov_w + w**2 * np.diag(cov), 0.0))
+    mean_without = w @ mean - w * mean
+    return {
+        'var': var, 'es': es,
+        'marginal_var': marginal_var, 'marginal_es': marginal_es,
+        'incremental_var': var - (mean_without + z * sigma_without),
+        'incremental_es': es - (mean_without - tail * sigma_without),
+    }
+
+
+def scenario_attribution(scenarios, weights, alpha):
+    """Marginal, component and incremental VaR/ES of every holding from a scenario set.
+
+    ``scenarios`` (scenarios, holdings) are historical days or simulated return vectors.
+    The ES gradient is the mean holding return over the tail scenarios, which adds up to
+    ES exactly. The VaR gradient averages the scenarios ranked within VAR_NEIGHBOURHOOD of
+    the VaR order statistic, rescaled so the components add up to VaR. Incremental figures
+    re-rank the portfolio without each holding, all holdings at once as columns of one
+    (scenarios, holdings) matrix.
+    """
+    scenarios = np.asarray(scenarios, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    n_obs = len(scenarios)
+    portfolio = scenarios @ w
+    order = np.argsort(portfolio)
+    var, es = (value[0] for value in tail_from_sorted(portfolio[order], [alpha]))
+
+    rank = int(round(alpha * (n_obs - 1)))
+    reach = max(1, int(VAR_NEIGHBOURHOOD * n_obs))
+    near = scenarios[order[max(rank - reach, 0):rank + reach + 1]].mean(axis=0)
+    tail = scenarios[order[:np.searchsorted(portfolio[order], var, side='right')]].mean(axis=0)
+
+    without = portfolio[:, None] - scenarios * w
+    var_without = np.percentile(without, alpha * 100, axis=0)
+    below = without <= var_without
+    es_without = (without * below).sum(axis=0) / below.sum(axis=0)
+    return {
+        'var': var, 'es': es,
+        'marginal_var': near * var / (near @ w), 'marginal_es': tail,
+        'incremental_var': var - var_without,
+        'incremental_es': es - es_without,
+    }
+
+
+def attribution_table(attribution, weights, index):
+    """Per-holding table of an attribution dict: weights, marginals, components and their shares"""
+    w = np.asarray(weights, dtype=float)
+    table = pd.DataFrame({'weight': w}, index=index)
+    for measure in ('var', 'es'):
+        table[f'marginal_{measure}'] = attribution[f'marginal_{measure}']
+        table[f'component_{measure}'] = w * attribution[f'marginal_{measure}']
+        table[f'component_{measure}_share'] = table[f'component_{measure}'] / attribution[measure]
+        table[f'incremental_{measure}'] = attribution[f'incremental_{measure}']
+    return table
+
+
+def attribute_risk(returns, weights, level, method='historical', n_sims=MC_SIMS, seed=42, mc_method='standard'):
+    """One-day VaR/ES attribution of a portfolio of ``returns`` columns held at ``weights``.
+
+    ``weights`` maps each column to its weight. ``method`` is one of ATTRIBUTION_METHODS:
+    historical uses the return days as scenarios, monte_carlo ``n_sims`` multivariate normal
+    draws with the sample mean and covariance, parametric the normal formulas directly.
+    Returns a per-holding table (see attribution_table).
+    """
+    returns = returns[list(weights)].dropna()
+    w = np.array(list(weights.values()), dtype=float)
+    alpha = 1 - level / 100
+    values = returns.to_numpy(dtype=float)
+    mean, cov = values.mean(axis=0), np.cov(values, rowvar=False)
+
+    if method == 'historical':
+        attribution = scenario_attribution(values, w, alpha)
+    elif method == 'parametric':
+        attribution = parametric_attribution(mean, cov, w, alpha)
+    elif method == 'monte_carlo':
+        scenarios = simulate_normal_scenarios(mean, cov, n_sims, seed=seed, method=mc_method)
+        attribution = scenario_attribution(scenarios, w, alpha)
+    else:
+        raise ValueError(f"Unknown attribution method: {method} (expected one of {ATTRIBUTION_METHODS})")
+    return attribution_table(attribution, w, returns.columns)
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _risk_attribution(fingerprint, level, method, mc_method):
+    return attribute_risk(load_returns(), PORTFOLIO_WEIGHTS, level, method, mc_method=mc_method)
+
+
+def load_risk_attribution(level, method='historical', mc_method='standard'):
+    """Attribution of the port.csv portfolio to its holdings (ìml.csv returns), shared by every session"""
+    if method not in ATTRIBUTION_METHODS:
+        raise ValueError(f"{VAR_METHODS.get(method, method)} VaR is not attributed to holdings")
+    return _risk_attribution(data_fingerprint(), level, method, mc_method).copy()
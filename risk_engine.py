@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.stats import norm
+
+from data_loader import data_fingerprint, load_portfolio_returns
+from garch_fhs import cached_garch_fit, filter_returns, simulate_fhs_returns
+from mc_backend import batch_standard_error, percentile_standard_error, simulate_normal_returns
+
+# Confidence levels (%) and holding periods (trading days) every result covers
+CONFIDENCE_LEVELS = (85, 90, 95, 99)
+VAR_HORIZONS = (1, 5, 10)
+
+# VaR methods in display order -> label shown in the app
+VAR_METHODS = {
+    'historical': 'Historical',
+    'parametric': 'Parametric',
+    'monte_carlo': 'Monte Carlo',
+    'garch_fhs': 'GARCH-FHS',
+}
+
+# Normal scenarios drawn for Monte Carlo VaR
+MC_SIMS = 10000
+
+
+def tail_from_sorted(sorted_values, alphas):
+    """VaR and ES at tail probabilities ``alphas`` from one sorted sample.
+
+    VaR is the linearly interpolated quantile (as ``np.percentile``) and ES the mean of
+    the values at or below it, read off prefix sums, so any number of levels costs a
+    binary search each rather than another sort.
+    """
+    sorted_values = np.asarray(sorted_values, dtype=float)
+    alphas = np.asarray(alphas, dtype=float)
+    n_obs = len(sorted_values)
+
+    position = alphas * (n_obs - 1)
+    below = np.floor(position).astype(int)
+    above = np.minimum(below + 1, n_obs - 1)
+    var = sorted_values[below] + (position - below) * (sorted_values[above] - sorted_values[below])
+
+    prefix = np.concatenate([[0.0], np.cumsum(sorted_values)])
+    count = np.maximum(np.searchsorted(sorted_values, var, side='right'), 1)
+    return var, prefix[count] / count
+
+
+def _tail_influence(values, thresholds, alphas):
+    """Mean ES influence ``q + (x - q) 1{x <= q} / alpha`` of ``values`` at each VaR ``q``.
+
+    Its spread across scenario blocks gives the standard error of ES. Unlike the tail mean
+    of a block it is defined even when a small block has no draws beyond a deep quantile.
+    """
+    excess = np.minimum(values[:, None] - thresholds, 0.0)
+    return thresholds + excess.mean(axis=0) / alphas
+
+
+def horizon_returns(returns, horizon):
+    """Overlapping ``horizon``-day sums of daily returns"""
+    returns = np.asarray(returns, dtype=float)
+    prefix = np.concatenate([[0.0], np.cumsum(returns)])
+    return prefix[horizon:] - prefix[:-horizon]
+
+
+class RiskResult:
+    """VaR and ES of one return series for every method, confidence level and horizon.
+
+    Everything is computed once: each horizon's historical returns are sorted once, the
+    normal quantiles are evaluated for all levels at once, and Monte Carlo uses a single
+    batch of standard normal draws, sorted once and rescaled to every horizon.
+
+    GARCH-FHS scales the tail of the GARCH(1,1) standardized residuals by the next-day
+    volatility for one day, and resamples the residuals through the variance recursion
+    for longer horizons; ``garch`` is the fit.
+
+    ``var`` and ``es`` are arrays (method, level, horizon) of returns (losses are
+    negative); ``var_se`` and ``es_se`` (level, horizon) are the Monte Carlo standard
+    errors and ``normal_tail`` the (VaR, ES) of the standard normal draws at each level.
+    """
+
+    def __init__(self, returns, levels=CONFIDENCE_LEVELS, horizons=VAR_HORIZONS, n_sims=MC_SIMS, seed=42,
+                 method='standard'):
+        returns = np.asarray(returns, dtype=float)
+        returns = returns[~np.isnan(returns)]
+        self.levels = tuple(levels)
+        self.horizons = tuple(horizons)
+        self.n_sims = n_sims
+        self.mean = returns.mean()
+        self.std = returns.std(ddof=1)
+
+        alphas = 1 - np.asarray(self.levels, dtype=float) / 100
+        h = np.asarray(self.horizons, dtype=float)
+        scale = self.std * np.sqrt(h)
+        self.var = np.empty((len(VAR_METHODS), len(self.levels), len(self.horizons)))
+        self.es = np.empty_like(self.var)
+
+        # Historical: the empirical tail of overlapping horizon-day returns
+        self._samples = {}
+        for j, horizon in enumerate(self.horizons):
+            self._samples[horizon] = np.sort(horizon_returns(returns, horizon))
+            self._samples[horizon].flags.writeable = False
+            self.var[0, :, j], self.es[0, :, j] = tail_from_sorted(self._samples[horizon], alphas)
+
+        # Parametric: normal with the sample mean and standard deviation, scaled by sqrt(horizon)
+        z = norm.ppf(alphas)[:, None]
+        self.var[1] = self.mean * h + z * scale
+        self.es[1] = self.mean * h - scale * norm.pdf(z) / alphas[:, None]
+
+        # Monte Carlo: one batch of standard normals serves every level and horizon
+        draws = simulate_normal_returns(0.0, 1.0, n_sims, seed=seed, method=method)
+        var_z, es_z = tail_from_sorted(np.sort(draws), alphas)
+        self.normal_tail = (var_z, es_z)
+        self.var[2] = self.mean * h + var_z[:, None] * scale
+        self.es[2] = self.mean * h + es_z[:, None] * scale
+
+        var_z_se = np.atleast_1d(percentile_standard_error(draws, alphas * 100))
+        es_z_se = batch_standard_error(draws, lambda block: _tail_influence(block, var_z, alphas))
+        self.var_se = var_z_se[:, None] * scale
+        self.es_se = es_z_se[:, None] * scale
+
+        # GARCH-FHS: one day is read off the standardized residuals, longer horizons from
+        # bootstrapped GARCH paths
+        self.garch = cached_garch_fit(returns)
+        standardized, sigma_next = filter_returns(returns, self.garch)
+        fhs_var, fhs_es = tail_from_sorted(np.sort(standardized), alphas)
+        paths = simulate_fhs_returns(standardized, self.garch, sigma_next, max(self.horizons), n_sims, seed=seed)
+        for j, horizon in enumerate(self.horizons):
+            if horizon == 1:
+                self.var[3, :, j] = self.garch.mean + sigma_next * fhs_var
+                self.es[3, :, j] = self.garch.mean + sigma_next * fhs_es
+            else:
+                self.var[3, :, j], self.es[3, :, j] = tail_from_sorted(np.sort(paths[:, horizon - 1]), alphas)
+
+    def _position(self, level, horizon):
+        return self.levels.index(level), self.horizons.index(horizon)
+
+    def value(self, method, level, horizon=1):
+        """(VaR, ES) of one method at one confidence level and horizon"""
+        i, j = self._position(level, horizon)
+        k = list(VAR_METHODS).index(method)
+        return self.var[k, i, j], self.es[k, i, j]
+
+    def standard_errors(self, level, horizon=1):
+        """Monte Carlo standard errors (VaR, ES) at one confidence level and horizon"""
+        i, j = self._position(level, horizon)
+        return self.var_se[i, j], self.es_se[i, j]
+
+    def table(self, level, horizon=1):
+        """VaR and ES of every method at one confidence level and horizon, indexed by method"""
+        i, j = self._position(level, horizon)
+        return pd.DataFrame({'VaR': self.var[:, i, j], 'ES': self.es[:, i, j]}, index=list(VAR_METHODS))
+
+    def samples(self, horizon=1):
+        """Sorted historical ``horizon``-day returns behind the historical estimates"""
+        return self._samples[horizon]
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _risk_result(fingerprint, method, n_sims, seed):
+    return RiskResult(load_portfolio_returns()['Portfolio'].dropna(), n_sims=n_sims, seed=seed, method=method)
+
+
+def load_risk_result(method='standard', n_sims=MC_SIMS, seed=42):
+    """VaR/ES of the port.csv returns for every method, level and horizon, shared by every session.
+
+    ``method`` is the variance-reduction scheme for the Monte Carlo draws.
+    """
+    return _risk_result(data_fingerprint(), method, n_sims, seed)
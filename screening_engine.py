@@ -0,0 +1,124 @@
+import os
+from operator import ge, gt, le, lt
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import file_fingerprint
+from zmf_score import F_STRONG, FINANCIALS_PATH, M_SAFE, Z_SAFE, financials_available, load_zmf_scores, worst_recent_scores
+
+# Fundamentals of the whole listed universe, one row per ticker. Expected columns: ticker,
+# exchange, eps (VND), roe (fraction), missing_days and, unless computed from the statement
+# history (see zmf_score), the worst z_score / m_score / f_score of the last three years
+FUNDAMENTALS_PATH = 'fundamentals.csv'
+
+# Comparison operators a screening condition may use
+OPERATORS = {'>': gt, '>=': ge, '<': lt, '<=': le, 'in': np.isin}
+
+# Default screen: stage label -> conditions (column, operator, threshold), all of which must hold
+SCREEN_STAGES = {
+    'EPS': (('eps', '>', 1500),),
+    'ROE': (('roe', '>', 0.12),),
+    'Exchange': (('exchange', 'in', ('HOSE', 'HNX')),),
+    'Missing data': (('missing_days', '<', 150),),
+    'ZMF-Score': (('z_score', '>', Z_SAFE), ('m_score', '<', M_SAFE), ('f_score', '>=', F_STRONG)),
+}
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _fundamental_columns(fingerprint, path=FUNDAMENTALS_PATH):
+    """Fundamentals as read-only column arrays; shared by every session"""
+    df = pd.read_csv(path)
+    df['ticker'] = df['ticker'].astype(str).str.strip().str.upper()
+    df['exchange'] = df['exchange'].astype(str).str.strip().str.upper().replace({'HSX': 'HOSE'})
+
+    scores = load_zmf_scores()
+    if scores is not None:
+        # Scores computed from the statement history replace any exported with the table
+        recent = worst_recent_scores(scores)
+        df = df.drop(columns=recent.columns, errors='ignore').join(recent, on='ticker')
+
+    columns = {'ticker': df['ticker'].to_numpy(), 'exchange': df['exchange'].to_numpy()}
+    for name in df.columns.drop(['ticker', 'exchange']):
+        columns[name] = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+    for values in columns.values():
+        values.flags.writeable = False
+    return columns
+
+
+def _screen_fingerprint(path):
+    """Content hash of the fundamentals table and, when present, of the statement history"""
+    return file_fingerprint(path), file_fingerprint(FINANCIALS_PATH) if financials_available() else None
+
+
+def fundamentals_available(path=FUNDAMENTALS_PATH):
+    """Whether the fundamentals table has been exported next to the app"""
+    return os.path.exists(path)
+
+
+def load_fundamentals(path=FUNDAMENTALS_PATH):
+    """Fundamentals table (one row per ticker), or None when the file is not there"""
+    if not fundamentals_available(path):
+        return None
+    return pd.DataFrame(_fundamental_columns(_screen_fingerprint(path), path)).set_index('ticker')
+
+
+@st.cache_resource(show_spinner=False, max_entries=128)
+def _condition_mask(fingerprint, condition, path=FUNDAMENTALS_PATH):
+    """Boolean mask of one condition over the whole universe; missing values fail"""
+    column, op, threshold = condition
+    mask = OPERATORS[op](_fundamental_columns(fingerprint, path)[column], threshold)
+    mask.flags.writeable = False
+    return mask
+
+
+@st.cache_resource(show_spinner=False, max_entries=128)
+def _survivors(fingerprint, stages, path=FUNDAMENTALS_PATH):
+    """Mask of tickers passing every stage in ``stages``, built on the cached mask of its prefix.
+
+    Each stage prefix is its own cache entry, so changing a threshold reuses every stage
+    before it and only re-evaluates that stage and the ones after it.
+    """
+    if not stages:
+        mask = np.ones(len(_fundamental_columns(fingerprint, path)['ticker']), dtype=bool)
+    else:
+        mask = _survivors(fingerprint, stages[:-1], path).copy()
+        for condition in stages[-1]:
+            mask &= _condition_mask(fingerprint, condition, path)
+    mask.flags.writeable = False
+    return mask
+
+
+def missing_columns(stages=SCREEN_STAGES, path=FUNDAMENTALS_PATH):
+    """Stage label -> columns its conditions use that the fundamentals table lacks, for stages lacking any.
+
+    The ZMF-Score stage needs z_score / m_score / f_score, which come either from the
+    statement history or from columns exported with the table.
+    """
+    columns = _fundamental_columns(_screen_fingerprint(path), path)
+    missing = {}
+    for label, conditions in stages.items():
+        absent = sorted({column for column, _, _ in conditions if column not in columns})
+        if absent:
+            missing[label] = absent
+    return missing
+
+
+def run_screen(stages=SCREEN_STAGES, path=FUNDAMENTALS_PATH):
+    """Apply the screening stages in order.
+
+    ``stages`` maps a stage label to its conditions, as in SCREEN_STAGES. Returns
+    (counts, tickers): a Series with the universe size followed by the number of tickers
+    left after each stage, and the array of tickers passing every stage. Raises
+    ValueError when a stage uses a column the table lacks (see missing_columns).
+    """
+    missing = missing_columns(stages, path)
+    if missing:
+        raise ValueError(f"Fundamentals table lacks columns for stages: {missing}")
+    fingerprint = _screen_fingerprint(path)
+    frozen = tuple(tuple(tuple(condition) for condition in conditions) for conditions in stages.values())
+
+    counts = [int(_survivors(fingerprint, frozen[:k], path).sum()) for k in range(len(frozen) + 1)]
+    tickers = _fundamental_columns(fingerprint, path)['ticker'][_survivors(fingerprint, frozen, path)]
+    return pd.Series(counts, index=['Universe'] + list(stages)), tickers
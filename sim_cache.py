@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import streamlit as st
+
+from data_loader import data_fingerprint
+
+# Simulation results kept on disk so a restarted server starts warm
+SIM_CACHE_DIR = '.sim_cache'
+
+# Default budgets for the shared cache
+SIM_CACHE_MEMORY_BYTES = 256 * 1024**2
+SIM_CACHE_DISK_BYTES = 1024**3
+
+
+def simulation_key(n_sims, horizon, seed, model):
+    """Cache key of one simulation run: (data hash, n_sims, horizon, seed, model)"""
+    return (data_fingerprint(), int(n_sims), int(horizon), int(seed), str(model))
+
+
+def _nbytes(result):
+    return sum(np.asarray(value).nbytes for value in result.values())
+
+
+def _freeze(result):
+    """Read-only copies of the result arrays, so sessions sharing an entry cannot mutate it"""
+    frozen = {}
+    for name, value in result.items():
+        value = np.array(value, copy=True)
+        value.flags.writeable = False
+        frozen[name] = value
+    return frozen
+
+
+class SimulationCache:
+    """Thread-safe LRU cache of simulation results (dicts of arrays) with a memory budget.
+
+    Entries are evicted least recently used first once their total size exceeds
+    ``max_bytes``. With ``disk_dir`` set, every result is also written there as ``.npz``
+    and read back on a memory miss; the oldest files are pruned beyond ``max_disk_bytes``.
+    """
+
+    def __init__(self, max_bytes=SIM_CACHE_MEMORY_BYTES, disk_dir=None, max_disk_bytes=SIM_CACHE_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, f'{digest}.npz')
+
+    def _put(self, key, result):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            self._entries[key] = result
+            self._size += _nbytes(result)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= _nbytes(evicted)
+            return result
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                result = _freeze({name: data[name] for name in data.files})
+            # Touch the file so disk pruning is least recently used too
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return result
+
+    def _write_disk(self, key, result):
+        if self.disk_dir is None:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            target = self._path(key)
+            # Write to a temp file and swap in, so readers never see half a file
+            with open(target + '.tmp', 'wb') as f:
+                np.savez(f, **result)
+            os.replace(target + '.tmp', target)
+            self._prune_disk()
+        except OSError:
+            # Read-only deployment: keep the result in memory only
+            pass
+
+    def _prune_disk(self):
+        files = [os.path.join(self.disk_dir, name) for name in os.listdir(self.disk_dir) if name.endswith('.npz')]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in files)
+        for path in files[:-1]:
+            if total <= self.max_disk_bytes:
+                break
+            total -= os.path.getsize(path)
+            os.remove(path)
+
+    def get(self, key):
+        """Cached result for ``key`` or None, checking memory first and then disk"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        result = self._read_disk(key)
+        return None if result is None else self._put(key, result)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached result for ``key``, running ``compute()`` and storing it on a miss"""
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        result = _freeze(compute())
+        self._write_disk(key, result)
+        return self._put(key, result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+@st.cache_resource(show_spinner=False)
+def get_simulation_cache():
+    """Simulation cache shared by every session, persisted under SIM_CACHE_DIR"""
+    return SimulationCache(disk_dir=SIM_CACHE_DIR)
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import data_fingerprint, load_returns
+
+# Historical stress windows: name -> (first, last) trading day of the shock, inclusive
+HISTORICAL_SCENARIOS = {
+    'Thuế đối ứng 08/04/2025': ('2025-04-03', '2025-04-09'),
+    'Bán tháo quý 4/2022': ('2022-10-01', '2022-12-31'),
+}
+
+# Hypothetical one-day shocks: name -> return of each ticker (tickers left out are unchanged)
+HYPOTHETICAL_SHOCKS = {
+    'Toàn thị trường giảm sàn (-7%)': {'ACB': -0.07, 'HPG': -0.07, 'VNM': -0.07, 'DBD': -0.07},
+    'Ngân hàng -10%': {'ACB': -0.10},
+    'Thép -15%': {'HPG': -0.15},
+    'Tiêu dùng & dược -10%': {'VNM': -0.10, 'DBD': -0.10},
+}
+
+# Trading days after a historical window searched for the recovery
+RECOVERY_DAYS = 126
+
+# Window lengths (trading days) offered for sweeping every overlapping historical window
+ROLLING_WINDOWS = (5, 10, 20)
+
+# Scenarios replayed per batch, bounding the (scenarios, days, portfolios) working array
+REPLAY_CHUNK = 256
+
+
+class ScenarioSet:
+    """Named return paths (historical windows and hypothetical shocks) replayed against portfolios.
+
+    Every scenario is a (days, assets) path of daily returns: the shock itself followed,
+    for historical windows, by up to ``recovery_days`` of the history after it, which is
+    only used to measure the recovery. Paths are zero-padded into one
+    (scenarios, days, assets) array, so replaying any number of weight vectors is one
+    batched matrix product per chunk of scenarios.
+    """
+
+    def __init__(self, columns):
+        self.columns = pd.Index(columns)
+        self.names = []
+        self.kinds = []
+        self.windows = []
+        self._paths = []
+        self._shock_days = []
+        self._stacked = None
+
+    def _add(self, name, kind, window, path, shock_days):
+        if name in self.names:
+            raise ValueError(f"Duplicate scenario name: {name}")
+        self.names.append(name)
+        self.kinds.append(kind)
+        self.windows.append(window)
+        self._paths.append(np.asarray(path, dtype=float))
+        self._shock_days.append(shock_days)
+        self._stacked = None
+
+    def add_historical(self, name, start, end, returns, recovery_days=RECOVERY_DAYS):
+        """Add the daily returns between ``start`` and ``end`` (inclusive) of a dated return table"""
+        returns = returns[self.columns].dropna()
+        lo = returns.index.searchsorted(pd.Timestamp(start), side='left')
+        hi = returns.index.searchsorted(pd.Timestamp(end), side='right')
+        if hi <= lo:
+            raise ValueError(f"No trading days between {start} and {end}")
+        path = returns.to_numpy(dtype=float)[lo:hi + recovery_days]
+        self._add(name, 'historical', (returns.index[lo], returns.index[hi - 1]), path, hi - lo)
+
+    def add_hypothetical(self, name, shocks):
+        """Add a one-day shock given as ticker -> return"""
+        path = pd.Series(shocks, dtype=float).reindex(self.columns, fill_value=0.0).to_numpy()[None, :]
+        self._add(name, 'hypothetical', None, path, 1)
+
+    def add_rolling_windows(self, returns, length, prefix='Cửa sổ', recovery_days=RECOVERY_DAYS):
+        """Add every overlapping ``length``-day window of a dated return table as a historical scenario"""
+        returns = returns[self.columns].dropna()
+        values = returns.to_numpy(dtype=float)
+        for lo in range(len(returns) - length + 1):
+            first, last = returns.index[lo], returns.index[lo + length - 1]
+            self._add(f'{prefix} {first:%d/%m/%Y}-{last:%d/%m/%Y}', 'historical', (first, last),
+                      values[lo:lo + length + recovery_days], length)
+
+    def paths(self):
+        """Zero-padded paths (scenarios, days, assets) and the shock and path lengths of each scenario"""
+        if self._stacked is None:
+            lengths = np.array([len(path) for path in self._paths])
+            stacked = np.zeros((len(self._paths), lengths.max(initial=1), len(self.columns)))
+            for i, path in enumerate(self._paths):
+                stacked[i, :len(path)] = path
+            stacked.flags.writeable = False
+            self._stacked = stacked, np.array(self._shock_days), lengths
+        return self._stacked
+
+    def replay(self, weights):
+        """P&L, maximum drawdown and recovery of every (scenario, portfolio) pair.
+
+        ``weights`` is a DataFrame of portfolios (rows) by ticker (columns), or one
+        ticker -> weight mapping. Returns a DataFrame indexed by (scenario, portfolio) with
+        ``pnl`` (compounded return over the shock), ``max_drawdown`` (deepest fall from the
+        running peak during the shock), ``trough_day`` and ``recovery_days`` (trading days
+        from the trough until the pre-fall peak is regained; NaN when that does not happen
+        within the path).
+        """
+        if not isinstance(weights, pd.DataFrame):
+            weights = pd.DataFrame([weights], index=['Portfolio'])
+        W = weights.reindex(columns=self.columns, fill_value=0.0).to_numpy(dtype=float)
+        paths, shock_days, lengths = self.paths()
+        n_scenarios, n_days = paths.shape[:2]
+        days = np.arange(n_days)[None, :, None]
+
+        out = {name: np.empty((n_scenarios, len(W))) for name in ('pnl', 'max_drawdown', 'trough_day', 'recovery_days')}
+        for lo in range(0, n_scenarios, REPLAY_CHUNK):
+            hi = min(lo + REPLAY_CHUNK, n_scenarios)
+            shock = shock_days[lo:hi, None, None]
+            wealth = np.cumprod(1 + paths[lo:hi] @ W.T, axis=1)
+            peak = np.maximum.accumulate(np.maximum(wealth, 1.0), axis=1)
+            drawdown = np.where(days < shock, wealth / peak - 1, 0.0)
+
+            trough = drawdown.argmin(axis=1)
+            trough_peak = np.take_along_axis(peak, trough[:, None, :], axis=1)
+            recovered = (wealth >= trough_peak) & (days > trough[:, None, :]) & (days < lengths[lo:hi, None, None])
+            first = recovered.argmax(axis=1)
+            max_drawdown = drawdown.min(axis=1)
+
+            out['pnl'][lo:hi] = np.take_along_axis(wealth, shock - 1, axis=1)[:, 0] - 1
+            out['max_drawdown'][lo:hi] = max_drawdown
+            out['trough_day'][lo:hi] = trough
+            out['recovery_days'][lo:hi] = np.where(max_drawdown == 0, 0.0,
+                                                   np.where(recovered.any(axis=1), first - trough, np.nan))
+
+        index = pd.MultiIndex.from_product([self.names, weights.index], names=['scenario', 'portfolio'])
+        return pd.DataFrame({name: values.ravel() for name, values in out.items()}, index=index)
+
+    def describe(self):
+        """Kind, shock window and shock length of every scenario"""
+        _, shock_days, _ = self.paths()
+        return pd.DataFrame({
+            'kind': self.kinds,
+            'start': [window[0] if window else pd.NaT for window in self.windows],
+            'end': [window[1] if window else pd.NaT for window in self.windows],
+            'shock_days': shock_days,
+        }, index=pd.Index(self.names, name='scenario'))
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _scenario_set(fingerprint):
+    returns = load_returns()
+    scenarios = ScenarioSet(returns.columns)
+    for name, (start, end) in HISTORICAL_SCENARIOS.items():
+        scenarios.add_historical(name, start, end, returns)
+    for name, shocks in HYPOTHETICAL_SHOCKS.items():
+        scenarios.add_hypothetical(name, shocks)
+    scenarios.paths()
+    return scenarios
+
+
+def load_scenario_set():
+    """Built-in historical windows (on the ìml.csv returns) and hypothetical shocks, shared by every session.
+
+    The set is shared, so add scenarios to a new ScenarioSet rather than to this one.
+    """
+    return _scenario_set(data_fingerprint())
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _rolling_scenario_set(fingerprint, length):
+    returns = load_returns()
+    scenarios = ScenarioSet(returns.columns)
+    scenarios.add_rolling_windows(returns, length)
+    scenarios.paths()
+    return scenarios
+
+
+def load_rolling_scenarios(length):
+    """Every overlapping ``length``-day window of the ìml.csv returns as one scenario set, shared by every session"""
+    return _rolling_scenario_set(data_fingerprint(), length)
@@ -0,0 +1,51 @@
+from collections import namedtuple
+from functools import lru_cache
+from html import escape
+
+import pandas as pd
+import streamlit as st
+
+# One column of a rendered table. ``template`` wraps each cell value ('{}' marks the value),
+# ``header_class`` / ``cell_class`` name CSS classes from theme_config.apply_theme_css and
+# ``title`` is the header tooltip
+TableColumn = namedtuple('TableColumn', 'field header title header_class cell_class template',
+                         defaults=(None, '', '', '{}'))
+
+
+def _attribute(name, value):
+    return f' {name}="{escape(value)}"' if value else ''
+
+
+@lru_cache(maxsize=64)
+def _compile(columns, table_class):
+    """Static parts of a table for one column spec: opening markup with the header row,
+    the (prefix, suffix) around every column's cells, and the closing markup"""
+    header = ''.join(
+        '<th' + _attribute('class', column.header_class) + _attribute('title', column.title) + f'>{escape(column.header)}</th>'
+        for column in columns)
+    head = f'<div class="story-table-wrap"><table class="{table_class}"><thead><tr>{header}</tr></thead><tbody>'
+
+    cells = []
+    for column in columns:
+        prefix, suffix = column.template.split('{}')
+        cells.append(('<td' + _attribute('class', column.cell_class) + f'>{prefix}', f'{suffix}</td>'))
+    return head, tuple(cells), '</tbody></table></div>'
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def render_table(df, columns, table_class='story-table', row_class_field=None):
+    """HTML for ``df`` laid out by ``columns`` (a tuple of TableColumn), cached by data hash.
+
+    Styling comes from CSS classes, so the markup carries no inline styles. Rows are built
+    column by column with vectorized string operations; ``row_class_field`` names a column
+    of ``df`` holding a CSS class for each row. Headers and cell values are HTML-escaped;
+    only the column templates are trusted markup.
+    """
+    head, cells, tail = _compile(tuple(columns), table_class)
+
+    rows = pd.Series('', index=df.index)
+    for column, (prefix, suffix) in zip(columns, cells):
+        rows = rows + prefix + df[column.field].astype(str).map(escape) + suffix
+
+    opening = '<tr>' if row_class_field is None else '<tr class="' + df[row_class_field].astype(str).map(escape) + '">'
+    return head + (opening + rows + '</tr>').str.cat() + tail
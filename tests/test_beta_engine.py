@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from beta_engine import BetaPanel, ewma_beta, full_sample_beta, rolling_beta
+
+
+@pytest.fixture
+def market_data():
+    rng = np.random.default_rng(8)
+    index = pd.bdate_range('2023-01-02', periods=200)
+    market = pd.Series(0.0005 + 0.012 * rng.standard_normal(200), index=index)
+    noise = 0.01 * rng.standard_normal((200, 2))
+    returns = pd.DataFrame({'ACB': 1.2 * market + noise[:, 0], 'VNM': 0.5 * market + noise[:, 1]}, index=index)
+    returns.iloc[5, 0] = np.nan
+    return returns, market
+
+
+def _ols_beta(y, x):
+    return np.polyfit(x, y, 1)[0]
+
+
+def test_rolling_beta_matches_ols(market_data):
+    returns, market = market_data
+    panel = BetaPanel(returns, market, windows=(20, 60))
+    clean = returns.dropna()
+
+    for window in (20, 60):
+        betas = panel.window(window)
+        assert betas.iloc[:window - 1].isna().all().all()
+        for end in (window, 120, len(clean)):
+            rows = clean.iloc[end - window:end]
+            for ticker in rows:
+                expected = _ols_beta(rows[ticker], market.loc[rows.index])
+                np.testing.assert_allclose(betas[ticker].iloc[end - 1], expected, rtol=1e-9)
+
+    # A single series keeps the dates another ticker is missing
+    single = rolling_beta(returns['VNM'], market, 60)
+    assert len(single) == len(returns)
+    np.testing.assert_allclose(single.iloc[-1], _ols_beta(returns['VNM'].iloc[-60:], market.iloc[-60:]), rtol=1e-9)
+
+
+def test_full_sample_beta(market_data):
+    returns, market = market_data
+    beta = full_sample_beta(returns, market)
+    clean = returns.dropna()
+    np.testing.assert_allclose(beta['ACB'], _ols_beta(clean['ACB'], market.loc[clean.index]), rtol=1e-12)
+    assert beta['ACB'] > beta['VNM']
+
+
+def test_ewma_beta_matches_weighted_regression(market_data):
+    returns, market = market_data
+    lam = 0.94
+    beta = ewma_beta(returns, market, lam=lam)
+    clean = returns.dropna()
+    x, y = market.loc[clean.index].to_numpy(), clean['VNM'].to_numpy()
+
+    # adjust=False weights: (1 - lam) * lam^k for lagged days, lam^(n-1) for the first day
+    n = len(x)
+    weights = (1 - lam) * lam ** np.arange(n - 1, -1, -1)
+    weights[0] = lam ** (n - 1)
+    mx, my = weights @ x, weights @ y
+    expected = (weights @ (x * y) - mx * my) / (weights @ (x * x) - mx * mx)
+    np.testing.assert_allclose(beta['VNM'].iloc[-1], expected, rtol=1e-9)
+    assert beta.iloc[:19].isna().all().all()
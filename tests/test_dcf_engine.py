@@ -0,0 +1,50 @@
+import numpy as np
+
+from dcf_engine import fcfe_valuation, project_cash_flows, simulate_valuation, valuation_grid
+
+FCFE = np.array([100.0, 110.0, 118.0, 130.0, 135.0])
+
+
+def _equity_value(cash_flows, r, g):
+    """Textbook FCFE value: discounted forecast years plus a discounted Gordon terminal value"""
+    value = sum(cf / (1 + r) ** (t + 1) for t, cf in enumerate(cash_flows))
+    return value + cash_flows[-1] * (1 + g) / (r - g) / (1 + r) ** len(cash_flows)
+
+
+def test_valuation_matches_textbook_formula():
+    result = fcfe_valuation(FCFE, 0.12, 0.03)
+    np.testing.assert_allclose(result['equity_value'], _equity_value(FCFE, 0.12, 0.03), rtol=1e-12)
+    np.testing.assert_allclose(result['pv_cash_flows'].sum() + result['pv_terminal'], result['equity_value'])
+
+
+def test_spread_below_minimum_is_nan():
+    values = fcfe_valuation(FCFE, np.array([0.10, 0.034]), 0.03)['equity_value']
+    assert np.isfinite(values[0]) and np.isnan(values[1])
+
+
+def test_project_cash_flows_shifts_growth():
+    np.testing.assert_allclose(project_cash_flows(FCFE), FCFE)
+    shifted = project_cash_flows(FCFE, [0.0, 0.05])
+    growth = shifted[1, 1:] / shifted[1, :-1]
+    np.testing.assert_allclose(growth, FCFE[1:] / FCFE[:-1] + 0.05)
+    assert shifted[1, 0] == FCFE[0]
+
+
+def test_grid_matches_cell_by_cell():
+    rates, growth, shifts = [0.10, 0.12, 0.15], [0.0, 0.02, 0.04], [-0.02, 0.0, 0.03]
+    grid = valuation_grid(FCFE, rates, growth, shifts)
+    assert grid.shape == (3, 3, 3)
+    for i, shift in enumerate(shifts):
+        for j, r in enumerate(rates):
+            for k, g in enumerate(growth):
+                expected = _equity_value(project_cash_flows(FCFE, shift), r, g)
+                np.testing.assert_allclose(grid[i, j, k], expected, rtol=1e-12)
+
+
+def test_simulation_centres_on_deterministic_value():
+    values = simulate_valuation(FCFE, 0.12, 0.03, 0.0, 0.0, 0.0, 512)
+    np.testing.assert_allclose(values, _equity_value(FCFE, 0.12, 0.03), rtol=1e-12)
+
+    serial = simulate_valuation(FCFE, 0.12, 0.03, 0.01, 0.005, 0.01, 2000, seed=3, workers=1)
+    threaded = simulate_valuation(FCFE, 0.12, 0.03, 0.01, 0.005, 0.01, 2000, seed=3, workers=4)
+    np.testing.assert_array_equal(serial, threaded)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+from efficient_frontier import frontier_from_moments, min_variance_weights, trace_frontier
+
+MEAN = np.array([0.0004, 0.0007, 0.0010, 0.0002])
+VOL = np.array([0.015, 0.02, 0.03, 0.012])
+CORR = np.array([
+    [1.0, 0.3, 0.2, 0.4],
+    [0.3, 1.0, 0.5, 0.1],
+    [0.2, 0.5, 1.0, 0.0],
+    [0.4, 0.1, 0.0, 1.0],
+])
+COV = CORR * np.outer(VOL, VOL)
+
+
+def _long_only_min_variance(cov, target=None):
+    """Reference long-only minimum variance weights from a general-purpose solver"""
+    constraints = [{'type': 'eq', 'fun': lambda w: w.sum() - 1}]
+    if target is not None:
+        constraints.append({'type': 'eq', 'fun': lambda w: w @ MEAN - target})
+    result = minimize(lambda w: w @ cov @ w, np.full(4, 0.25), bounds=[(0, 1)] * 4, constraints=constraints,
+                      method='SLSQP', options={'ftol': 1e-15, 'maxiter': 500})
+    return result.x
+
+
+def test_min_variance_matches_closed_form_when_interior():
+    weights, free = min_variance_weights(MEAN, COV)
+    closed_form = np.linalg.solve(COV, np.ones(4))
+    closed_form /= closed_form.sum()
+    assert closed_form.min() > 0
+    assert free.all()
+    np.testing.assert_allclose(weights, closed_form, atol=1e-12)
+
+
+def test_min_variance_drops_assets_it_would_short():
+    # Asset 1 is a riskier near-copy of asset 0, so the unconstrained solution shorts it
+    corr = np.array([
+        [1.0, 0.95, 0.2, 0.4],
+        [0.95, 1.0, 0.2, 0.35],
+        [0.2, 0.2, 1.0, 0.0],
+        [0.4, 0.35, 0.0, 1.0],
+    ])
+    vol = np.array([0.015, 0.0225, 0.03, 0.012])
+    cov = corr * np.outer(vol, vol)
+    assert np.linalg.solve(cov, np.ones(4))[1] < 0
+
+    weights, free = min_variance_weights(MEAN, cov)
+    reference = _long_only_min_variance(cov)
+    assert weights[1] == 0 and not free[1]
+    np.testing.assert_allclose(weights.sum(), 1)
+    np.testing.assert_allclose(weights @ cov @ weights, reference @ cov @ reference, rtol=1e-6)
+
+
+def test_frontier_hits_targets_with_minimum_variance():
+    min_var, _ = min_variance_weights(MEAN, COV)
+    targets = np.linspace(min_var @ MEAN, MEAN.max(), 25)
+    weights = trace_frontier(MEAN, COV, targets)
+
+    assert weights.min() >= 0
+    np.testing.assert_allclose(weights.sum(axis=1), 1, atol=1e-10)
+    np.testing.assert_allclose(weights @ MEAN, targets, atol=1e-12)
+    for target, w in zip(targets[::6], weights[::6]):
+        reference = _long_only_min_variance(COV, target)
+        assert w @ COV @ w <= reference @ COV @ reference * (1 + 1e-6)
+
+
+def test_frontier_layout():
+    tickers = ['ACB', 'HPG', 'VNM', 'DBD']
+    frontier = frontier_from_moments(pd.Series(MEAN, index=tickers), pd.DataFrame(COV, index=tickers, columns=tickers),
+                                     n_points=50)
+    assert list(frontier.columns) == ['mean', 'StdDev', 'out'] + [f'w.{ticker}' for ticker in tickers]
+    assert list(frontier.index[:2]) == ['result.1', 'result.2']
+    assert frontier['mean'].is_monotonic_increasing
+    np.testing.assert_allclose(frontier['StdDev'] ** 2, frontier['out'])
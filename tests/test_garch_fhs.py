@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from garch_fhs import (_negative_log_likelihood, cached_garch_fit, filter_returns, fit_garch, garch_variance,
+                       simulate_fhs_returns)
+
+
+def _simulate_garch(n, omega, alpha, beta, seed):
+    rng = np.random.default_rng(seed)
+    returns = np.empty(n)
+    variance = omega / (1 - alpha - beta)
+    for t in range(n):
+        returns[t] = np.sqrt(variance) * rng.standard_normal()
+        variance = omega + alpha * returns[t]**2 + beta * variance
+    return 0.0005 + returns
+
+
+@pytest.fixture(scope='module')
+def returns():
+    return _simulate_garch(3000, 2e-6, 0.10, 0.85, seed=31)
+
+
+def test_variance_matches_recursion(returns):
+    residuals = returns[:200] - returns.mean()
+    expected = [4e-5]
+    for e in residuals:
+        expected.append(1e-6 + 0.1 * e**2 + 0.85 * expected[-1])
+    np.testing.assert_allclose(garch_variance(residuals, 1e-6, 0.1, 0.85, 4e-5), expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize('params', [(0.95, 0.1), (0.5, 0.5), (0.99, 0.02), (0.3, 0.9)])
+def test_gradient_matches_finite_differences(returns, params):
+    residuals = returns[:500] - returns[:500].mean()
+    variance = residuals.var()
+    _, gradient = _negative_log_likelihood(np.array(params), residuals, variance)
+
+    step = 1e-6
+    numeric = []
+    for i in range(2):
+        shift = np.zeros(2)
+        shift[i] = step
+        up, _ = _negative_log_likelihood(np.array(params) + shift, residuals, variance)
+        down, _ = _negative_log_likelihood(np.array(params) - shift, residuals, variance)
+        numeric.append((up - down) / (2 * step))
+    np.testing.assert_allclose(gradient, numeric, rtol=1e-5, atol=1e-6)
+
+
+def test_fit_recovers_parameters(returns):
+    fit = fit_garch(returns)
+    assert abs(fit.alpha - 0.10) < 0.04
+    assert abs(fit.beta - 0.85) < 0.05
+    np.testing.assert_allclose(fit.omega, fit.variance * (1 - fit.alpha - fit.beta))
+
+    # A warm start from the fit of the same data without its last day converges faster
+    warm = fit_garch(returns, fit_garch(returns[:-1]))
+    np.testing.assert_allclose([warm.alpha, warm.beta], [fit.alpha, fit.beta], atol=1e-4)
+    assert warm.evaluations < fit.evaluations
+
+
+def test_filtered_residuals_rebuild_returns(returns):
+    fit = fit_garch(returns)
+    standardized, sigma_next = filter_returns(returns, fit)
+    sigma = np.sqrt(garch_variance(returns - fit.mean, fit.omega, fit.alpha, fit.beta, fit.variance))
+    np.testing.assert_allclose(fit.mean + standardized * sigma[:-1], returns, rtol=1e-12)
+    assert sigma_next == sigma[-1]
+
+
+def test_cached_fit_is_shared(returns):
+    first = cached_garch_fit(returns[:1000])
+    assert cached_garch_fit(returns[:1000]) is first
+    assert cached_garch_fit(returns[:1001]).evaluations <= first.evaluations
+
+
+def test_fhs_paths(returns):
+    fit = fit_garch(returns)
+    standardized, sigma_next = filter_returns(returns, fit)
+    paths = simulate_fhs_returns(standardized, fit, sigma_next, 5, 1000, seed=4, workers=1)
+    assert paths.shape == (1000, 5)
+
+    # The first day rescales a resampled residual by the next-day volatility
+    first_day = (paths[:, 0] - fit.mean) / sigma_next
+    assert np.isin(np.round(first_day, 10), np.round(standardized, 10)).all()
+    np.testing.assert_array_equal(paths, simulate_fhs_returns(standardized, fit, sigma_next, 5, 1000, seed=4,
+                                                               workers=4))
@@ -0,0 +1,34 @@
+import numpy as np
+
+from gbm_engine import simulate_gbm_paths, simulate_gbm_paths_chunked, simulate_gbm_summary
+
+S0 = [20.0, 30.0]
+MU = [0.10, 0.05]
+SIGMA = [0.25, 0.35]
+CORR = [[1.0, 0.4], [0.4, 1.0]]
+
+
+def test_chunked_paths_match_one_shot():
+    one_shot = simulate_gbm_paths(S0, MU, SIGMA, CORR, 40, 600, seed=7, workers=1)
+    chunked = simulate_gbm_paths_chunked(S0, MU, SIGMA, CORR, 40, 600, seed=7, chunk_days=9, workers=3)
+    assert one_shot.shape == (600, 41, 2)
+    np.testing.assert_allclose(chunked, one_shot, rtol=1e-12)
+
+
+def test_summary_matches_full_paths():
+    paths = simulate_gbm_paths(S0, MU, SIGMA, CORR, 30, 500, seed=11)
+    summary = simulate_gbm_summary(S0, MU, SIGMA, CORR, 30, 500, percentiles=(5, 50, 95), n_sample_paths=4,
+                                   seed=11, chunk_days=7)
+    np.testing.assert_allclose(summary['percentiles'], np.percentile(paths, (5, 50, 95), axis=0), rtol=1e-12)
+    np.testing.assert_allclose(summary['sample_paths'], paths[:4], rtol=1e-12)
+    np.testing.assert_allclose(summary['terminal'], paths[:, -1], rtol=1e-12)
+
+
+def test_log_returns_have_gbm_moments():
+    n_days = 252
+    paths = simulate_gbm_paths(S0, MU, SIGMA, CORR, n_days, 20000, seed=1, method='antithetic')
+    log_returns = np.log(paths[:, -1] / paths[:, 0])
+    expected_mean = np.subtract(MU, 0.5 * np.square(SIGMA))
+    np.testing.assert_allclose(log_returns.mean(axis=0), expected_mean, atol=1e-10)
+    np.testing.assert_allclose(log_returns.std(axis=0), SIGMA, rtol=0.02)
+    np.testing.assert_allclose(np.corrcoef(log_returns.T)[0, 1], 0.4, atol=0.02)
@@ -0,0 +1,47 @@
+import os
+import shutil
+
+import pytest
+
+from holdings_index import load_holdings_index, read_holdings_report
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'fund_holdings')
+
+
+@pytest.fixture
+def holdings_dir(tmp_path):
+    """A private copy of the fixture reports, so each test gets its own shared index"""
+    return shutil.copytree(FIXTURE_DIR, tmp_path / 'fund_holdings')
+
+
+def test_excel_report_with_vietnamese_headers():
+    report = read_holdings_report(os.path.join(FIXTURE_DIR, 'DC Dynamic.xlsx'))
+    assert list(report['ticker']) == ['FPT', 'ACB', 'VCB', 'DBD']
+    assert list(report['weight']) == [0.2, 0.1, 0.1, 0.04]
+
+
+def test_queries(holdings_dir):
+    index = load_holdings_index(str(holdings_dir))
+    assert index.top_k(4) == [('ACB', 3), ('FPT', 3), ('DBD', 2), ('HPG', 2)]
+    assert index.top_k(sector='Banking') == [('ACB', 3), ('VCB', 1)]
+    assert index.funds_holding('DBD') == ['DC Dynamic', 'SSI Value']
+    assert index.co_holdings('FPT', k=3) == [('ACB', 3), ('DBD', 2), ('HPG', 2)]
+    assert index.overlap('VCBF Blue Chip', 'SSI Value') == (['ACB', 'FPT', 'HPG'], 0.5)
+
+    table = index.to_frame(k=2)
+    assert list(table['Stock']) == ['ACB', 'FPT']
+    assert list(table['Sector']) == ['Banking', 'Technology']
+
+
+def test_reload_picks_up_changed_and_deleted_reports(holdings_dir):
+    index = load_holdings_index(str(holdings_dir))
+    os.remove(holdings_dir / 'DC Dynamic.xlsx')
+    (holdings_dir / 'SSI Value.csv').write_text('Stock,Sector\nVNM,Consumer\n')
+
+    assert load_holdings_index(str(holdings_dir)) is index
+    assert index.top_k(3) == [('VNM', 2), ('ACB', 1), ('FPT', 1)]
+    assert index.funds_holding('DBD') == []
+
+    os.remove(holdings_dir / 'SSI Value.csv')
+    os.remove(holdings_dir / 'VCBF Blue Chip.csv')
+    assert load_holdings_index(str(holdings_dir)) is None
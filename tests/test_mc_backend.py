@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from mc_backend import (ScenarioStreams, batch_standard_error, brownian_bridge, simulate_normal_returns,
+                        standard_normals)
+
+
+@pytest.mark.parametrize('method', ['antithetic', 'sobol'])
+def test_variance_reduced_normals_have_zero_mean(method):
+    z = standard_normals(np.random.default_rng(5), 3, 4096, 2, method)
+    assert z.shape == (3, 4096, 2)
+    # Antithetic pairs cancel exactly; a scrambled Sobol' net is far closer to 0 than 1/sqrt(n)
+    atol = 1e-12 if method == 'antithetic' else 2e-3
+    np.testing.assert_allclose(z.mean(axis=1), 0, atol=atol)
+    np.testing.assert_allclose(z.std(axis=1), 1, atol=0.05)
+
+
+def test_moment_matching_is_exact():
+    z = standard_normals(np.random.default_rng(5), 2, 300, 3, 'moment_matching')
+    np.testing.assert_allclose(z.mean(axis=1), 0, atol=1e-12)
+    np.testing.assert_allclose(z.std(axis=1), 1, atol=1e-12)
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        standard_normals(np.random.default_rng(5), 1, 10, 1, 'halton')
+
+
+@pytest.mark.parametrize('method', ['standard', 'antithetic', 'sobol', 'moment_matching'])
+def test_streams_do_not_depend_on_workers(method):
+    serial = simulate_normal_returns(0.001, 0.02, 1000, seed=9, method=method, workers=1)
+    threaded = simulate_normal_returns(0.001, 0.02, 1000, seed=9, method=method, workers=4)
+    np.testing.assert_array_equal(serial, threaded)
+
+
+def test_streams_cover_every_scenario_once():
+    streams = ScenarioStreams(1000, block_size=256)
+    assert streams.map(lambda rng, lo, hi: (lo, hi)) == [(0, 256), (256, 512), (512, 768), (768, 1000)]
+
+
+def test_brownian_bridge_covariance():
+    times = np.array([1.0, 2.0, 3.0, 5.0])
+    z = np.random.default_rng(2).standard_normal((4, 200000, 1))
+    paths = brownian_bridge(z, times)[:, :, 0]
+    np.testing.assert_allclose(np.cov(paths), np.minimum.outer(times, times), atol=0.05)
+
+
+def test_batch_standard_error_of_mean():
+    values = np.random.default_rng(4).standard_normal(256 * 64)
+    se = batch_standard_error(values, np.mean)
+    np.testing.assert_allclose(se, 1 / np.sqrt(len(values)), rtol=0.25)
+    assert np.isnan(batch_standard_error(values[:300], np.mean))
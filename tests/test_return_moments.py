@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from return_moments import ReturnMoments
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(3)
+    index = pd.bdate_range('2022-01-03', periods=300)
+    values = 0.002 + rng.standard_normal((300, 3)) * [0.01, 0.02, 0.015]
+    frame = pd.DataFrame(values, index=index, columns=['ACB', 'HPG', 'VNM'])
+    frame.iloc[10, 1] = np.nan
+    return frame
+
+
+def test_window_matches_pandas(returns):
+    moments = ReturnMoments(returns)
+    clean = returns.dropna()
+    for start, end in [('2022-01-03', '2023-02-24'), ('2022-03-01', '2022-03-31'), ('2022-06-04', '2022-06-07')]:
+        mean, cov = moments.window(start, end)
+        expected = clean.loc[start:end]
+        pd.testing.assert_series_equal(mean, expected.mean(), check_names=False, atol=1e-15)
+        pd.testing.assert_frame_equal(cov, expected.cov(), atol=1e-15)
+
+
+def test_window_needs_two_days(returns):
+    moments = ReturnMoments(returns)
+    with pytest.raises(ValueError):
+        moments.window('2022-01-03', '2022-01-03')
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from risk_attribution import attribute_risk, attribution_table, parametric_attribution, scenario_attribution
+from risk_engine import tail_from_sorted
+
+MEAN = np.array([0.0005, 0.0008, 0.0003])
+COV = np.array([
+    [4.0, 1.2, 0.6],
+    [1.2, 6.25, 1.0],
+    [0.6, 1.0, 2.25],
+]) * 1e-4
+WEIGHTS = np.array([0.5, 0.3, 0.2])
+
+
+def _normal_var(weights, alpha=0.05):
+    return parametric_attribution(MEAN, COV, weights, alpha)['var']
+
+
+def test_parametric_components_sum_to_total():
+    attribution = parametric_attribution(MEAN, COV, WEIGHTS, 0.05)
+    np.testing.assert_allclose(WEIGHTS @ attribution['marginal_var'], attribution['var'], rtol=1e-12)
+    np.testing.assert_allclose(WEIGHTS @ attribution['marginal_es'], attribution['es'], rtol=1e-12)
+
+
+def test_parametric_marginals_are_gradients():
+    attribution = parametric_attribution(MEAN, COV, WEIGHTS, 0.05)
+    step = 1e-6
+    numeric = [(_normal_var(WEIGHTS + step * e) - _normal_var(WEIGHTS - step * e)) / (2 * step) for e in np.eye(3)]
+    np.testing.assert_allclose(attribution['marginal_var'], numeric, rtol=1e-6)
+
+
+def test_parametric_incremental_drops_each_holding():
+    attribution = parametric_attribution(MEAN, COV, WEIGHTS, 0.05)
+    for i in range(3):
+        without = WEIGHTS.copy()
+        without[i] = 0.0
+        np.testing.assert_allclose(attribution['incremental_var'][i], attribution['var'] - _normal_var(without),
+                                   rtol=1e-10)
+
+
+def test_scenario_components_sum_to_total():
+    scenarios = np.random.default_rng(6).multivariate_normal(MEAN, COV, 5000)
+    attribution = scenario_attribution(scenarios, WEIGHTS, 0.05)
+    var, es = tail_from_sorted(np.sort(scenarios @ WEIGHTS), [0.05])
+    np.testing.assert_allclose([attribution['var'], attribution['es']], [var[0], es[0]], rtol=1e-12)
+    np.testing.assert_allclose(WEIGHTS @ attribution['marginal_var'], attribution['var'], rtol=1e-12)
+    np.testing.assert_allclose(WEIGHTS @ attribution['marginal_es'], attribution['es'], rtol=1e-12)
+
+    # Close to the normal figures the scenarios were drawn from
+    normal = parametric_attribution(MEAN, COV, WEIGHTS, 0.05)
+    np.testing.assert_allclose(attribution['marginal_es'], normal['marginal_es'], rtol=0.1)
+
+    for i in range(3):
+        without = scenarios @ WEIGHTS - scenarios[:, i] * WEIGHTS[i]
+        np.testing.assert_allclose(attribution['incremental_var'][i],
+                                   attribution['var'] - np.percentile(without, 5), rtol=1e-12)
+
+
+def test_attribute_risk_table():
+    rng = np.random.default_rng(2)
+    returns = pd.DataFrame(rng.multivariate_normal(MEAN, COV, 800), columns=['ACB', 'HPG', 'VNM'])
+    weights = dict(zip(returns.columns, WEIGHTS))
+    for method in ('historical', 'parametric', 'monte_carlo'):
+        table = attribute_risk(returns, weights, 95, method=method, n_sims=2048)
+        assert list(table.index) == ['ACB', 'HPG', 'VNM']
+        np.testing.assert_allclose(table['component_var_share'].sum(), 1)
+        np.testing.assert_allclose(table['component_es_share'].sum(), 1)
+
+    with pytest.raises(ValueError):
+        attribute_risk(returns, weights, 95, method='garch_fhs')
+
+
+def test_attribution_table_columns():
+    attribution = parametric_attribution(MEAN, COV, WEIGHTS, 0.01)
+    table = attribution_table(attribution, WEIGHTS, ['ACB', 'HPG', 'VNM'])
+    np.testing.assert_allclose(table['component_var'], WEIGHTS * attribution['marginal_var'])
+    np.testing.assert_allclose(table['component_var'].sum(), attribution['var'])
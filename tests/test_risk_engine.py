@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from risk_engine import RiskResult, horizon_returns, tail_from_sorted
+
+
+@pytest.fixture(scope='module')
+def returns():
+    rng = np.random.default_rng(12)
+    return 0.0003 + 0.015 * rng.standard_t(5, 1500) / np.sqrt(5 / 3)
+
+
+@pytest.fixture(scope='module')
+def risk(returns):
+    return RiskResult(returns, levels=(90, 95, 99), horizons=(1, 5))
+
+
+def test_tail_from_sorted_matches_percentile(returns):
+    alphas = np.array([0.01, 0.05, 0.1, 0.15])
+    var, es = tail_from_sorted(np.sort(returns), alphas)
+    np.testing.assert_allclose(var, np.percentile(returns, alphas * 100), rtol=1e-12)
+    for threshold, tail_mean in zip(var, es):
+        np.testing.assert_allclose(tail_mean, returns[returns <= threshold].mean(), rtol=1e-12)
+
+
+def test_horizon_returns_are_overlapping_sums():
+    daily = np.arange(1.0, 7.0)
+    np.testing.assert_allclose(horizon_returns(daily, 3), [6.0, 9.0, 12.0, 15.0])
+
+
+def test_historical_and_parametric(risk, returns):
+    var, es = risk.value('historical', 95, horizon=5)
+    five_day = horizon_returns(returns, 5)
+    np.testing.assert_allclose(var, np.percentile(five_day, 5), rtol=1e-12)
+    np.testing.assert_allclose(es, five_day[five_day <= var].mean(), rtol=1e-12)
+
+    mean, std = returns.mean(), returns.std(ddof=1)
+    var, es = risk.value('parametric', 99)
+    np.testing.assert_allclose(var, mean + norm.ppf(0.01) * std, rtol=1e-12)
+    np.testing.assert_allclose(es, mean - std * norm.pdf(norm.ppf(0.01)) / 0.01, rtol=1e-12)
+
+
+def test_monte_carlo_is_close_to_parametric(risk):
+    for level in risk.levels:
+        mc_var, mc_es = risk.value('monte_carlo', level)
+        normal_var, normal_es = risk.value('parametric', level)
+        var_se, es_se = risk.standard_errors(level)
+        assert abs(mc_var - normal_var) < 4 * var_se
+        assert abs(mc_es - normal_es) < 4 * es_se
+
+
+def test_standard_errors_are_finite_in_deep_tails(returns):
+    # Fewer than one draw per 256-scenario block lies beyond the 99.9% quantile
+    risk = RiskResult(returns, levels=(99.9,), horizons=(1,), n_sims=2048)
+    var_se, es_se = risk.standard_errors(99.9)
+    assert np.isfinite(var_se) and np.isfinite(es_se) and es_se > 0
+
+
+def test_every_method_orders_var_and_es(risk):
+    assert risk.var.shape == (4, 3, 2)
+    assert (risk.es <= risk.var).all()
+    # Higher confidence means a deeper tail, and longer horizons a wider one
+    assert (np.diff(risk.var, axis=1) < 0).all()
+    assert (risk.var[:, :, 1] < risk.var[:, :, 0]).all()
+    table = risk.table(95)
+    assert list(table.index) == ['historical', 'parametric', 'monte_carlo', 'garch_fhs']
+    assert table.loc['garch_fhs', 'VaR'] == risk.value('garch_fhs', 95)[0]
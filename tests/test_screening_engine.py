@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from screening_engine import SCREEN_STAGES, load_fundamentals, missing_columns, run_screen
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'fundamentals.csv')
+
+
+@pytest.fixture(autouse=True)
+def no_statement_history(tmp_path, monkeypatch):
+    """Run away from the repo root so a financials.csv there cannot replace the fixture scores"""
+    monkeypatch.chdir(tmp_path)
+
+
+def plain_filter(stages):
+    """Counts after each stage from a straightforward pandas filter of the fixture"""
+    df = pd.read_csv(FIXTURE)
+    df['exchange'] = df['exchange'].str.strip().str.upper().replace({'HSX': 'HOSE'})
+    counts = [len(df)]
+    for conditions in stages.values():
+        for column, op, threshold in conditions:
+            if op == 'in':
+                df = df[df[column].isin(threshold)]
+            else:
+                df = df.query(f'{column} {op} @threshold')
+        counts.append(len(df))
+    return counts, sorted(df['ticker'])
+
+
+def test_default_screen_matches_plain_filter():
+    counts, tickers = run_screen(path=FIXTURE)
+    expected_counts, expected_tickers = plain_filter(SCREEN_STAGES)
+    assert list(counts) == expected_counts
+    assert list(counts.index) == ['Universe'] + list(SCREEN_STAGES)
+    assert sorted(tickers) == expected_tickers == ['ACB', 'DBD', 'FPT', 'NTP', 'VNM']
+
+
+def test_changed_thresholds_match_plain_filter():
+    stages = dict(SCREEN_STAGES)
+    stages['ROE'] = (('roe', '>', 0.05),)
+    stages['Exchange'] = (('exchange', 'in', ('HOSE', 'HNX', 'UPCOM')),)
+    stages['Missing data'] = (('missing_days', '<=', 150),)
+    counts, tickers = run_screen(stages, path=FIXTURE)
+    expected_counts, expected_tickers = plain_filter(stages)
+    assert list(counts) == expected_counts
+    assert sorted(tickers) == expected_tickers
+
+
+def test_missing_values_fail_their_condition():
+    fundamentals = load_fundamentals(FIXTURE)
+    assert fundamentals.loc['VCB', 'exchange'] == 'HOSE'
+    assert np.isnan(fundamentals.loc['GAS', 'eps'])
+
+    counts, _ = run_screen({'EPS': (('eps', '>', 0),), 'ROE': (('roe', '>', 0),)}, path=FIXTURE)
+    assert list(counts) == [16, 15, 14]
+
+
+def test_zmf_stage_without_scores(tmp_path):
+    path = str(tmp_path / 'fundamentals.csv')
+    pd.read_csv(FIXTURE).drop(columns=['z_score', 'm_score', 'f_score']).to_csv(path, index=False)
+    assert missing_columns(path=path) == {'ZMF-Score': ['f_score', 'm_score', 'z_score']}
+    with pytest.raises(ValueError):
+        run_screen(path=path)
+
+    stages = {label: conditions for label, conditions in SCREEN_STAGES.items() if label != 'ZMF-Score'}
+    counts, _ = run_screen(stages, path=path)
+    assert list(counts) == plain_filter(stages)[0]
+    assert missing_columns(path=FIXTURE) == {}
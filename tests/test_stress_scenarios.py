@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import stress_scenarios
+from stress_scenarios import ScenarioSet
+
+TICKERS = ['ACB', 'HPG', 'VNM']
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(17)
+    index = pd.bdate_range('2024-01-01', periods=120)
+    return pd.DataFrame(0.02 * rng.standard_normal((120, 3)), index=index, columns=TICKERS)
+
+
+def _replay_one(path, shock_days, weights):
+    """Reference replay of one path for one portfolio, day by day"""
+    wealth, peak = 1.0, 1.0
+    wealth_path, peaks, drawdowns = [], [], []
+    for day, daily in enumerate(path):
+        wealth *= 1 + daily @ weights
+        peak = max(peak, wealth)
+        wealth_path.append(wealth)
+        peaks.append(peak)
+        drawdowns.append(wealth / peak - 1 if day < shock_days else 0.0)
+
+    trough = int(np.argmin(drawdowns))
+    recovery = 0.0 if min(drawdowns) == 0 else np.nan
+    if min(drawdowns) < 0:
+        for day in range(trough + 1, len(path)):
+            if wealth_path[day] >= peaks[trough]:
+                recovery = day - trough
+                break
+    return wealth_path[shock_days - 1] - 1, min(drawdowns), trough, recovery
+
+
+def test_replay_matches_reference(returns, monkeypatch):
+    # Small chunks so the batched replay crosses chunk boundaries
+    monkeypatch.setattr(stress_scenarios, 'REPLAY_CHUNK', 3)
+    scenarios = ScenarioSet(TICKERS)
+    scenarios.add_historical('Tháng 2', '2024-02-01', '2024-02-29', returns, recovery_days=30)
+    scenarios.add_hypothetical('Ngân hàng -10%', {'ACB': -0.10})
+    scenarios.add_rolling_windows(returns.iloc[:40], 5, recovery_days=10)
+    weights = pd.DataFrame([[0.5, 0.3, 0.2], [0.0, 1.0, 0.0]], index=['Danh mục', 'HPG'], columns=TICKERS)
+
+    result = scenarios.replay(weights)
+    assert len(result) == 2 * len(scenarios.names)
+    assert result.index.names == ['scenario', 'portfolio']
+
+    for name, path, shock_days in zip(scenarios.names, scenarios._paths, scenarios._shock_days):
+        for portfolio, w in weights.iterrows():
+            expected = _replay_one(path, shock_days, w.to_numpy())
+            row = result.loc[(name, portfolio)]
+            np.testing.assert_allclose(row[['pnl', 'max_drawdown', 'trough_day', 'recovery_days']], expected,
+                                       rtol=1e-12)
+
+
+def test_hypothetical_shock(returns):
+    scenarios = ScenarioSet(TICKERS)
+    scenarios.add_hypothetical('Ngân hàng -10%', {'ACB': -0.10})
+    row = scenarios.replay({'ACB': 0.4, 'VNM': 0.6}).iloc[0]
+    np.testing.assert_allclose([row['pnl'], row['max_drawdown']], [-0.04, -0.04])
+    # A one-day path has nothing after the shock to recover on
+    assert np.isnan(row['recovery_days'])
+
+
+def test_scenario_bookkeeping(returns):
+    scenarios = ScenarioSet(TICKERS)
+    scenarios.add_historical('Tháng 2', '2024-02-03', '2024-02-10', returns)
+    scenarios.add_rolling_windows(returns, 10)
+    described = scenarios.describe()
+    assert described.loc['Tháng 2', 'start'] == pd.Timestamp('2024-02-05')
+    assert described.loc['Tháng 2', 'shock_days'] == 5
+    assert len(described) == 1 + len(returns) - 9
+    assert described.index[1] == 'Cửa sổ 01/01/2024-12/01/2024'
+
+    with pytest.raises(ValueError):
+        scenarios.add_hypothetical('Tháng 2', {'ACB': -0.1})
+    with pytest.raises(ValueError):
+        scenarios.add_historical('Tết', '2025-01-27', '2025-01-31', returns)
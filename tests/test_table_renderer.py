@@ -0,0 +1,23 @@
+import pandas as pd
+
+from table_renderer import TableColumn, render_table
+
+
+def test_values_and_headers_are_escaped():
+    df = pd.DataFrame({'name': ['<b>ACB</b>', 'S&P "500"'], 'accent': ['x" onclick="y', 'plain']})
+    columns = (TableColumn('name', 'Mã <CK>', 'Tên & mã', template='<strong>{}</strong>'),)
+    html = render_table(df, columns, row_class_field='accent')
+
+    assert '<th title="Tên &amp; mã">Mã &lt;CK&gt;</th>' in html
+    assert '<td><strong>&lt;b&gt;ACB&lt;/b&gt;</strong></td>' in html
+    assert '<strong>S&amp;P &quot;500&quot;</strong>' in html
+    assert '<tr class="x&quot; onclick=&quot;y">' in html
+
+
+def test_rows_follow_column_templates():
+    df = pd.DataFrame({'stock': ['VNM', 'DBD'], 'weight': [39.5, 36.9]})
+    columns = (TableColumn('stock', 'Stock', cell_class='label'), TableColumn('weight', 'Weight', template='{}%'))
+    html = render_table(df, columns, 'story-table compact')
+
+    assert html.startswith('<div class="story-table-wrap"><table class="story-table compact">')
+    assert '<tr><td class="label">VNM</td><td>39.5%</td></tr><tr><td class="label">DBD</td><td>36.9%</td></tr>' in html
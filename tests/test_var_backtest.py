@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import chi2
+
+from var_backtest import (VarBacktest, _RankTree, christoffersen_independence, kupiec_pof, rolling_historical,
+                          rolling_moments)
+
+
+@pytest.fixture(scope='module')
+def returns():
+    rng = np.random.default_rng(21)
+    index = pd.bdate_range('2021-01-04', periods=400)
+    # Rounded to whole basis points so windows contain ties
+    return pd.Series(np.round(0.012 * rng.standard_t(4, 400), 4), index=index)
+
+
+def test_rank_tree_tracks_a_sliding_window():
+    rng = np.random.default_rng(0)
+    values = np.sort(rng.standard_normal(50))
+    tree = _RankTree(len(values))
+    window = []
+    for step in range(200):
+        rank = int(rng.integers(len(values)))
+        if window and rng.random() < 0.4:
+            rank = window.pop(int(rng.integers(len(window))))
+            tree.add(rank, values[rank], -1)
+        else:
+            window.append(rank)
+            tree.add(rank, values[rank], 1)
+
+        ordered = sorted(window)
+        for k in range(1, len(ordered) + 1):
+            assert tree.kth(k) == ordered[k - 1]
+        cut = int(rng.integers(len(values) + 1))
+        count, total = tree.prefix(cut)
+        inside = [r for r in window if r < cut]
+        assert count == len(inside)
+        np.testing.assert_allclose(total, values[inside].sum(), atol=1e-12)
+
+
+def test_rolling_historical_matches_percentile(returns):
+    values = returns.to_numpy()
+    alphas = np.array([0.01, 0.05, 0.1])
+    var, es = rolling_historical(values, 60, alphas)
+    assert var.shape == (len(values) - 60, 3)
+    for t in range(len(var)):
+        window = values[t:t + 60]
+        np.testing.assert_allclose(var[t], np.percentile(window, alphas * 100), rtol=1e-12, atol=1e-15)
+        expected_es = [window[window <= threshold].mean() for threshold in var[t]]
+        np.testing.assert_allclose(es[t], expected_es, rtol=1e-12)
+
+
+def test_rolling_moments_match_pandas(returns):
+    mean, std = rolling_moments(returns.to_numpy(), 30)
+    rolling = returns.rolling(30)
+    np.testing.assert_allclose(mean, rolling.mean().to_numpy()[29:-1], atol=1e-15)
+    np.testing.assert_allclose(std, rolling.std().to_numpy()[29:-1], rtol=1e-9)
+
+
+def test_kupiec_matches_closed_form():
+    exceptions = np.zeros(250, dtype=bool)
+    exceptions[[10, 40, 41, 90, 150, 151, 152, 200, 230]] = True
+    n, x, alpha = 250, 9, 0.01
+    expected = -2 * ((n - x) * math.log(1 - alpha) + x * math.log(alpha)
+                     - (n - x) * math.log(1 - x / n) - x * math.log(x / n))
+    lr, p = kupiec_pof(exceptions, alpha)
+    np.testing.assert_allclose(lr, expected, rtol=1e-12)
+    np.testing.assert_allclose(p, chi2.sf(expected, 1), rtol=1e-12)
+
+    # No exceptions at all: the 0 * log(0) terms vanish
+    lr, _ = kupiec_pof(np.zeros(250, dtype=bool), alpha)
+    np.testing.assert_allclose(lr, -2 * n * math.log(1 - alpha), rtol=1e-12)
+
+
+def test_christoffersen_matches_transition_counts():
+    exceptions = np.array([0, 0, 1, 1, 0, 0, 0, 1, 0, 1, 1, 1, 0, 0, 0, 0, 1, 0, 0, 0])
+    # Transitions: n00 = 8, n01 = 4, n10 = 4, n11 = 3
+    n00, n01, n10, n11 = 8, 4, 4, 3
+    pi0, pi1, pi = n01 / (n00 + n01), n11 / (n10 + n11), (n01 + n11) / 19
+    expected = -2 * ((n00 + n10) * math.log(1 - pi) + (n01 + n11) * math.log(pi)
+                     - n00 * math.log(1 - pi0) - n01 * math.log(pi0)
+                     - n10 * math.log(1 - pi1) - n11 * math.log(pi1))
+    lr, p = christoffersen_independence(exceptions)
+    np.testing.assert_allclose(lr, expected, rtol=1e-12)
+    np.testing.assert_allclose(p, chi2.sf(expected, 1), rtol=1e-12)
+
+    # Clustered exceptions are rejected, and a run without any is not
+    assert christoffersen_independence(np.repeat([0, 1, 0, 1, 0], 20))[1] < 0.01
+    assert christoffersen_independence(np.zeros(100))[0] == 0
+
+
+def test_backtest_summary(returns):
+    normal_tail = (np.array([-1.645, -2.326]), np.array([-2.063, -2.665]))
+    backtest = VarBacktest(returns, 250, normal_tail, levels=(95, 99))
+    assert backtest.var.shape == (4, 150, 2)
+
+    frame = backtest.frame(95)
+    assert frame.index[0] == returns.index[250]
+    np.testing.assert_array_equal(frame['historical_exception'], frame['return'] < frame['historical_var'])
+
+    summary = backtest.summary(95)
+    assert list(summary.index) == ['historical', 'parametric', 'monte_carlo', 'garch_fhs']
+    assert (summary['exceptions'] == backtest.exceptions[:, :, 0].sum(axis=1)).all()
+    np.testing.assert_allclose(summary['expected'], 0.05 * 150)
+    np.testing.assert_allclose(summary['cc_lr'], summary['kupiec_lr'] + summary['christoffersen_lr'])
+
+    with pytest.raises(ValueError):
+        VarBacktest(returns.iloc[:100], 250, normal_tail)
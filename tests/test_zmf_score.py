@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pytest
+
+import zmf_score
+from data_loader import file_fingerprint
+from zmf_score import load_zmf_scores, worst_recent_scores
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'financials.csv')
+
+
+@pytest.fixture(scope='module')
+def scores():
+    return load_zmf_scores(FIXTURE)
+
+
+def test_altman_z_by_hand(scores):
+    # AAA 2023: working capital 400 - 200, assets 1000, liabilities 500
+    z = 1.2 * 200 / 1000 + 1.4 * 100 / 1000 + 3.3 * 80 / 1000 + 0.6 * 1500 / 500 + 1.0 * 1200 / 1000
+    assert scores.loc[('AAA', 2023), 'z_score'] == pytest.approx(z)
+    assert z == pytest.approx(3.644)
+
+
+def test_beneish_m_by_hand(scores):
+    dsri = (120 / 1200) / (110 / 1000)
+    gmi = ((1000 - 780) / 1000) / ((1200 - 900) / 1200)
+    aqi = (1 - (400 + 400) / 1000) / (1 - (350 + 375) / 900)
+    sgi = 1200 / 1000
+    depi = (25 / (25 + 375)) / (30 / (30 + 400))
+    sgai = (100 / 1200) / (90 / 1000)
+    lvgi = ((200 + 150) / 1000) / ((200 + 160) / 900)
+    tata = (60 - 90) / 1000
+    m = (-4.84 + 0.920 * dsri + 0.528 * gmi + 0.404 * aqi + 0.892 * sgi + 0.115 * depi
+         - 0.172 * sgai + 4.679 * tata - 0.327 * lvgi)
+    assert scores.loc[('AAA', 2023), 'm_score'] == pytest.approx(m)
+
+
+def test_piotroski_f_by_hand(scores):
+    # Every signal passes except the share count, which rose from 100 to 110
+    assert scores.loc[('AAA', 2023), 'f_score'] == 8
+    assert scores.loc[('AAA', 2023), 'zmf_composite'] == 3
+
+
+def test_scores_without_a_previous_period(scores):
+    first = scores.loc[('AAA', 2022)]
+    assert first['z_score'] == pytest.approx(1.2 * 150 / 900 + 1.4 * 60 / 900 + 3.3 * 60 / 900
+                                             + 0.6 * 1200 / 480 + 1.0 * 1000 / 900)
+    assert np.isnan(first['m_score']) and np.isnan(first['f_score']) and np.isnan(first['zmf_composite'])
+
+    # BBB did not report 2022, so 2023 has a Z-score only
+    assert scores.loc[('BBB', 2023), 'z_score'] == pytest.approx(
+        1.2 * 50 / 500 + 1.4 * -20 / 500 + 3.3 * 10 / 500 + 0.6 * 150 / 400 + 1.0 * 400 / 500)
+    assert np.isnan(scores.loc[('BBB', 2023), 'zmf_composite'])
+    assert np.isnan(scores.loc[('BBB', 2022), 'z_score'])
+
+
+def test_worst_recent_scores(scores):
+    worst = worst_recent_scores(scores)
+    assert worst.loc['AAA', 'z_score'] == pytest.approx(scores.loc[('AAA', 2022), 'z_score'])
+    assert worst.loc['AAA', 'm_score'] == pytest.approx(scores.loc[('AAA', 2023), 'm_score'])
+    assert worst.loc['AAA', 'zmf_composite'] == 3
+
+
+def test_score_store_evicts_superseded_periods(monkeypatch):
+    monkeypatch.setattr(zmf_score, 'SCORE_STORE_SIZE', 2)
+    store, _ = zmf_score._score_store()
+    store.clear()
+    financials = zmf_score._financials(file_fingerprint(FIXTURE), FIXTURE)
+    for cash_flow in (90, 91, 92):
+        edited = financials.copy()
+        edited.loc[('AAA', 2023), 'cfo'] = cash_flow
+        scores = zmf_score.compute_zmf_scores(edited)
+        assert scores.loc[('AAA', 2023), 'f_score'] == 8
+    # The unchanged 2022 entry and the latest 2023 edit are left
+    assert sorted(key[0] for key in store) == [2022, 2023]
@@ -172,5 +172,36 @@ def apply_theme_css():
         -webkit-text-fill-color: transparent;
         background-clip: text;
     }}
+
+    /* Tables rendered by table_renderer.render_table */
+    .story-table-wrap {{ overflow-x: auto; }}
+    .story-table {{ width: 100%; border-collapse: collapse; text-align: center; }}
+    .story-table th, .story-table td {{ padding: 12px; text-align: center; color: #333; }}
+    .story-table th {{ font-weight: bold; }}
+    .story-table th[title] {{ cursor: help; }}
+    .story-table thead tr {{ border-bottom: 2px solid {theme['card_border']}; }}
+    .story-table tbody tr {{ border-bottom: 1px solid #ddd; }}
+    .story-table .sep {{ border-right: 1px solid #ddd; }}
+    .story-table .strong {{ font-weight: bold; }}
+    .story-table .label {{ color: #1565c0; }}
+    .story-table .muted {{ color: #666; }}
+    .story-table.large {{ font-size: 17px; }}
+    .story-table.compact th, .story-table.compact td {{ padding: 8px; }}
+    .story-table.compact th {{ color: #1565c0; }}
+    .story-table.panel {{ background-color: #f5f5f5; border: 1px solid #ddd; border-radius: 8px; }}
+    .story-table.plain-head thead tr {{ border-bottom: 2px solid #ddd; }}
+    .story-table.striped thead tr {{ background-color: {theme['card_bg']}; }}
+    .story-table.striped tbody tr:nth-child(odd) {{ background-color: #F5F5F5; }}
+    .story-table.striped tbody tr:nth-child(even) {{ background-color: #FFFFFF; }}
+    .story-table .th-red {{ background: linear-gradient(135deg, #FFCDD2 0%, #EF9A9A 100%); }}
+    .story-table .th-green {{ background: linear-gradient(135deg, #C8E6C9 0%, #81C784 100%); }}
+    .story-table .th-yellow {{ background: linear-gradient(135deg, #FFF9C4 0%, #FFE082 100%); }}
+    .story-table .th-coral {{ background: linear-gradient(135deg, #FFCCBC 0%, #FF8A65 100%); }}
+    .story-table .th-orange {{ background: linear-gradient(135deg, #FFE0B2 0%, #FFB74D 100%); }}
+    .story-table .th-blue {{ background: linear-gradient(135deg, #BBDEFB 0%, #64B5F6 100%); }}
+    .story-table tr.accent-green td:first-child {{ border-left: 4px solid #4CAF50; }}
+    .story-table tr.accent-red td:first-child {{ border-left: 4px solid #FF6B6B; }}
+    .story-table tr.accent-gold td:first-child {{ border-left: 4px solid #FFD700; }}
+    .story-table tr.accent-grey td:first-child {{ border-left: 4px solid #999; }}
     </style>
     """, unsafe_allow_html=True)
@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.special import xlogy
+from scipy.stats import chi2, norm
+
+from data_loader import data_fingerprint, load_portfolio_returns
+from garch_fhs import filter_returns, rolling_garch_fits
+from risk_engine import CONFIDENCE_LEVELS, VAR_METHODS, load_risk_result, tail_from_sorted
+
+# Estimation windows (trading days) offered for the rolling backtest
+BACKTEST_WINDOWS = (125, 250, 500)
+
+
+class _RankTree:
+    """Fenwick trees of counts and sums over value ranks: insert, remove, k-th smallest and
+    prefix (count, sum) of a sliding window, each in O(log n)"""
+
+    def __init__(self, size):
+        self.size = size
+        self.counts = [0] * (size + 1)
+        self.sums = [0.0] * (size + 1)
+        self.top = 1 << size.bit_length()
+
+    def add(self, rank, value, sign):
+        i = rank + 1
+        while i <= self.size:
+            self.counts[i] += sign
+            self.sums[i] += sign * value
+            i += i & -i
+
+    def kth(self, k):
+        """Rank of the k-th smallest value in the window (k counted from 1)"""
+        pos, step = 0, self.top
+        while step:
+            if pos + step <= self.size and self.counts[pos + step] < k:
+                pos += step
+                k -= self.counts[pos]
+            step >>= 1
+        return pos
+
+    def prefix(self, rank):
+        """(count, sum) of the window values with rank below ``rank``"""
+        count, total, i = 0, 0.0, rank
+        while i > 0:
+            count += self.counts[i]
+            total += self.sums[i]
+            i -= i & -i
+        return count, total
+
+
+def rolling_historical(returns, window, alphas):
+    """One-day historical VaR and ES forecasts from each trailing ``window`` of returns.
+
+    Row ``t`` is the forecast for day ``window + t``, built from the ``window`` days before
+    it. The window slides through rank-indexed Fenwick trees, so each day costs
+    O(log n) per level instead of a re-sort. VaR interpolates linearly as ``np.percentile``;
+    ES is the mean of the window returns at or below it.
+    """
+    returns = np.asarray(returns, dtype=float)
+    alphas = np.asarray(alphas, dtype=float)
+    values, ranks = np.unique(returns, return_inverse=True)
+    tree = _RankTree(len(values))
+
+    position = alphas * (window - 1)
+    below = np.floor(position).astype(int)
+    above = np.minimum(below + 1, window - 1)
+    weight = position - below
+
+    n_days = len(returns) - window
+    var = np.empty((max(n_days, 0), len(alphas)))
+    es = np.empty_like(var)
+    for t in range(len(returns) - 1):
+        tree.add(ranks[t], returns[t], 1)
+        if t >= window:
+            tree.add(ranks[t - window], returns[t - window], -1)
+        if t < window - 1:
+            continue
+
+        row = t - window + 1
+        for i in range(len(alphas)):
+            low = values[tree.kth(below[i] + 1)]
+            high = values[tree.kth(above[i] + 1)]
+            var[row, i] = low + weight[i] * (high - low)
+            count, total = tree.prefix(np.searchsorted(values, var[row, i], side='right'))
+            es[row, i] = total / count
+    return var, es
+
+
+def rolling_moments(returns, window):
+    """Mean and standard deviation (ddof=1) of each trailing ``window``, aligned as rolling_historical"""
+    returns = np.asarray(returns, dtype=float)
+    centered = returns - returns.mean()
+    s1 = np.concatenate([[0.0], np.cumsum(centered)])
+    s2 = np.concatenate([[0.0], np.cumsum(centered**2)])
+    w1 = (s1[window:] - s1[:-window])[:-1]
+    w2 = (s2[window:] - s2[:-window])[:-1]
+    variance = (w2 - w1**2 / window) / (window - 1)
+    return w1 / window + returns.mean(), np.sqrt(np.maximum(variance, 0.0))
+
+
+def rolling_fhs(returns, window, alphas):
+    """One-day GARCH-FHS VaR and ES forecasts, aligned as rolling_historical.
+
+    Every window is refitted, warm-started from the previous window's parameters, and its
+    standardized-residual tail is scaled by the next-day volatility.
+    """
+    returns = np.asarray(returns, dtype=float)
+    var = np.empty((len(returns) - window, len(alphas)))
+    es = np.empty_like(var)
+    for t, fit in enumerate(rolling_garch_fits(returns, window)):
+        standardized, sigma_next = filter_returns(returns[t:t + window], fit)
+        tail_var, tail_es = tail_from_sorted(np.sort(standardized), alphas)
+        var[t], es[t] = fit.mean + sigma_next * tail_var, fit.mean + sigma_next * tail_es
+    return var, es
+
+
+def kupiec_pof(exceptions, alpha):
+    """Kupiec proportion-of-failures LR statistic and its chi-square(1) p-value"""
+    n_obs, hits = len(exceptions), int(np.sum(exceptions))
+    rate = hits / n_obs
+    lr = -2 * (xlogy(n_obs - hits, 1 - alpha) + xlogy(hits, alpha)
+               - xlogy(n_obs - hits, 1 - rate) - xlogy(hits, rate))
+    return lr, chi2.sf(lr, 1)
+
+
+def christoffersen_independence(exceptions):
+    """Christoffersen LR statistic for independence of exceptions and its chi-square(1) p-value"""
+    exceptions = np.asarray(exceptions, dtype=int)
+    prev, cur = exceptions[:-1], exceptions[1:]
+    n00 = np.sum((prev == 0) & (cur == 0))
+    n01 = np.sum((prev == 0) & (cur == 1))
+    n10 = np.sum((prev == 1) & (cur == 0))
+    n11 = np.sum((prev == 1) & (cur == 1))
+
+    pi0 = n01 / (n00 + n01) if n00 + n01 else 0.0
+    pi1 = n11 / (n10 + n11) if n10 + n11 else 0.0
+    pi = (n01 + n11) / (n00 + n01 + n10 + n11)
+    lr = -2 * (xlogy(n00 + n10, 1 - pi) + xlogy(n01 + n11, pi)
+               - xlogy(n00, 1 - pi0) - xlogy(n01, pi0) - xlogy(n10, 1 - pi1) - xlogy(n11, pi1))
+    lr = max(lr, 0.0)
+    return lr, chi2.sf(lr, 1)
+
+
+class VarBacktest:
+    """Rolling one-day VaR/ES forecasts of every method, their exceptions and coverage tests.
+
+    Each day is forecast from the ``window`` days before it. Historical uses the sliding
+    window's order statistics and parametric the rolling normal moments. Monte Carlo
+    applies the same rolling moments to the tail of one batch of standard normal draws
+    (``normal_tail``, as in ``risk_engine.RiskResult``). GARCH-FHS refits a GARCH(1,1) on
+    every window. ``var`` and ``es`` are arrays (method, day, level) and ``exceptions``
+    marks the days whose return fell below VaR.
+    """
+
+    def __init__(self, returns, window, normal_tail, levels=CONFIDENCE_LEVELS):
+        returns = returns.dropna()
+        values = returns.to_numpy(dtype=float)
+        if len(values) <= window:
+            raise ValueError("Backtest window must be shorter than the return history")
+        self.window = window
+        self.levels = tuple(levels)
+        self.alphas = 1 - np.asarray(self.levels, dtype=float) / 100
+        self.index = returns.index[window:]
+        self.realized = values[window:]
+
+        mean, std = rolling_moments(values, window)
+        q = norm.ppf(self.alphas)
+        mc_var, mc_es = (np.asarray(tail) for tail in normal_tail)
+
+        self.var = np.empty((len(VAR_METHODS), len(self.realized), len(self.levels)))
+        self.es = np.empty_like(self.var)
+        self.var[0], self.es[0] = rolling_historical(values, window, self.alphas)
+        self.var[1] = mean[:, None] + std[:, None] * q
+        self.es[1] = mean[:, None] - std[:, None] * norm.pdf(q) / self.alphas
+        self.var[2] = mean[:, None] + std[:, None] * mc_var
+        self.es[2] = mean[:, None] + std[:, None] * mc_es
+        self.var[3], self.es[3] = rolling_fhs(values, window, self.alphas)
+        self.exceptions = self.realized[None, :, None] < self.var
+
+    def summary(self, level):
+        """Exception count, coverage tests and realized-to-forecast ES ratio of every method"""
+        i = self.levels.index(level)
+        alpha = self.alphas[i]
+        rows = []
+        for k in range(len(VAR_METHODS)):
+            hits = self.exceptions[k, :, i]
+            pof, pof_p = kupiec_pof(hits, alpha)
+            ind, ind_p = christoffersen_independence(hits)
+            cc = pof + ind
+            rows.append({
+                'exceptions': int(hits.sum()),
+                'expected': alpha * len(hits),
+                'kupiec_lr': pof, 'kupiec_p': pof_p,
+                'christoffersen_lr': ind, 'christoffersen_p': ind_p,
+                'cc_lr': cc, 'cc_p': chi2.sf(cc, 2),
+                'es_ratio': (self.realized[hits] / self.es[k, hits, i]).mean() if hits.any() else np.nan,
+            })
+        return pd.DataFrame(rows, index=list(VAR_METHODS))
+
+    def frame(self, level):
+        """Realized returns with each method's VaR and exception flag at one level, indexed by day"""
+        i = self.levels.index(level)
+        data = {'return': self.realized}
+        for k, method in enumerate(VAR_METHODS):
+            data[f'{method}_var'] = self.var[k, :, i]
+            data[f'{method}_exception'] = self.exceptions[k, :, i]
+        return pd.DataFrame(data, index=self.index)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _backtest(fingerprint, window, method):
+    normal_tail = load_risk_result(method).normal_tail
+    return VarBacktest(load_portfolio_returns()['Portfolio'], window, normal_tail)
+
+
+def load_backtest(window=250, method='standard'):
+    """Rolling backtest of the port.csv returns for one window, shared by every session.
+
+    ``method`` is the variance-reduction scheme of the Monte Carlo draws. All confidence
+    levels come from the same pass, so switching level is a lookup.
+    """
+    return _backtest(data_fingerprint(), window, method)
@@ -0,0 +1,211 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import file_fingerprint
+from mc_backend import default_workers
+
+# Yearly financial statements, one row per (ticker, period), amounts in the same currency unit
+FINANCIALS_PATH = 'financials.csv'
+
+# Statement items each score needs
+FINANCIAL_COLUMNS = [
+    'total_assets', 'current_assets', 'current_liabilities', 'total_liabilities', 'long_term_debt',
+    'retained_earnings', 'ebit', 'revenue', 'cogs', 'sga', 'net_income', 'cfo', 'depreciation', 'ppe',
+    'receivables', 'market_cap', 'shares',
+]
+
+# Safe-zone thresholds: Altman Z above, Beneish M below, Piotroski F at or above
+Z_SAFE = 2.99
+M_SAFE = -1.78
+F_STRONG = 7
+
+# Reporting periods looked back over when taking the worst score of each ticker
+SCORE_YEARS = 3
+
+# Scored periods kept in the shared store, least recently used evicted first
+SCORE_STORE_SIZE = 256
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+
+def altman_z(cur):
+    """Altman Z-score of every ticker from one period's statement items"""
+    ta = cur['total_assets']
+    return (1.2 * _ratio(cur['current_assets'] - cur['current_liabilities'], ta)
+            + 1.4 * _ratio(cur['retained_earnings'], ta)
+            + 3.3 * _ratio(cur['ebit'], ta)
+            + 0.6 * _ratio(cur['market_cap'], cur['total_liabilities'])
+            + 1.0 * _ratio(cur['revenue'], ta))
+
+
+def beneish_m(cur, prev):
+    """Beneish eight-variable M-score of every ticker from two consecutive periods"""
+    def gross_margin(s):
+        return _ratio(s['revenue'] - s['cogs'], s['revenue'])
+
+    def soft_assets(s):
+        return 1 - _ratio(s['current_assets'] + s['ppe'], s['total_assets'])
+
+    def depreciation_rate(s):
+        return _ratio(s['depreciation'], s['depreciation'] + s['ppe'])
+
+    def leverage(s):
+        return _ratio(s['current_liabilities'] + s['long_term_debt'], s['total_assets'])
+
+    dsri = _ratio(_ratio(cur['receivables'], cur['revenue']), _ratio(prev['receivables'], prev['revenue']))
+    gmi = _ratio(gross_margin(prev), gross_margin(cur))
+    aqi = _ratio(soft_assets(cur), soft_assets(prev))
+    sgi = _ratio(cur['revenue'], prev['revenue'])
+    depi = _ratio(depreciation_rate(prev), depreciation_rate(cur))
+    sgai = _ratio(_ratio(cur['sga'], cur['revenue']), _ratio(prev['sga'], prev['revenue']))
+    lvgi = _ratio(leverage(cur), leverage(prev))
+    tata = _ratio(cur['net_income'] - cur['cfo'], cur['total_assets'])
+
+    return (-4.84 + 0.920 * dsri + 0.528 * gmi + 0.404 * aqi + 0.892 * sgi + 0.115 * depi
+            - 0.172 * sgai + 4.679 * tata - 0.327 * lvgi)
+
+
+def piotroski_f(cur, prev):
+    """Piotroski F-score (0-9) of every ticker from two consecutive periods.
+
+    ROA uses end-of-period assets, so only two periods are needed. Signals that cannot be
+    evaluated count as failed; NaN when either period is missing altogether.
+    """
+    def roa(s):
+        return _ratio(s['net_income'], s['total_assets'])
+
+    with np.errstate(invalid='ignore'):
+        signals = [
+            roa(cur) > 0,
+            cur['cfo'] > 0,
+            roa(cur) > roa(prev),
+            cur['cfo'] > cur['net_income'],
+            _ratio(cur['long_term_debt'], cur['total_assets']) < _ratio(prev['long_term_debt'], prev['total_assets']),
+            _ratio(cur['current_assets'], cur['current_liabilities'])
+            > _ratio(prev['current_assets'], prev['current_liabilities']),
+            cur['shares'] <= prev['shares'],
+            _ratio(cur['revenue'] - cur['cogs'], cur['revenue']) > _ratio(prev['revenue'] - prev['cogs'], prev['revenue']),
+            _ratio(cur['revenue'], cur['total_assets']) > _ratio(prev['revenue'], prev['total_assets']),
+        ]
+    score = np.sum(signals, axis=0).astype(float)
+    return np.where(np.isnan(cur['total_assets']) | np.isnan(prev['total_assets']), np.nan, score)
+
+
+def score_period(cur, prev):
+    """Z, M and F scores plus the safe-zone count for one period, vectorized across tickers.
+
+    ``cur`` and ``prev`` map each statement item to an array over the same tickers (NaN
+    where a ticker did not report). Returns a dict of arrays. The composite is NaN wherever
+    one of the three scores is, e.g. in a ticker's first period, where M and F have no prior
+    year to compare with.
+    """
+    z, m, f = altman_z(cur), beneish_m(cur, prev), piotroski_f(cur, prev)
+    with np.errstate(invalid='ignore'):
+        composite = (z > Z_SAFE).astype(float) + (m < M_SAFE) + (f >= F_STRONG)
+    composite[np.isnan(z) | np.isnan(m) | np.isnan(f)] = np.nan
+    return {'z_score': z, 'm_score': m, 'f_score': f, 'zmf_composite': composite}
+
+
+def _statement_arrays(frame):
+    return {column: frame[column].to_numpy(dtype=float) for column in FINANCIAL_COLUMNS}
+
+
+def _digest(frame):
+    return hashlib.sha1(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes()).hexdigest()
+
+
+@st.cache_resource(show_spinner=False)
+def _score_store():
+    """Scores per (period, statement digest), shared by every session.
+
+    A period's entry depends only on its own and the previous period's statements, so a new
+    filing adds entries for its period (and the one after it) and leaves the rest cached.
+    Entries superseded by later edits age out once the store holds SCORE_STORE_SIZE periods.
+    """
+    return OrderedDict(), threading.Lock()
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _financials(fingerprint, path=FINANCIALS_PATH):
+    """Statements as a (ticker, period) indexed float table covering every ticker in every period"""
+    df = pd.read_csv(path)
+    df['ticker'] = df['ticker'].astype(str).str.strip().str.upper()
+    df = df.set_index(['ticker', 'period'])[FINANCIAL_COLUMNS].apply(pd.to_numeric, errors='coerce')
+    full = pd.MultiIndex.from_product([df.index.levels[0], sorted(df.index.levels[1])], names=df.index.names)
+    return df[~df.index.duplicated(keep='last')].reindex(full)
+
+
+def financials_available(path=FINANCIALS_PATH):
+    """Whether the statement history has been exported next to the app"""
+    return os.path.exists(path)
+
+
+def compute_zmf_scores(financials, workers=None):
+    """Z, M and F scores for every (ticker, period) of a statement table.
+
+    Each period is scored across all tickers at once and periods are scored in parallel on
+    a thread pool. Periods whose statements (and the previous period's) are unchanged are
+    taken from the shared per-period store. The first period has no previous year, so only
+    its Z-score is defined.
+    """
+    tickers = financials.index.get_level_values(0).unique()
+    periods = sorted(financials.index.get_level_values(1).unique())
+    by_period = {period: financials.xs(period, level=1).reindex(tickers) for period in periods}
+    empty = by_period[periods[0]] * np.nan
+
+    store, lock = _score_store()
+    keys, missing = [], []
+    for i, period in enumerate(periods):
+        prev = by_period[periods[i - 1]] if i else empty
+        key = (period, _digest(by_period[period]), _digest(prev))
+        keys.append(key)
+        with lock:
+            if key not in store:
+                missing.append((key, by_period[period], prev))
+
+    def score(task):
+        key, cur, prev = task
+        return key, score_period(_statement_arrays(cur), _statement_arrays(prev))
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(workers or default_workers(), len(missing))) as pool:
+            results = list(pool.map(score, missing))
+        with lock:
+            store.update(results)
+
+    with lock:
+        frames = {key[0]: pd.DataFrame(store[key], index=tickers) for key in keys}
+        for key in keys:
+            store.move_to_end(key)
+        while len(store) > max(SCORE_STORE_SIZE, len(keys)):
+            store.popitem(last=False)
+    return pd.concat(frames, names=['period']).swaplevel().sort_index()
+
+
+def load_zmf_scores(path=FINANCIALS_PATH):
+    """Scores for every (ticker, period) in the statement history, or None when it is not there"""
+    if not financials_available(path):
+        return None
+    return compute_zmf_scores(_financials(file_fingerprint(path), path))
+
+
+def worst_recent_scores(scores, years=SCORE_YEARS):
+    """Worst Z (lowest), M (highest) and F (lowest) of each ticker over its last ``years`` periods"""
+    recent = scores.dropna(subset=['z_score']).groupby(level=0, group_keys=False).tail(years)
+    grouped = recent.groupby(level=0)
+    return pd.DataFrame({
+        'z_score': grouped['z_score'].min(),
+        'm_score': grouped['m_score'].max(),
+        'f_score': grouped['f_score'].min(),
+        'zmf_composite': grouped['zmf_composite'].min(),
+    })